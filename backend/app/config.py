@@ -22,10 +22,112 @@ class Settings(BaseSettings):
     # Alpha Vantage API configuration
     ALPHA_VANTAGE_API_KEY: str = ""
     
+    # Market data HTTP client configuration (shared pooled client)
+    MARKET_DATA_BASE_URL: str = "https://www.alphavantage.co"
+    MARKET_DATA_TIMEOUT: float = 10.0
+    MARKET_DATA_CONNECT_TIMEOUT: float = 5.0
+    MARKET_DATA_MAX_CONNECTIONS: int = 20
+    MARKET_DATA_MAX_KEEPALIVE: int = 10
+    MARKET_DATA_KEEPALIVE_EXPIRY: float = 30.0
+    MARKET_DATA_HTTP2: bool = False
+    
+    # Alpha Vantage plan limits and upstream request queue
+    ALPHA_VANTAGE_CALLS_PER_MINUTE: int = 5
+    ALPHA_VANTAGE_CALLS_PER_DAY: int = 500
+    UPSTREAM_QUEUE_MAX_SIZE: int = 200
+    UPSTREAM_QUEUE_DEADLINE: float = 20.0
+    
+    # Batch quotes (bulk endpoint requires a premium Alpha Vantage plan)
+    ALPHA_VANTAGE_BULK_QUOTES: bool = False
+    BATCH_QUOTE_MAX_SYMBOLS: int = 100
+    BATCH_QUOTE_CONCURRENCY: int = 8
+    
+    # Market data provider: "alpha_vantage", "replay" (payloads captured to
+    # MARKET_DATA_CAPTURE_DIR) or "synthetic" (generated prices for load tests)
+    MARKET_DATA_PROVIDER: str = "alpha_vantage"
+    MARKET_DATA_CAPTURE: bool = False
+    MARKET_DATA_CAPTURE_DIR: str = "data/captures"
+    SYNTHETIC_SEED: int = 42
+    SYNTHETIC_SYMBOLS: int = 5000
+    # Injected latency (seconds plus up to JITTER extra) and error rate on every provider call
+    MARKET_DATA_FAULT_LATENCY: float = 0.0
+    MARKET_DATA_FAULT_JITTER: float = 0.0
+    MARKET_DATA_FAULT_ERROR_RATE: float = 0.0
+    MARKET_DATA_FAULT_SEED: int = 0
+    
     # OpenAI API configuration
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o"
     OPENAI_MAX_TOKENS: int = 1000
+    OPENAI_TIMEOUT: float = 30.0
+    
+    # Supabase calls made through the circuit breaker (auth)
+    SUPABASE_TIMEOUT: float = 10.0
+    
+    # Upstream circuit breakers (Alpha Vantage, OpenAI, Supabase).
+    # Timeouts adapt to this multiple of recent p99 latency, between
+    # BREAKER_MIN_TIMEOUT and each upstream's configured timeout
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_TIMEOUT: float = 30.0
+    BREAKER_TIMEOUT_MULTIPLIER: float = 3.0
+    BREAKER_MIN_TIMEOUT: float = 1.0
+    # Seconds past expiry cached data is kept to serve while an upstream is down
+    UPSTREAM_FALLBACK_WINDOW: float = 6 * 60 * 60
+    
+    # In-memory cache configuration
+    CACHE_SWEEP_INTERVAL: float = 30.0
+    # Seconds past expiry that quotes/fundamentals are served stale while refreshing
+    QUOTE_STALE_WINDOW: float = 300.0
+    OVERVIEW_STALE_WINDOW: float = 86400.0
+    # Seconds "symbol not found" / "no data" outcomes are cached for
+    NEGATIVE_CACHE_TTL: float = 300.0
+    # Cache snapshots for warm restarts (seconds between saves, max seconds spent loading)
+    CACHE_SNAPSHOT_ENABLED: bool = True
+    CACHE_SNAPSHOT_DIR: str = "data/cache"
+    CACHE_SNAPSHOT_INTERVAL: float = 300.0
+    CACHE_SNAPSHOT_LOAD_BUDGET: float = 2.0
+    # Cache tier shared by all workers: "memory" (none), "local" (Unix socket
+    # server hosted by one worker) or "redis"
+    CACHE_BACKEND: str = "memory"
+    CACHE_SOCKET_PATH: str = "data/cache.sock"
+    CACHE_LOCAL_MAX_BYTES: int = 256 * 1024 * 1024
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_BACKEND_TIMEOUT: float = 0.5
+    # Seconds one worker may hold a key's fetch lock before others fetch it themselves
+    CACHE_LOCK_TTL: float = 15.0
+    
+    # Background quote refresher (keeps hot symbols warm during market hours)
+    QUOTE_REFRESH_ENABLED: bool = True
+    QUOTE_REFRESH_INTERVAL: float = 60.0
+    # Share of the per-minute and per-day quota the refresher may use
+    QUOTE_REFRESH_QUOTA_SHARE: float = 0.5
+    # Seconds a requested symbol stays hot, and how often holdings are reloaded
+    HOT_SYMBOL_WINDOW: float = 1800.0
+    HOLDINGS_SYMBOLS_REFRESH: float = 300.0
+    
+    # Per-user portfolio snapshots (kept current by trades and quote updates,
+    # rebuilt from Supabase after PORTFOLIO_SNAPSHOT_TTL seconds)
+    PORTFOLIO_SNAPSHOT_TTL: float = 300.0
+    PORTFOLIO_SNAPSHOT_MAX_USERS: int = 10_000
+    
+    # Live quote streaming (WebSocket/SSE)
+    STREAM_POLL_INTERVAL: float = 5.0
+    STREAM_HEARTBEAT_INTERVAL: float = 15.0
+    STREAM_MAX_SYMBOLS: int = 50
+    
+    # Local symbol search index (Alpha Vantage LISTING_STATUS file)
+    SYMBOL_LISTING_PATH: str = "data/listing_status.csv"
+    SYMBOL_LISTING_MAX_AGE: float = 86400.0
+    SYMBOL_LISTING_CHECK_INTERVAL: float = 3600.0
+    
+    # Intraday series: seeded once from full output, then merged with compact
+    # refreshes every INTRADAY_REFRESH_INTERVAL seconds and trimmed to a rolling window
+    INTRADAY_REFRESH_INTERVAL: float = 60.0
+    INTRADAY_WINDOW_DAYS: int = 31
+    
+    # Persistent daily price history (memory-mapped files shared by all workers)
+    HISTORY_STORE_ENABLED: bool = True
+    HISTORY_DATA_DIR: str = "data/history"
     
     # Application configuration
     APP_NAME: str = "Trading Application API"
@@ -2,10 +2,14 @@
 Database connection using Supabase client.
 - Supabase client initialisation
 - Helper function to get Supabase client instance
+- Circuit breaker for Supabase calls
 """
 
+import httpx
+from gotrue.errors import AuthRetryableError
 from supabase import create_client, Client
 from app.config import settings
+from app.utils.circuit_breaker import CircuitBreaker, get_circuit_breaker
 
 # initialise Supabase client
 # The client handles all database operations using Supabase's REST API
@@ -26,3 +30,17 @@ def get_supabase() -> Client:
         Client: Supabase client instance
     """
     return supabase
+
+
+def _is_supabase_failure(error: BaseException) -> bool:
+    """Network errors and retryable (5xx) auth errors count against Supabase."""
+    return isinstance(error, (httpx.TransportError, AuthRetryableError))
+
+
+def get_supabase_breaker() -> CircuitBreaker:
+    """
+    Get the Supabase circuit breaker.
+    Wrap blocking Supabase calls as breaker.call(lambda: asyncio.to_thread(fn))
+    to get an adaptive timeout and fast failure while Supabase is down.
+    """
+    return get_circuit_breaker("supabase", settings.SUPABASE_TIMEOUT, _is_supabase_failure)
@@ -3,6 +3,9 @@ FastAPI application entry point.
 initialises the FastAPI app with CORS configuration and includes all routers.
 """
 
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
@@ -16,6 +19,20 @@ from app.utils.error_handlers import (
     general_exception_handler
 )
 from app.utils.middleware import RequestLoggingMiddleware
+from app.utils.cache_snapshot import CacheSnapshotter
+from app.utils.cache_backend import get_cache_backend
+from app.utils.circuit_breaker import get_breaker_stats
+from app.services.market_data_client import start_market_data_client, close_market_data_client
+from app.services.market_data_provider import get_market_data_provider
+from app.services.stock_service import get_stock_cache, get_cache_stats
+from app.services.recommendation_service import get_recommendation_cache
+from app.services.upstream_scheduler import get_upstream_scheduler
+from app.services.ohlcv_store import get_ohlcv_store
+from app.services.quote_refresher import get_quote_refresher
+from app.services.quote_stream import get_quote_hub
+from app.services.portfolio_snapshots import get_portfolio_snapshots
+from app.services.trading_calendar import get_trading_calendar
+from app.services.symbol_index import get_symbol_index
 import logging
 
 # Configure logging
@@ -24,11 +41,74 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan.
+    Opens shared resources on startup and releases them on shutdown.
+    """
+    start_market_data_client()
+    # Build the trading calendar up front so no request pays for it
+    get_trading_calendar()
+    get_upstream_scheduler().start()
+    
+    # Warm-start the caches from the last snapshot (bounded, so startup stays fast)
+    snapshotters = []
+    if settings.CACHE_SNAPSHOT_ENABLED:
+        snapshotters = [
+            CacheSnapshotter(
+                get_stock_cache().engine,
+                os.path.join(settings.CACHE_SNAPSHOT_DIR, "stock.snap"),
+                settings.CACHE_SNAPSHOT_INTERVAL
+            ),
+            CacheSnapshotter(
+                get_recommendation_cache().engine,
+                os.path.join(settings.CACHE_SNAPSHOT_DIR, "recommendation.snap"),
+                settings.CACHE_SNAPSHOT_INTERVAL
+            )
+        ]
+        await asyncio.gather(*(s.load(settings.CACHE_SNAPSHOT_LOAD_BUDGET) for s in snapshotters))
+        for snapshotter in snapshotters:
+            snapshotter.start()
+    app.state.cache_snapshotters = snapshotters
+    
+    get_stock_cache().engine.start_sweeper(settings.CACHE_SWEEP_INTERVAL)
+    get_recommendation_cache().engine.start_sweeper(settings.CACHE_SWEEP_INTERVAL)
+    get_symbol_index().start()
+    if settings.QUOTE_REFRESH_ENABLED:
+        get_quote_refresher().start()
+    
+    # Compact the price history store in the background so startup is not delayed
+    store = get_ohlcv_store()
+    compaction = asyncio.create_task(asyncio.to_thread(store.compact_all)) if store else None
+    
+    yield
+    
+    if compaction is not None:
+        # Cancelling would leave the worker thread running (and replacing
+        # files) during exit, so ask it to stop and wait for the current file
+        store.stop_compaction()
+        await asyncio.gather(compaction, return_exceptions=True)
+    await get_quote_refresher().stop()
+    await get_quote_hub().stop()
+    await get_symbol_index().stop()
+    # Write a final snapshot before the caches go away
+    for snapshotter in snapshotters:
+        await snapshotter.stop()
+    await get_recommendation_cache().engine.stop_sweeper()
+    await get_stock_cache().engine.stop_sweeper()
+    await get_cache_backend().close()
+    await get_upstream_scheduler().stop()
+    await close_market_data_client()
+
+
 # initialise FastAPI application
 app = FastAPI(
     title="backend",
     description="Backend API for my NEA",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Register exception handlers
@@ -60,6 +140,25 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Internal cache and upstream metrics for capacity planning."""
+    return {
+        "stock_cache": get_cache_stats(),
+        "recommendation_cache": get_recommendation_cache().stats(),
+        "cache_backend": get_cache_backend().stats(),
+        "circuit_breakers": get_breaker_stats(),
+        "market_data_provider": get_market_data_provider().stats(),
+        "upstream_scheduler": get_upstream_scheduler().stats(),
+        "quote_refresher": get_quote_refresher().stats(),
+        "quote_stream": get_quote_hub().stats(),
+        "portfolio_snapshots": get_portfolio_snapshots().stats(),
+        "symbol_index": get_symbol_index().stats(),
+        "cache_snapshots": {
+            os.path.basename(s.path): s.stats() for s in getattr(app.state, "cache_snapshotters", [])
+        }
+    }
+
 # Include routers
 from app.routers import auth, portfolio, transactions, stocks, recommendations
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
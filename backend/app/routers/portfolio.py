@@ -1,17 +1,13 @@
 """Portfolio management endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Response
 from supabase import Client
-from decimal import Decimal
-from typing import List
 from app.database import get_supabase
 from app.utils.dependencies import get_current_user
-from app.schemas.portfolio import HoldingResponse, PortfolioResponse
-from app.services.portfolio_service import (
-    get_user_holdings,
-    calculate_portfolio_metrics
-)
-from app.utils.holding_calculator import calculate_holding_metrics, get_current_prices_map
+from app.schemas.portfolio import PortfolioResponse
+from app.services.portfolio_service import get_user_holdings
+from app.services.portfolio_snapshots import get_portfolio_snapshots
+from app.utils.holding_calculator import get_current_prices_map, value_portfolio
 
 router = APIRouter()
 
@@ -30,30 +26,19 @@ async def get_portfolio(
     - Total portfolio value
     - Total invested amount
     - Profit/loss metrics
-    """
-    holdings = get_user_holdings(supabase, current_user["id"])
-    
-    if not holdings:
-        return PortfolioResponse(
-            total_value=Decimal("0"),
-            total_invested=Decimal("0"),
-            profit_loss=Decimal("0"),
-            profit_loss_percent=Decimal("0"),
-            holdings=[]
-        )
     
-    current_prices = await get_current_prices_map(holdings)
-    metrics = calculate_portfolio_metrics(holdings, current_prices)
-    
-    holding_responses = [
-        calculate_holding_metrics(holding, current_prices[holding["symbol"]])
-        for holding in holdings
-    ]
+    Served from the user's portfolio snapshot while it is current (see
+    app.services.portfolio_snapshots).
+    """
+    # Serialized JSON is returned directly; returning the model would make
+    # FastAPI dump and revalidate every holding again before encoding
+    snapshots = get_portfolio_snapshots()
+    cached = await snapshots.get(current_user["id"])
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
     
-    return PortfolioResponse(
-        total_value=metrics["total_value"],
-        total_invested=metrics["total_invested"],
-        profit_loss=metrics["profit_loss"],
-        profit_loss_percent=metrics["profit_loss_percent"],
-        holdings=holding_responses
-    )
\ No newline at end of file
+    generation = await snapshots.generation(current_user["id"])
+    holdings = get_user_holdings(supabase, current_user["id"])
+    current_prices = await get_current_prices_map(holdings) if holdings else {}
+    portfolio = value_portfolio(holdings, current_prices)
+    return Response(content=snapshots.put(current_user["id"], generation, portfolio), media_type="application/json")
\ No newline at end of file
@@ -1,17 +1,33 @@
 """Stock and market data endpoints."""
 
-from fastapi import APIRouter, Depends, Query, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
+import json
 import httpx
-from app.utils.dependencies import get_current_user
-from app.schemas.stock import StockQuote, StockDetails, StockSearchResult, HistoricalPrice, MarketStatus
+import logging
+from app.database import get_supabase
+from app.utils.dependencies import authenticate, get_current_user, get_current_user_from_query
+from app.config import settings
+from app.schemas.stock import (
+    StockQuote, StockDetails, StockSearchResult, HistoricalPrice, MarketStatus, BatchQuoteResponse, IndicatorSeries
+)
+from app.services.downsampling import MIN_POINTS
+from app.services.indicators import GROUPS
 from app.services.stock_service import (
     get_stock_quote,
+    get_stock_quotes,
     get_stock_details,
     search_stocks,
     get_historical_data,
+    get_indicators,
     get_market_status
 )
+from app.services.quote_stream import get_quote_hub
+from app.utils.exceptions import UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -39,6 +55,165 @@ async def search(
         raise HTTPException(status_code=502, detail="Failed to fetch data from stock API")
 
 
+def _parse_symbols(symbols: str) -> List[str]:
+    """Split a comma-separated symbol list."""
+    return [s.strip().upper() for s in symbols.split(",") if s.strip()]
+
+
+@router.get("/quotes", response_model=BatchQuoteResponse)
+async def get_quotes(
+    symbols: str = Query(..., min_length=1, description="Comma-separated stock symbols"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get current quotes for several symbols in one request.
+    Protected endpoint - requires valid JWT token.
+    
+    Returns a map of symbol to quote. Symbols that could not be fetched
+    are returned in errors instead of failing the whole request.
+    
+    Rate limiting: Cached for 1 minute per symbol; misses are fetched together.
+    """
+    symbol_list = _parse_symbols(symbols)
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    if len(set(symbol_list)) > settings.BATCH_QUOTE_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many symbols (maximum {settings.BATCH_QUOTE_MAX_SYMBOLS})"
+        )
+    
+    quotes, errors = await get_stock_quotes(symbol_list)
+    return BatchQuoteResponse(quotes=quotes, errors=errors)
+
+
+@router.websocket("/stream")
+async def stream_quotes_ws(
+    websocket: WebSocket,
+    token: str = Query(None),
+    symbols: str = Query("")
+):
+    """
+    Stream live quote ticks over a WebSocket.
+    Authenticated with the access token in the `token` query parameter.
+    
+    Initial symbols may be passed as a comma-separated `symbols` parameter.
+    The client can change its subscription at any time by sending
+    {"action": "subscribe" | "unsubscribe", "symbols": ["AAPL", ...]}.
+    
+    Server messages:
+    - {"type": "quotes", "data": {symbol: quote}} with the latest tick per symbol
+    - {"type": "heartbeat"} when nothing has changed for a while
+    - {"type": "error", "detail": ...} for a malformed client message
+    
+    Ticks come from one shared poller per symbol; if the client reads
+    slowly, only the newest tick per symbol is kept for it.
+    """
+    try:
+        if not token:
+            raise HTTPException(401, "Missing token")
+        await authenticate(token, get_supabase())
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    except UpstreamUnavailableError:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    
+    await websocket.accept()
+    hub = get_quote_hub()
+    subscription = hub.open()
+    hub.subscribe(subscription, _parse_symbols(symbols))
+    
+    async def receive():
+        while True:
+            message = await websocket.receive_json()
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Message must be a JSON object"})
+                continue
+            requested = message.get("symbols") or []
+            if not isinstance(requested, list) or not all(isinstance(s, str) for s in requested):
+                await websocket.send_json({"type": "error", "detail": "symbols must be a list of strings"})
+                continue
+            if message.get("action") == "subscribe":
+                wanted = subscription.symbols | {s.strip().upper() for s in requested if s.strip()}
+                if len(wanted) > settings.STREAM_MAX_SYMBOLS:
+                    await websocket.send_json({
+                        "type": "error",
+                        "detail": f"Too many symbols (maximum {settings.STREAM_MAX_SYMBOLS})"
+                    })
+                    continue
+                hub.subscribe(subscription, requested)
+            elif message.get("action") == "unsubscribe":
+                hub.unsubscribe(subscription, requested)
+            else:
+                await websocket.send_json({"type": "error", "detail": "action must be subscribe or unsubscribe"})
+    
+    async def send():
+        while True:
+            batch = await subscription.next_batch(settings.STREAM_HEARTBEAT_INTERVAL)
+            if batch:
+                await websocket.send_json({"type": "quotes", "data": batch})
+            else:
+                await websocket.send_json({"type": "heartbeat"})
+    
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.warning(f"Quote stream closed: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.close(subscription)
+
+
+@router.get("/stream/sse")
+async def stream_quotes_sse(
+    request: Request,
+    symbols: str = Query(..., min_length=1, description="Comma-separated stock symbols"),
+    current_user: dict = Depends(get_current_user_from_query)
+):
+    """
+    Stream live quote ticks as Server-Sent Events.
+    Authenticated with the access token in the `token` query parameter,
+    since EventSource cannot send an Authorization header.
+    
+    Each `quotes` event carries a JSON map of symbol to latest quote;
+    comment lines are sent as heartbeats to keep proxies from timing out.
+    """
+    symbol_list = _parse_symbols(symbols)
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    if len(set(symbol_list)) > settings.STREAM_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many symbols (maximum {settings.STREAM_MAX_SYMBOLS})"
+        )
+    
+    async def events():
+        hub = get_quote_hub()
+        subscription = hub.open()
+        hub.subscribe(subscription, symbol_list)
+        try:
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(settings.STREAM_HEARTBEAT_INTERVAL)
+                if batch:
+                    yield f"event: quotes\ndata: {json.dumps(batch)}\n\n"
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            hub.close(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{symbol}", response_model=StockDetails)
 async def get_stock(
     symbol: str,
@@ -51,7 +226,7 @@ async def get_stock(
     Returns complete stock data with current price, change metrics,
     volume, market cap, PE ratio, and other fundamentals.
     
-    Rate limiting: Cached for 5 minutes to reduce API calls.
+    Rate limiting: Prices cached for 1 minute, fundamentals for 24 hours.
     """
     try:
         return await get_stock_details(symbol.upper())
@@ -87,6 +262,14 @@ async def get_quote(
 async def get_history(
     symbol: str,
     period: str = Query("1mo", regex="^(1d|5d|1mo|3mo|1y|5y)$", description="Time period for historical data"),
+    interval: Optional[str] = Query(
+        None, regex="^(5min|15min|30min|1h|1d|1wk|1mo)$",
+        description="Bar size (default: 5min for 1d, 1d otherwise)"
+    ),
+    max_points: Optional[int] = Query(
+        None, ge=MIN_POINTS, le=5000,
+        description="Downsample to at most this many points (e.g. the chart width in pixels)"
+    ),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -101,12 +284,56 @@ async def get_history(
     - 1y: 1 year
     - 5y: 5 years
     
-    Returns OHLCV data points for the requested period.
+    Supported intervals: 5min, 15min, 30min, 1h (from intraday data) and
+    1d, 1wk, 1mo (from daily data).
+    
+    Returns OHLCV data points for the requested period. With max_points,
+    the series is reduced with LTTB on the close price; each point's
+    open/high/low/volume cover all bars it replaces.
     
     Rate limiting: Cached for 1 hour to reduce API calls.
     """
     try:
-        return await get_historical_data(symbol.upper(), period)
+        return await get_historical_data(symbol.upper(), period, max_points, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=502, detail="Failed to fetch data from stock API")
+
+
+@router.get("/{symbol}/indicators", response_model=IndicatorSeries)
+async def get_stock_indicators(
+    symbol: str,
+    period: str = Query("1mo", regex="^(1d|5d|1mo|3mo|1y|5y)$", description="Time period to return indicators for"),
+    interval: Optional[str] = Query(
+        None, regex="^(5min|15min|30min|1h|1d|1wk|1mo)$",
+        description="Bar size (default: 5min for 1d, 1d otherwise)"
+    ),
+    indicators: Optional[str] = Query(
+        None, description="Comma-separated groups: sma, ema, rsi, macd, bollinger, atr, vwap (default: all)"
+    ),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get technical indicators for charting.
+    Protected endpoint - requires valid JWT token.
+    
+    Returns one timestamp column and one value column per indicator output:
+    sma_20, sma_50, ema_12, ema_26, rsi_14, macd/macd_signal/macd_hist,
+    bb_upper/bb_middle/bb_lower, atr_14 and vwap (per session for intraday
+    bars, over the last 20 bars otherwise). Values are null until enough
+    history exists. Periods and intervals match the history endpoint.
+    
+    Rate limiting: Computed from the cached price series; no extra API calls.
+    """
+    groups = None
+    if indicators:
+        groups = [g.strip().lower() for g in indicators.split(",") if g.strip()]
+        unknown = [g for g in groups if g not in GROUPS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown indicators: {', '.join(unknown)}")
+    try:
+        return await get_indicators(symbol.upper(), period, interval, groups)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except httpx.HTTPStatusError as e:
@@ -128,5 +355,7 @@ async def get_status(
     - Regular: 9:30 AM - 4:00 PM (Mon-Fri)
     - Pre-market: 4:00 AM - 9:30 AM
     - After-hours: 4:00 PM - 8:00 PM
+    
+    Exchange holidays are closed; early-close days end at 1:00 PM.
     """
     return get_market_status()
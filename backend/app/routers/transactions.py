@@ -7,6 +7,7 @@ from typing import List
 from app.database import get_supabase
 from app.utils.dependencies import get_current_user
 from app.schemas.transaction import TransactionCreate, TransactionResponse
+from app.services.portfolio_snapshots import get_portfolio_snapshots
 from app.services.transaction_service import (
     create_transaction,
     get_user_transactions
@@ -66,6 +67,13 @@ async def execute_transaction(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
+    finally:
+        # Drop the cached portfolio even if a later step failed, since the
+        # holdings or balance may already have changed. Other workers must
+        # see the invalidation before the client can ask them.
+        snapshots = get_portfolio_snapshots()
+        snapshots.invalidate(current_user["id"])
+        await snapshots.published(current_user["id"])
 
 
 @router.get("/", response_model=List[TransactionResponse])
@@ -3,7 +3,7 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional, List, Literal
+from typing import Optional, List, Literal, Dict
 
 
 class StockQuote(BaseModel):
@@ -16,6 +16,10 @@ class StockQuote(BaseModel):
     change: Decimal
     change_percent: Decimal
     last_update: datetime
+    previous_close: Optional[Decimal] = None
+    volume: Optional[int] = None
+    day_high: Optional[Decimal] = None
+    day_low: Optional[Decimal] = None
     
     class Config:
         from_attributes = True
@@ -24,6 +28,15 @@ class StockQuote(BaseModel):
         }
 
 
+class BatchQuoteResponse(BaseModel):
+    """
+    Quotes for several symbols in one response.
+    Symbols that could not be fetched are listed in errors with a reason.
+    """
+    quotes: Dict[str, StockQuote]
+    errors: Dict[str, str] = Field(default_factory=dict)
+
+
 class StockDetails(BaseModel):
     """
     Detailed stock information including fundamentals.
@@ -84,6 +97,18 @@ class HistoricalPrice(BaseModel):
         }
 
 
+class IndicatorSeries(BaseModel):
+    """
+    Technical indicators for a symbol as parallel columns.
+    values maps each indicator output (e.g. "sma_20", "macd_signal") to one
+    value per timestamp; None where there is not enough history yet.
+    """
+    symbol: str
+    interval: str
+    timestamps: List[datetime]
+    values: Dict[str, List[Optional[float]]]
+
+
 class MarketStatus(BaseModel):
     """
     Current market status and trading hours information.
@@ -0,0 +1,281 @@
+"""
+Alpha Vantage market data provider, plus capture and replay of its payloads.
+
+AlphaVantageProvider sends every call through the quota-aware upstream
+scheduler and turns Alpha Vantage's responses (numbered keys such as
+"05. price", "Time Series (Daily)" dicts, LISTING_STATUS CSV) into the
+normalized form described in market_data_provider.
+
+With a capture directory set, each payload is also written to
+
+    <dir>/<function>/<symbol or keywords>[_<interval>][_<outputsize>].json
+
+(.csv for LISTING_STATUS). ReplayProvider reads those files instead of
+calling the API, so captured traffic can be served offline through the
+exact same parsing code. Bulk quote payloads are not captured; replay
+answers quotes one symbol at a time from GLOBAL_QUOTE captures.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.schemas.stock import StockQuote, StockSearchResult
+from app.services.market_data_provider import MarketDataProvider
+from app.services.price_series import PriceSeries
+from app.services.series_parser import parse_time_series
+from app.services.upstream_scheduler import CSV_FUNCTIONS, Priority, get_upstream_scheduler, is_rate_limit_notice
+from app.utils.exceptions import UpstreamNotFoundError, UpstreamRateLimitedError, UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9.\-]+")
+
+# Params that identify a payload, in file name order
+_CAPTURE_PARAMS = ("symbol", "keywords", "interval", "outputsize")
+
+
+def _optional_field(value: Optional[str]) -> Optional[str]:
+    """Treat Alpha Vantage placeholders ("None", "-", "") as missing values."""
+    if value is None or value.strip() in ("", "None", "-"):
+        return None
+    return value
+
+
+def capture_path(directory: str, params: dict) -> str:
+    """File a payload for params is captured to (see the module docstring)."""
+    function = params["function"]
+    parts = [_UNSAFE_CHARS.sub("_", str(params[name])) for name in _CAPTURE_PARAMS if name in params]
+    extension = "csv" if function in CSV_FUNCTIONS else "json"
+    if not parts:
+        return os.path.join(directory, f"{function}.{extension}")
+    return os.path.join(directory, function, f"{'_'.join(parts)}.{extension}")
+
+
+def _write_capture(path: str, data: Any):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if isinstance(data, str):
+            f.write(data)
+        else:
+            json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_capture(path: str) -> Optional[Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".csv"):
+                return f.read()
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _quote_from_bulk_row(row: dict) -> dict:
+    """Convert one REALTIME_BULK_QUOTES row to a cacheable quote."""
+    quote = StockQuote(
+        symbol=row["symbol"].upper(),
+        current_price=Decimal(row.get("close") or "0"),
+        change=Decimal(row.get("change") or "0"),
+        change_percent=Decimal((row.get("change_percent") or "0").rstrip("%")),
+        last_update=datetime.utcnow(),
+        previous_close=_optional_field(row.get("previous_close")),
+        volume=_optional_field(row.get("volume")),
+        day_high=_optional_field(row.get("high")),
+        day_low=_optional_field(row.get("low"))
+    )
+    return quote.model_dump()
+
+
+class AlphaVantageProvider(MarketDataProvider):
+    """Live Alpha Vantage data, optionally capturing every payload to capture_dir."""
+
+    name = "alpha_vantage"
+
+    def __init__(self, capture_dir: Optional[str] = None):
+        self.capture_dir = capture_dir
+        self.captured = 0
+
+    @property
+    def supports_bulk_quotes(self) -> bool:
+        # REALTIME_BULK_QUOTES requires a premium plan
+        return settings.ALPHA_VANTAGE_BULK_QUOTES
+
+    async def _get(self, params: dict, priority: Priority) -> Any:
+        """
+        Call the Alpha Vantage query endpoint through the quota-aware scheduler.
+        Raises httpx.HTTPStatusError on 4xx responses and
+        UpstreamUnavailableError if the call cannot be made in time.
+        """
+        data = await get_upstream_scheduler().submit(params, priority)
+        if self.capture_dir and "," not in str(params.get("symbol", "")):
+            try:
+                await asyncio.to_thread(_write_capture, capture_path(self.capture_dir, params), data)
+                self.captured += 1
+            except OSError as e:
+                logger.warning(f"Failed to capture {params['function']} payload: {e}")
+        return data
+
+    async def quote(self, symbol: str, priority: Priority) -> dict:
+        """Fetch a quote from GLOBAL_QUOTE."""
+        data = await self._get({
+            "function": "GLOBAL_QUOTE",
+            "symbol": symbol
+        }, priority)
+
+        if "Global Quote" not in data or not data["Global Quote"]:
+            logger.warning(f"No Global Quote data for '{symbol}': {data}")
+            raise UpstreamNotFoundError(f"Stock symbol '{symbol}' not found")
+
+        quote_data = data["Global Quote"]
+
+        # Alpha Vantage uses numbered keys like "05. price", "08. previous close"
+        current_price = Decimal(quote_data.get("05. price", "0"))
+        change = Decimal(quote_data.get("09. change", "0"))
+        # Remove the "%" suffix from change percent string
+        change_percent_str = quote_data.get("10. change percent", "0%").rstrip("%")
+        change_percent = Decimal(change_percent_str)
+
+        quote = StockQuote(
+            symbol=symbol.upper(),
+            current_price=current_price,
+            change=change,
+            change_percent=change_percent,
+            last_update=datetime.utcnow(),
+            previous_close=_optional_field(quote_data.get("08. previous close")),
+            volume=_optional_field(quote_data.get("06. volume")),
+            day_high=_optional_field(quote_data.get("03. high")),
+            day_low=_optional_field(quote_data.get("04. low"))
+        )
+        return quote.model_dump()
+
+    async def quotes(self, symbols: List[str], priority: Priority) -> Dict[str, dict]:
+        """Fetch up to 100 quotes with one REALTIME_BULK_QUOTES call."""
+        data = await self._get({
+            "function": "REALTIME_BULK_QUOTES",
+            "symbol": ",".join(symbols)
+        }, priority)
+
+        if "data" not in data:
+            # Not a "not found" for every symbol: the request itself failed
+            logger.warning(f"No bulk quote data for {symbols}: {data}")
+            if is_rate_limit_notice(data):
+                raise UpstreamRateLimitedError(data.get("Note") or data.get("Information"))
+            raise UpstreamUnavailableError("Bulk quote request failed")
+
+        return {row["symbol"].upper(): _quote_from_bulk_row(row) for row in data["data"] if row.get("symbol")}
+
+    async def overview(self, symbol: str) -> dict:
+        """Fetch company fundamentals from OVERVIEW."""
+        overview_data = await self._get({
+            "function": "OVERVIEW",
+            "symbol": symbol
+        }, Priority.INTERACTIVE)
+
+        return {
+            "name": overview_data.get("Name") or symbol.upper(),
+            "market_cap": _optional_field(overview_data.get("MarketCapitalization")),
+            "pe_ratio": _optional_field(overview_data.get("PERatio")),
+            "dividend_yield": _optional_field(overview_data.get("DividendYield"))
+        }
+
+    async def search(self, query: str) -> List[dict]:
+        """Fetch all SYMBOL_SEARCH matches for a query."""
+        data = await self._get({
+            "function": "SYMBOL_SEARCH",
+            "keywords": query
+        }, Priority.BACKGROUND)
+
+        if "bestMatches" not in data:
+            logger.warning(f"No bestMatches in search response for '{query}': {data}")
+            raise ValueError(f"Search failed for '{query}'")
+
+        results = []
+        for match in data["bestMatches"]:
+            result = StockSearchResult(
+                symbol=match.get("1. symbol", ""),
+                name=match.get("2. name", ""),
+                type=match.get("3. type", ""),
+                region=match.get("4. region", "")
+            )
+            results.append(result.model_dump())
+        return results
+
+    async def intraday_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        """Fetch the 5-minute TIME_SERIES_INTRADAY series ("compact" output is the last 100 bars)."""
+        data = await self._get({
+            "function": "TIME_SERIES_INTRADAY",
+            "symbol": symbol,
+            "interval": "5min",
+            "outputsize": "compact" if compact else "full"
+        }, Priority.BACKGROUND)
+
+        time_series_key = "Time Series (5min)"
+        if time_series_key not in data:
+            raise UpstreamNotFoundError(f"No intraday data found for symbol '{symbol}'")
+
+        return parse_time_series(data[time_series_key], intraday=True)
+
+    async def daily_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        """Fetch TIME_SERIES_DAILY ("compact" output is the last 100 bars)."""
+        data = await self._get({
+            "function": "TIME_SERIES_DAILY",
+            "symbol": symbol,
+            "outputsize": "compact" if compact else "full"
+        }, Priority.BACKGROUND)
+
+        # Log the response to debug API issues
+        if "Time Series (Daily)" not in data:
+            logger.warning(f"Alpha Vantage response for {symbol}: {data}")
+            raise UpstreamNotFoundError(f"No historical data found for symbol '{symbol}'")
+
+        return parse_time_series(data["Time Series (Daily)"])
+
+    async def listing(self) -> str:
+        """Download the LISTING_STATUS CSV."""
+        return await self._get({"function": "LISTING_STATUS"}, Priority.BACKGROUND)
+
+    def stats(self) -> dict:
+        """Return the provider name and number of captured payloads."""
+        return {"provider": self.name, "captured": self.captured}
+
+
+class ReplayProvider(AlphaVantageProvider):
+    """
+    Serves Alpha Vantage payloads captured by AlphaVantageProvider.
+    A call with no capture raises UpstreamNotFoundError; compact
+    requests fall back to a captured full series.
+    """
+
+    name = "replay"
+    supports_bulk_quotes = False
+
+    def __init__(self, capture_dir: str):
+        super().__init__(None)
+        self.replay_dir = capture_dir
+        self.hits = 0
+        self.misses = 0
+
+    async def _get(self, params: dict, priority: Priority) -> Any:
+        candidates = [params]
+        if params.get("outputsize") == "compact":
+            candidates.append({**params, "outputsize": "full"})
+        for candidate in candidates:
+            data = await asyncio.to_thread(_read_capture, capture_path(self.replay_dir, candidate))
+            if data is not None:
+                self.hits += 1
+                return data
+        self.misses += 1
+        subject = params.get("symbol") or params.get("keywords") or "this request"
+        raise UpstreamNotFoundError(f"No captured {params['function']} payload for {subject}")
+
+    def stats(self) -> dict:
+        """Return the provider name and capture hit/miss counts."""
+        return {"provider": self.name, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,105 @@
+"""
+Shape-preserving downsampling for chart series.
+
+Charts are a few hundred pixels wide, so sending every bar of a 5-year or
+intraday history wastes payload and serialization time. Series are reduced
+to a point budget with Largest-Triangle-Three-Buckets (LTTB) on the close
+price, which keeps peaks, troughs and trend changes that plain striding or
+averaging would flatten.
+
+Each output bar also summarises its whole bucket so candlestick charts stay
+honest: open is the bucket's first open, high and low are the bucket's
+extremes and volume is the bucket total. Timestamp and close come from the
+bar LTTB selected.
+"""
+
+from array import array
+from typing import List, Sequence
+from app.services.price_series import PriceSeries
+
+# Smallest budget LTTB supports (first point, one bucket, last point)
+MIN_POINTS = 3
+
+
+def _bucket_bounds(length: int, threshold: int) -> List[int]:
+    """
+    Start index of each LTTB bucket plus a final end index.
+    The first and last points are buckets of their own; the rest of the
+    series is split into threshold - 2 buckets of (almost) equal size.
+    """
+    every = (length - 2) / (threshold - 2)
+    bounds = [0, 1]
+    bounds.extend(int(i * every) + 1 for i in range(1, threshold - 2))
+    bounds.extend([length - 1, length])
+    return bounds
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], threshold: int) -> List[int]:
+    """
+    Select threshold indices of (x, y) with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. For every bucket in between,
+    the point forming the largest triangle with the previously selected
+    point and the average of the next bucket is chosen.
+    """
+    length = len(x)
+    if threshold >= length or threshold < MIN_POINTS:
+        return list(range(length))
+
+    bounds = _bucket_bounds(length, threshold)
+    selected = [0]
+    a = 0
+    for bucket in range(1, threshold - 1):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        next_start, next_end = end, bounds[bucket + 2]
+
+        # Average of the next bucket is the third triangle vertex
+        count = next_end - next_start
+        avg_x = sum(x[next_start:next_end]) / count
+        avg_y = sum(y[next_start:next_end]) / count
+
+        ax, ay = x[a], y[a]
+        best_area = -1.0
+        best = start
+        for i in range(start, end):
+            # Twice the triangle area; the factor does not change the argmax
+            area = abs((ax - avg_x) * (y[i] - ay) - (ax - x[i]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = i
+        selected.append(best)
+        a = best
+
+    selected.append(length - 1)
+    return selected
+
+
+def downsample(series: PriceSeries, max_points: int) -> PriceSeries:
+    """
+    Reduce series to at most max_points bars.
+    Series already within budget are returned unchanged.
+    """
+    length = len(series)
+    if max_points >= length or max_points < MIN_POINTS:
+        return series
+
+    timestamps = series.timestamps
+    close = series.close
+    selected = lttb_indices(timestamps, close, max_points)
+    bounds = _bucket_bounds(length, max_points)
+
+    result = PriceSeries(
+        array("q", [timestamps[i] for i in selected]),
+        array("d"),
+        array("d"),
+        array("d"),
+        array("d", [close[i] for i in selected]),
+        array("q")
+    )
+    opens, highs, lows, volumes = series.open, series.high, series.low, series.volume
+    for start, end in zip(bounds, bounds[1:]):
+        result.open.append(opens[start])
+        result.high.append(max(highs[start:end]))
+        result.low.append(min(lows[start:end]))
+        result.volume.append(sum(volumes[start:end]))
+    return result
@@ -0,0 +1,46 @@
+"""
+Tracking of recently requested symbols.
+
+Quote lookups record the symbols users are looking at so the background
+quote refresher can keep them warm alongside portfolio holdings.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Iterable, List
+
+
+class HotSymbolTracker:
+    """
+    Recently requested symbols, most recent last.
+    Symbols drop out after window seconds without a request, and the
+    oldest are evicted once max_symbols is reached.
+    """
+
+    def __init__(self, window: float, max_symbols: int = 1_000):
+        self.window = window
+        self.max_symbols = max_symbols
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+    def touch(self, symbols: Iterable[str]):
+        """Record a request for each symbol."""
+        now = time.monotonic()
+        for symbol in symbols:
+            symbol = symbol.upper()
+            self._seen[symbol] = now
+            self._seen.move_to_end(symbol)
+        while len(self._seen) > self.max_symbols:
+            self._seen.popitem(last=False)
+
+    def recent(self) -> List[str]:
+        """Symbols requested within the window, most recent first."""
+        cutoff = time.monotonic() - self.window
+        while self._seen:
+            symbol, seen_at = next(iter(self._seen.items()))
+            if seen_at >= cutoff:
+                break
+            self._seen.popitem(last=False)
+        return list(reversed(self._seen))
+
+    def __len__(self) -> int:
+        return len(self._seen)
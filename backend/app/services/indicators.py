@@ -0,0 +1,353 @@
+"""
+Technical indicators over columnar price series, computed with NumPy.
+
+Outputs (one value per bar, NaN until there is enough history):
+
+    sma_20, sma_50              simple moving averages of close
+    ema_12, ema_26              exponential moving averages (seeded with the SMA)
+    rsi_14                      Wilder's relative strength index
+    macd, macd_signal, macd_hist    MACD(12, 26, 9)
+    bb_upper, bb_middle, bb_lower   Bollinger bands (20 bars, 2 standard deviations)
+    atr_14                      Wilder's average true range
+    vwap                        typical-price VWAP: reset each session for
+                                intraday bars, over the last 20 bars otherwise
+
+A full computation is vectorized. EMA-style recursions (EMA, MACD signal,
+RSI and ATR smoothing) are evaluated in closed form over blocks short
+enough that the decay factors stay inside float64 range.
+
+Indicators are kept between requests per (symbol, interval) and keyed by
+series version (length, first and last timestamp and the newest bar). When
+the base series gains bars, or its newest bar is revised, only those bars
+are computed, each from the previous bar's outputs: O(1) per bar for the
+recursive indicators and O(window) for the moving windows, instead of a
+pass over years of history.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.services.price_series import PriceSeries
+
+SMA_WINDOWS = (20, 50)
+EMA_SPANS = (12, 26)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_WINDOW, BOLLINGER_WIDTH = 20, 2.0
+ATR_PERIOD = 14
+VWAP_WINDOW = 20
+
+SECONDS_PER_DAY = 86400
+
+# Indicator groups selectable by API callers, and the outputs each produces
+GROUPS = {
+    "sma": [f"sma_{w}" for w in SMA_WINDOWS],
+    "ema": [f"ema_{s}" for s in EMA_SPANS],
+    "rsi": [f"rsi_{RSI_PERIOD}"],
+    "macd": ["macd", "macd_signal", "macd_hist"],
+    "bollinger": ["bb_upper", "bb_middle", "bb_lower"],
+    "atr": [f"atr_{ATR_PERIOD}"],
+    "vwap": ["vwap"]
+}
+
+# Outputs named with a leading underscore are running sums carried between
+# bars (RSI average gain/loss, VWAP sums); they are never returned.
+
+# Outputs a bar's values are derived from recursively; all must be valid
+# before a series can be extended bar by bar
+_RECURSIVE = [f"ema_{s}" for s in EMA_SPANS] + ["macd_signal", "_rsi_gain", "_rsi_loss", f"atr_{ATR_PERIOD}"]
+
+Outputs = Dict[str, np.ndarray]
+
+
+def _columns(series: PriceSeries) -> Tuple[np.ndarray, ...]:
+    """Zero-copy float64/int64 views of a series' columns."""
+    return (
+        np.asarray(series.timestamps, dtype=np.int64),
+        np.asarray(series.high, dtype=np.float64),
+        np.asarray(series.low, dtype=np.float64),
+        np.asarray(series.close, dtype=np.float64),
+        np.asarray(series.volume, dtype=np.float64)
+    )
+
+
+def _smooth(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    y[t] = (1 - alpha) * y[t-1] + alpha * values[t], with y[-1] = initial.
+
+    Within a block, y[k] = b^(k+1) * (initial + alpha * sum(values[i] / b^(i+1)))
+    with b = 1 - alpha, which is a cumulative sum instead of a Python loop.
+    """
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+    # Keep decay ** -block well inside float64 range
+    block = max(1, int(300 / -math.log(decay)))
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (initial + alpha * np.cumsum(chunk / powers))
+        initial = out[start + len(chunk) - 1]
+    return out
+
+
+def _ema(values: np.ndarray, span: int, alpha: Optional[float] = None) -> np.ndarray:
+    """EMA seeded with the SMA of the first span valid values (leading NaNs are skipped)."""
+    alpha = 2.0 / (span + 1) if alpha is None else alpha
+    out = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0 or len(values) - valid[0] < span:
+        return out
+    seed_at = valid[0] + span - 1
+    out[seed_at] = values[valid[0]:seed_at + 1].mean()
+    out[seed_at + 1:] = _smooth(values[seed_at + 1:], alpha, out[seed_at])
+    return out
+
+
+def _sma(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        out[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return out
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1)
+    return out
+
+
+def _rsi(gain: np.ndarray, loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    tr = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    return tr
+
+
+def compute_indicators(series: PriceSeries, intraday: bool = False) -> Outputs:
+    """Compute every indicator over the whole series."""
+    timestamps, high, low, close, volume = _columns(series)
+    n = len(close)
+    out: Outputs = {}
+
+    for window in SMA_WINDOWS:
+        out[f"sma_{window}"] = _sma(close, window)
+    for span in EMA_SPANS:
+        out[f"ema_{span}"] = _ema(close, span)
+
+    macd = _ema(close, MACD_FAST) - _ema(close, MACD_SLOW)
+    out["macd"] = macd
+    out["macd_signal"] = _ema(macd, MACD_SIGNAL)
+    out["macd_hist"] = macd - out["macd_signal"]
+
+    gain = np.full(n, np.nan)
+    loss = np.full(n, np.nan)
+    if n > RSI_PERIOD:
+        delta = np.diff(close)
+        up = np.maximum(delta, 0.0)
+        down = np.maximum(-delta, 0.0)
+        gain[RSI_PERIOD] = up[:RSI_PERIOD].mean()
+        loss[RSI_PERIOD] = down[:RSI_PERIOD].mean()
+        gain[RSI_PERIOD + 1:] = _smooth(up[RSI_PERIOD:], 1.0 / RSI_PERIOD, gain[RSI_PERIOD])
+        loss[RSI_PERIOD + 1:] = _smooth(down[RSI_PERIOD:], 1.0 / RSI_PERIOD, loss[RSI_PERIOD])
+    out["_rsi_gain"] = gain
+    out["_rsi_loss"] = loss
+    out[f"rsi_{RSI_PERIOD}"] = _rsi(gain, loss)
+
+    middle = _sma(close, BOLLINGER_WINDOW)
+    width = BOLLINGER_WIDTH * _rolling_std(close, BOLLINGER_WINDOW)
+    out["bb_middle"] = middle
+    out["bb_upper"] = middle + width
+    out["bb_lower"] = middle - width
+
+    out[f"atr_{ATR_PERIOD}"] = _ema(_true_range(high, low, close), ATR_PERIOD, 1.0 / ATR_PERIOD)
+
+    pv = (high + low + close) / 3.0 * volume
+    if intraday:
+        # Running sums restart at the first bar of each session
+        days = timestamps // SECONDS_PER_DAY
+        first = np.ones(n, dtype=bool)
+        first[1:] = days[1:] != days[:-1]
+        starts = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+        cum_pv = np.cumsum(pv)
+        cum_v = np.cumsum(volume)
+        session_pv = cum_pv - (cum_pv - pv)[starts]
+        session_v = cum_v - (cum_v - volume)[starts]
+    else:
+        session_pv = _sma(pv, VWAP_WINDOW) * VWAP_WINDOW
+        session_v = _sma(volume, VWAP_WINDOW) * VWAP_WINDOW
+    out["_vwap_pv"] = session_pv
+    out["_vwap_v"] = session_v
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["vwap"] = np.where(session_v > 0, session_pv / session_v, np.nan)
+    return out
+
+
+def extend_indicators(series: PriceSeries, previous: Outputs, start: int, intraday: bool = False) -> Outputs:
+    """
+    Compute bars start..end of series from the outputs of bars before start.
+    previous must hold valid outputs for series[:start]; rows from start on are ignored.
+    """
+    timestamps, high, low, close, volume = _columns(series)
+    n = len(close)
+    out: Outputs = {}
+    for name, column in previous.items():
+        out[name] = np.empty(n)
+        out[name][:start] = column[:start]
+
+    ema_alphas = {span: 2.0 / (span + 1) for span in EMA_SPANS}
+    signal_alpha = 2.0 / (MACD_SIGNAL + 1)
+    for i in range(start, n):
+        c = close[i]
+        prev_close = close[i - 1]
+        for window in SMA_WINDOWS:
+            out[f"sma_{window}"][i] = close[i - window + 1:i + 1].mean() if i >= window - 1 else np.nan
+        for span, alpha in ema_alphas.items():
+            prev = out[f"ema_{span}"][i - 1]
+            out[f"ema_{span}"][i] = prev + alpha * (c - prev)
+
+        macd = out[f"ema_{MACD_FAST}"][i] - out[f"ema_{MACD_SLOW}"][i]
+        signal = out["macd_signal"][i - 1] + signal_alpha * (macd - out["macd_signal"][i - 1])
+        out["macd"][i] = macd
+        out["macd_signal"][i] = signal
+        out["macd_hist"][i] = macd - signal
+
+        delta = c - prev_close
+        gain = out["_rsi_gain"][i - 1] + (max(delta, 0.0) - out["_rsi_gain"][i - 1]) / RSI_PERIOD
+        loss = out["_rsi_loss"][i - 1] + (max(-delta, 0.0) - out["_rsi_loss"][i - 1]) / RSI_PERIOD
+        out["_rsi_gain"][i] = gain
+        out["_rsi_loss"][i] = loss
+        out[f"rsi_{RSI_PERIOD}"][i] = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+
+        window = close[i - BOLLINGER_WINDOW + 1:i + 1]
+        middle = window.mean()
+        width = BOLLINGER_WIDTH * window.std()
+        out["bb_middle"][i] = middle
+        out["bb_upper"][i] = middle + width
+        out["bb_lower"][i] = middle - width
+
+        tr = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+        atr = out[f"atr_{ATR_PERIOD}"][i - 1]
+        out[f"atr_{ATR_PERIOD}"][i] = atr + (tr - atr) / ATR_PERIOD
+
+        pv = (high[i] + low[i] + c) / 3.0 * volume[i]
+        if intraday:
+            same_session = timestamps[i] // SECONDS_PER_DAY == timestamps[i - 1] // SECONDS_PER_DAY
+            session_pv = pv + (out["_vwap_pv"][i - 1] if same_session else 0.0)
+            session_v = volume[i] + (out["_vwap_v"][i - 1] if same_session else 0.0)
+        elif i >= VWAP_WINDOW - 1:
+            lo = i - VWAP_WINDOW + 1
+            session_pv = float(np.dot((high[lo:i + 1] + low[lo:i + 1] + close[lo:i + 1]) / 3.0, volume[lo:i + 1]))
+            session_v = float(volume[lo:i + 1].sum())
+        else:
+            session_pv = session_v = np.nan
+        out["_vwap_pv"][i] = session_pv
+        out["_vwap_v"][i] = session_v
+        out["vwap"][i] = session_pv / session_v if session_v > 0 else np.nan
+    return out
+
+
+def can_extend(outputs: Outputs, start: int) -> bool:
+    """Check whether every recursive output is valid at bar start - 1."""
+    return start >= max(SMA_WINDOWS + (BOLLINGER_WINDOW, VWAP_WINDOW)) and all(
+        not math.isnan(outputs[name][start - 1]) for name in _RECURSIVE
+    )
+
+
+def series_version(series: PriceSeries) -> Tuple[int, int, int, float, float, float, int]:
+    """
+    (length, first timestamp, last timestamp, and the last bar's close, high,
+    low and volume): changes whenever bars are added or the newest one is
+    revised in any field an indicator reads.
+    """
+    if not len(series):
+        return (0, 0, 0, 0.0, 0.0, 0.0, 0)
+    return (
+        len(series), series.timestamps[0], series.last_timestamp,
+        series.close[-1], series.high[-1], series.low[-1], series.volume[-1]
+    )
+
+
+def to_json_values(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    """Round values for a response, with NaN as None."""
+    # NaN is the only value not equal to itself
+    return [None if v != v else v for v in np.round(values, digits).tolist()]
+
+
+class IndicatorCache:
+    """
+    Indicator outputs per (symbol, interval), keyed by series version.
+
+    An unchanged series is answered from the cache. A series that shares
+    all but the newest cached bar with the previous version (new bars
+    appended, the last bar revised, or old bars dropped from the front of
+    a rolling window) is extended from the cached outputs; anything else
+    is recomputed in full.
+    """
+
+    def __init__(self, max_entries: int = 1_000):
+        self.max_entries = max_entries
+        # (symbol, interval) -> (version, timestamps of the series, outputs)
+        self._entries: Dict[tuple, tuple] = {}
+        self.full_builds = 0
+        self.incremental_updates = 0
+        self.hits = 0
+
+    def _extend_from(self, series: PriceSeries, entry: tuple, intraday: bool) -> Optional[Outputs]:
+        """Extend a cached entry to series, or return None if they do not line up."""
+        _, old_timestamps, old_outputs = entry
+        if not len(series) or len(old_timestamps) < 2:
+            return None
+        # Old rows that survive: from the new series' first bar up to, not including, the old last bar
+        dropped = int(np.searchsorted(old_timestamps, series.timestamps[0]))
+        if dropped >= len(old_timestamps) or old_timestamps[dropped] != series.timestamps[0]:
+            return None
+        start = len(old_timestamps) - 1 - dropped
+        if start < 1 or start > len(series) or series.timestamps[start - 1] != old_timestamps[-2]:
+            return None
+        kept = {name: column[dropped:] for name, column in old_outputs.items()}
+        if not can_extend(kept, start):
+            return None
+        return extend_indicators(series, kept, start, intraday)
+
+    def get(self, symbol: str, interval: str, series: PriceSeries) -> Outputs:
+        """Return indicator outputs aligned with series."""
+        key = (symbol, interval)
+        version = series_version(series)
+        intraday = interval.endswith("min") or interval == "1h"
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[2]
+
+        outputs = self._extend_from(series, entry, intraday) if entry is not None else None
+        if outputs is None:
+            self.full_builds += 1
+            outputs = compute_indicators(series, intraday)
+        else:
+            self.incremental_updates += 1
+
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Drop the oldest entry (dicts keep insertion order)
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (version, np.asarray(series.timestamps, dtype=np.int64).copy(), outputs)
+        return outputs
+
+    def stats(self) -> dict:
+        """Return entry count and build counters."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "full_builds": self.full_builds,
+            "incremental_updates": self.incremental_updates
+        }
@@ -0,0 +1,140 @@
+"""
+Rolling 5-minute intraday series, kept current with compact refreshes.
+
+A full TIME_SERIES_INTRADAY download is about a month of 5-minute bars.
+Refetching it every time the cache expired meant a large payload for a few
+new bars. The chart also went up to an hour stale during market hours.
+
+IntradaySeriesManager downloads the full series once per symbol (the
+seed). After that, each refresh asks for compact output (the last 100
+bars, about a session and a half) and merges it in:
+
+- bars older than the first compact bar are kept as they are
+- overlapping bars are replaced, so a bar revised upstream is corrected
+- newer bars are appended
+
+The working columns are then trimmed in place to the last window_seconds.
+If the compact output does not reach back to the newest stored bar (the
+symbol was not refreshed for a while), bars may be missing in between, so
+the symbol is seeded again from full output.
+
+Callers get a copy of the working columns on every refresh. Downstream
+caches (resampling, indicators) recognize an unchanged series by identity
+or version, so a published series must never change afterwards.
+"""
+
+import logging
+import time
+from array import array
+from typing import Awaitable, Callable, Dict
+from app.services.price_series import PriceSeries
+
+logger = logging.getLogger(__name__)
+
+# Fetches a symbol's intraday series: full output, or the last 100 bars if compact
+Fetch = Callable[[bool], Awaitable[PriceSeries]]
+
+_TYPE_CODES = ("q", "d", "d", "d", "d", "q")
+
+
+def _columns(series: PriceSeries) -> tuple:
+    return (series.timestamps, series.open, series.high, series.low, series.close, series.volume)
+
+
+def _copy(series: PriceSeries) -> PriceSeries:
+    """Copy a series into new array columns."""
+    return PriceSeries(*(array(type_code, column) for type_code, column in zip(_TYPE_CODES, _columns(series))))
+
+
+class IntradaySeriesManager:
+    """
+    Working intraday series per symbol, seeded once and then merged with
+    compact refreshes.
+
+    window_seconds bounds how far back bars are kept. max_gap_seconds is
+    the age of the newest stored bar past which a compact refresh cannot
+    bridge the gap, so the symbol is reseeded without trying one.
+    """
+
+    def __init__(self, window_seconds: float, max_gap_seconds: float, max_symbols: int = 500):
+        self.window_seconds = window_seconds
+        self.max_gap_seconds = max_gap_seconds
+        self.max_symbols = max_symbols
+        self._series: Dict[str, PriceSeries] = {}
+
+        # Metrics
+        self.seeds = 0
+        self.reseeds = 0
+        self.compact_refreshes = 0
+        self.bars_merged = 0
+
+    def has(self, symbol: str) -> bool:
+        """Check whether symbol has a working series."""
+        return symbol in self._series
+
+    def seed(self, symbol: str, series: PriceSeries):
+        """Use series (e.g. one restored from a cache snapshot) as the working series for symbol."""
+        if symbol not in self._series and len(self._series) >= self.max_symbols:
+            # Drop the oldest symbol (dicts keep insertion order)
+            del self._series[next(iter(self._series))]
+        working = _copy(series)
+        self._trim(working)
+        self._series[symbol] = working
+
+    async def refresh(self, symbol: str, fetch: Fetch) -> PriceSeries:
+        """
+        Bring symbol's series up to date and return a copy of it.
+        The first call for a symbol (or one after a long gap) downloads the
+        full series; later calls download the last 100 bars and merge them.
+        """
+        working = self._series.get(symbol)
+        if working is not None and len(working) > 0 \
+                and time.time() - working.last_timestamp < self.max_gap_seconds:
+            fresh = await fetch(True)
+            if self._merge(working, fresh):
+                self.compact_refreshes += 1
+                self._trim(working)
+                return _copy(working)
+            logger.info(f"Compact intraday refresh for {symbol} does not reach stored bars, reseeding")
+            self.reseeds += 1
+
+        fresh = await fetch(False)
+        self.seeds += 1
+        self.seed(symbol, fresh)
+        return _copy(self._series[symbol])
+
+    def _merge(self, working: PriceSeries, fresh: PriceSeries) -> bool:
+        """
+        Merge fresh bars into working in place. Returns False (leaving working
+        unchanged) if fresh starts after the newest stored bar.
+        """
+        if not len(fresh):
+            return True
+        if fresh.timestamps[0] > working.last_timestamp:
+            return False
+        start = working.index_at_or_after(fresh.timestamps[0])
+        for column, fresh_column in zip(_columns(working), _columns(fresh)):
+            del column[start:]
+            column.extend(fresh_column)
+        self.bars_merged += len(fresh)
+        return True
+
+    def _trim(self, working: PriceSeries):
+        """Drop bars older than the window, in place."""
+        if not len(working):
+            return
+        end = working.index_at_or_after(working.last_timestamp - int(self.window_seconds))
+        if end:
+            for column in _columns(working):
+                del column[:end]
+
+    def stats(self) -> dict:
+        """Return symbol count and refresh counters."""
+        return {
+            "symbols": len(self._series),
+            "bars": sum(len(series) for series in self._series.values()),
+            "seeds": self.seeds,
+            "reseeds": self.reseeds,
+            "compact_refreshes": self.compact_refreshes,
+            "bars_merged": self.bars_merged
+        }
@@ -0,0 +1,107 @@
+"""
+Shared HTTP client for market data API calls.
+
+A single pooled httpx.AsyncClient is created when the application starts and
+closed when it shuts down, so repeated Alpha Vantage calls reuse keep-alive
+connections instead of paying TCP and TLS setup on every cache miss.
+"""
+
+import logging
+from typing import Optional
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataClient:
+    """
+    Owns the pooled HTTP client used for all market data requests.
+
+    Pool limits and timeouts come from Settings. A pre-built httpx.AsyncClient
+    can be passed in instead (e.g. one using httpx.MockTransport) so tests can
+    swap in a local stand-in for alphavantage.co.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
+        self._owns_client = client is None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the pooled client from the configured limits and timeouts."""
+        limits = httpx.Limits(
+            max_connections=settings.MARKET_DATA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MARKET_DATA_MAX_KEEPALIVE,
+            keepalive_expiry=settings.MARKET_DATA_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(
+            settings.MARKET_DATA_TIMEOUT,
+            connect=settings.MARKET_DATA_CONNECT_TIMEOUT
+        )
+
+        http2 = settings.MARKET_DATA_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("MARKET_DATA_HTTP2 is enabled but 'h2' is not installed, using HTTP/1.1")
+                http2 = False
+
+        return httpx.AsyncClient(
+            base_url=settings.MARKET_DATA_BASE_URL,
+            limits=limits,
+            timeout=timeout,
+            http2=http2
+        )
+
+    def open(self) -> httpx.AsyncClient:
+        """Create the pooled client if it is not already open."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+            self._owns_client = True
+        return self._client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the underlying client, creating it on first use."""
+        return self.open()
+
+    async def get(self, path: str, params: dict) -> httpx.Response:
+        """Send a GET request through the shared connection pool."""
+        return await self.client.get(path, params=params)
+
+    async def aclose(self):
+        """Close the pooled client if this instance created it."""
+        if self._client is not None and self._owns_client and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+# Global client instance, replaced by the app lifespan or by tests
+_market_data_client = MarketDataClient()
+
+
+def get_market_data_client() -> MarketDataClient:
+    """Get the shared market data client."""
+    return _market_data_client
+
+
+def set_market_data_client(client: MarketDataClient) -> MarketDataClient:
+    """
+    Replace the shared market data client.
+    Returns the previous client so callers can restore or close it.
+    """
+    global _market_data_client
+    previous = _market_data_client
+    _market_data_client = client
+    return previous
+
+
+def start_market_data_client():
+    """Open the shared client's connection pool (called on app startup)."""
+    _market_data_client.open()
+
+
+async def close_market_data_client():
+    """Close the shared client's connection pool (called on app shutdown)."""
+    await _market_data_client.aclose()
@@ -0,0 +1,209 @@
+"""
+Market data provider interface.
+
+stock_service asks a provider for quotes, fundamentals, search matches,
+price series and the symbol listing in normalized form (cacheable quote
+dicts, PriceSeries), so nothing outside the provider knows the wire format
+of the upstream API.
+
+Providers (MARKET_DATA_PROVIDER):
+- "alpha_vantage": the live API, through the quota-aware scheduler.
+  With MARKET_DATA_CAPTURE enabled every payload is also saved to
+  MARKET_DATA_CAPTURE_DIR.
+- "replay": serves payloads captured that way from disk, through the same
+  Alpha Vantage parsing code, without calling the API.
+- "synthetic": generates reproducible geometric Brownian motion prices for
+  any symbol and a listing of SYNTHETIC_SYMBOLS tickers, for load tests.
+
+Any provider can be wrapped with injected latency and errors
+(MARKET_DATA_FAULT_*), so the API can be benchmarked offline against an
+upstream that behaves like a slow or flaky production one.
+"""
+
+import asyncio
+import logging
+import random
+from typing import Dict, List, Optional
+from app.config import settings
+from app.services.price_series import PriceSeries
+from app.services.upstream_scheduler import Priority
+from app.utils.exceptions import UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataProvider:
+    """
+    Interface for a source of market data.
+
+    Quotes are returned as StockQuote.model_dump() dicts, overviews as
+    {"name", "market_cap", "pe_ratio", "dividend_yield"} dicts and search
+    matches as StockSearchResult.model_dump() dicts. Unknown symbols raise
+    UpstreamNotFoundError; an unreachable source raises
+    UpstreamUnavailableError. priority is only used by providers that
+    share a quota.
+    """
+
+    name = "base"
+
+    # Whether quotes() fetches many symbols per upstream call
+    supports_bulk_quotes = False
+
+    async def quote(self, symbol: str, priority: Priority) -> dict:
+        """Fetch the latest quote for a symbol."""
+        raise NotImplementedError
+
+    async def quotes(self, symbols: List[str], priority: Priority) -> Dict[str, dict]:
+        """
+        Fetch quotes for several symbols in one call. Symbols missing from
+        the result were not found.
+        """
+        raise NotImplementedError
+
+    async def overview(self, symbol: str) -> dict:
+        """Fetch company name and fundamentals."""
+        raise NotImplementedError
+
+    async def search(self, query: str) -> List[dict]:
+        """Search symbols and company names. Returns an empty list if nothing matches."""
+        raise NotImplementedError
+
+    async def intraday_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        """Fetch recent 5-minute bars: about a month, or only the last 100 bars if compact."""
+        raise NotImplementedError
+
+    async def daily_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        """Fetch daily bars: the full history, or only the last 100 bars if compact."""
+        raise NotImplementedError
+
+    async def listing(self) -> str:
+        """Fetch the active symbol listing as LISTING_STATUS CSV text."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """Return the provider name and any provider-specific counters."""
+        return {"provider": self.name}
+
+
+class FaultInjectingProvider(MarketDataProvider):
+    """
+    Wraps a provider and adds latency and random failures to every call.
+
+    Each call first sleeps latency seconds plus a uniform [0, jitter) extra,
+    then fails with UpstreamUnavailableError with probability error_rate.
+    Failures are drawn from a seeded generator, so a benchmark run sees the
+    same sequence of faults each time.
+    """
+
+    def __init__(
+        self,
+        inner: MarketDataProvider,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0
+    ):
+        self.inner = inner
+        self.name = inner.name
+        self.supports_bulk_quotes = inner.supports_bulk_quotes
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.injected_errors = 0
+
+    async def _inject(self, operation: str):
+        self.calls += 1
+        delay = self.latency + self._random.random() * self.jitter
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            self.injected_errors += 1
+            raise UpstreamUnavailableError(f"Injected {self.name} failure in {operation}", "UPSTREAM_INJECTED_FAULT")
+
+    async def quote(self, symbol: str, priority: Priority) -> dict:
+        await self._inject("quote")
+        return await self.inner.quote(symbol, priority)
+
+    async def quotes(self, symbols: List[str], priority: Priority) -> Dict[str, dict]:
+        await self._inject("quotes")
+        return await self.inner.quotes(symbols, priority)
+
+    async def overview(self, symbol: str) -> dict:
+        await self._inject("overview")
+        return await self.inner.overview(symbol)
+
+    async def search(self, query: str) -> List[dict]:
+        await self._inject("search")
+        return await self.inner.search(query)
+
+    async def intraday_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        await self._inject("intraday_series")
+        return await self.inner.intraday_series(symbol, compact)
+
+    async def daily_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        await self._inject("daily_series")
+        return await self.inner.daily_series(symbol, compact)
+
+    async def listing(self) -> str:
+        await self._inject("listing")
+        return await self.inner.listing()
+
+    def stats(self) -> dict:
+        """Return the wrapped provider's stats plus injected fault counts."""
+        return {
+            **self.inner.stats(),
+            "fault_calls": self.calls,
+            "injected_errors": self.injected_errors
+        }
+
+
+def create_market_data_provider() -> MarketDataProvider:
+    """Create the provider selected by MARKET_DATA_PROVIDER, wrapped with any configured faults."""
+    # Imported here because the providers subclass MarketDataProvider
+    from app.services.alpha_vantage_provider import AlphaVantageProvider, ReplayProvider
+    from app.services.synthetic_provider import SyntheticProvider
+
+    kind = settings.MARKET_DATA_PROVIDER
+    capture_dir = settings.MARKET_DATA_CAPTURE_DIR
+    if kind == "replay":
+        provider: MarketDataProvider = ReplayProvider(capture_dir)
+    elif kind == "synthetic":
+        provider = SyntheticProvider(settings.SYNTHETIC_SEED, settings.SYNTHETIC_SYMBOLS)
+    else:
+        if kind != "alpha_vantage":
+            logger.warning(f"Unknown MARKET_DATA_PROVIDER {kind!r}, using Alpha Vantage")
+        provider = AlphaVantageProvider(capture_dir if settings.MARKET_DATA_CAPTURE else None)
+
+    if settings.MARKET_DATA_FAULT_LATENCY > 0 or settings.MARKET_DATA_FAULT_JITTER > 0 \
+            or settings.MARKET_DATA_FAULT_ERROR_RATE > 0:
+        provider = FaultInjectingProvider(
+            provider,
+            settings.MARKET_DATA_FAULT_LATENCY,
+            settings.MARKET_DATA_FAULT_JITTER,
+            settings.MARKET_DATA_FAULT_ERROR_RATE,
+            settings.MARKET_DATA_FAULT_SEED
+        )
+    logger.info(f"Using market data provider {provider.name}")
+    return provider
+
+
+# Global provider instance (created on first use)
+_provider: Optional[MarketDataProvider] = None
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """Get the global market data provider, creating it on first use."""
+    global _provider
+    if _provider is None:
+        _provider = create_market_data_provider()
+    return _provider
+
+
+def set_market_data_provider(provider: MarketDataProvider) -> Optional[MarketDataProvider]:
+    """Replace the global market data provider (e.g. in tests). Returns the previous one."""
+    global _provider
+    previous = _provider
+    _provider = provider
+    return previous
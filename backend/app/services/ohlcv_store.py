@@ -0,0 +1,285 @@
+"""
+Persistent on-disk OHLCV store for daily price history.
+
+Each symbol is one file laid out in columns so it can be memory-mapped and
+read without copying:
+
+    header (64 bytes): magic, version, count, capacity
+    timestamps[capacity]  int64
+    open[capacity]        float64
+    high[capacity]        float64
+    low[capacity]         float64
+    close[capacity]       float64
+    volume[capacity]      int64
+
+Columns are written in native byte order. Only the first `count` slots of
+each column are valid; spare capacity lets new bars be appended in place.
+
+Crash safety:
+- Appends write the new column slots first and update the header count
+  last, so a crash leaves at worst unused bytes past `count`.
+- Growing or compacting a file, or revising its newest bar (the upstream
+  updates the current day), writes a complete new file next to it and
+  swaps it in with os.replace(), which is atomic.
+
+Valid slots are never modified in place. Series returned by read() are
+views into the mapping, and cached series (and the resampled aggregates
+and indicators built from them) must not change underneath their
+readers. A replaced file stays mapped, unchanged, until its last reader
+is gone.
+
+Files are mapped read-only, so every uvicorn worker on a host shares the
+same page cache. Writers take an exclusive lock on a side file.
+"""
+
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Optional
+import numpy as np
+from app.config import settings
+from app.services.price_series import PriceSeries
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OHLCV\x00\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+HEADER_SIZE = 64
+ITEM_SIZE = 8
+COLUMNS = ("timestamps", "open", "high", "low", "close", "volume")
+COLUMN_TYPES = ("q", "d", "d", "d", "d", "q")
+FILE_SUFFIX = ".ohlcv"
+
+
+def _capacity_for(count: int) -> int:
+    """Capacity to allocate for count bars, leaving room to append in place."""
+    return count + max(64, count // 4)
+
+
+def _column_offset(index: int, capacity: int) -> int:
+    return HEADER_SIZE + index * capacity * ITEM_SIZE
+
+
+class OHLCVStore:
+    """Memory-mapped columnar store with one file per symbol."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._stopping = threading.Event()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}{FILE_SUFFIX}")
+
+    @contextmanager
+    def _lock(self, symbol: str):
+        """Exclusive writer lock for a symbol, shared across processes."""
+        with open(self._path(symbol) + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_header(self, buffer) -> Optional[tuple]:
+        """Validate and return (count, capacity), or None if the header is invalid."""
+        if len(buffer) < HEADER_SIZE:
+            return None
+        magic, version, _, count, capacity = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION or count > capacity:
+            return None
+        if len(buffer) < _column_offset(len(COLUMNS), capacity):
+            return None
+        return count, capacity
+
+    def read(self, symbol: str) -> Optional[PriceSeries]:
+        """
+        Map a symbol's file and return its bars as a zero-copy series.
+        Returns None if the symbol is not stored or its file is unreadable.
+        """
+        path = self._path(symbol)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        header = self._read_header(mapped)
+        if header is None:
+            logger.warning(f"Ignoring corrupt OHLCV file {path}")
+            return None
+        count, capacity = header
+
+        view = memoryview(mapped)
+        columns = []
+        for index, type_code in enumerate(COLUMN_TYPES):
+            offset = _column_offset(index, capacity)
+            columns.append(view[offset:offset + count * ITEM_SIZE].cast(type_code))
+        return PriceSeries(*columns)
+
+    def _write_file(self, symbol: str, series: PriceSeries):
+        """Write a complete file for series and atomically swap it in."""
+        path = self._path(symbol)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        count = len(series)
+        capacity = _capacity_for(count)
+
+        with open(tmp_path, "wb") as f:
+            header = HEADER.pack(MAGIC, VERSION, 0, count, capacity)
+            f.write(header.ljust(HEADER_SIZE, b"\x00"))
+            padding = b"\x00" * ((capacity - count) * ITEM_SIZE)
+            for name in COLUMNS:
+                f.write(bytes(getattr(series, name)))
+                f.write(padding)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+        self._fsync_dir()
+
+    def _fsync_dir(self):
+        dir_fd = os.open(self.root, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def append(self, symbol: str, series: PriceSeries) -> int:
+        """
+        Merge bars newer than the last stored bar into the store.
+        A bar with the same timestamp as the last stored bar replaces it.
+        Returns the number of bars added.
+        """
+        if not len(series):
+            return 0
+
+        with self._lock(symbol):
+            stored = self.read(symbol)
+            if stored is None or not len(stored):
+                self._write_file(symbol, series)
+                return len(series)
+
+            last_ts = stored.last_timestamp
+            count = len(stored)
+            new_bars = series.slice(series.index_at_or_after(last_ts))
+            if len(new_bars) and new_bars.timestamps[0] == last_ts:
+                if _bar(new_bars, 0) != _bar(stored, count - 1):
+                    # Revised newest bar: copy-on-write, never touch mapped slots
+                    self._write_file(symbol, _concat(stored.slice(0, count - 1), new_bars))
+                    return len(new_bars) - 1
+                new_bars = new_bars.slice(1)
+
+            if not len(new_bars):
+                return 0
+
+            with open(self._path(symbol), "r+b") as f:
+                _, _, _, _, capacity = HEADER.unpack(f.read(HEADER.size))
+
+            if count + len(new_bars) > capacity:
+                self._write_file(symbol, _concat(stored, new_bars))
+            else:
+                self._append_in_place(symbol, count, capacity, new_bars)
+            return len(new_bars)
+
+    def _append_in_place(self, symbol: str, count: int, capacity: int, bars: PriceSeries):
+        """Write bars into spare capacity, then publish them by updating the header count."""
+        with open(self._path(symbol), "r+b") as f:
+            fd = f.fileno()
+            for index, name in enumerate(COLUMNS):
+                offset = _column_offset(index, capacity) + count * ITEM_SIZE
+                os.pwrite(fd, bytes(getattr(bars, name)), offset)
+            os.fsync(fd)
+            os.pwrite(fd, HEADER.pack(MAGIC, VERSION, 0, count + len(bars), capacity), 0)
+            os.fsync(fd)
+
+    def compact(self, symbol: str) -> bool:
+        """
+        Rewrite a symbol's file if it needs it: bars out of order or
+        duplicated (e.g. left by an older writer), or more spare capacity
+        than a fresh file would get. The rewrite has sorted, de-duplicated
+        bars and normal spare capacity. Returns True if the file was rewritten.
+        """
+        with self._lock(symbol):
+            stored = self.read(symbol)
+            if stored is None:
+                return False
+            with open(self._path(symbol), "rb") as f:
+                _, _, _, _, capacity = HEADER.unpack(f.read(HEADER.size))
+            timestamps = np.frombuffer(stored.timestamps, dtype=np.int64)
+            ordered = bool(np.all(timestamps[1:] > timestamps[:-1]))
+            if ordered and capacity <= _capacity_for(len(stored)):
+                return False
+            bars = {}
+            for bar in zip(stored.timestamps, stored.open, stored.high, stored.low, stored.close, stored.volume):
+                bars[bar[0]] = bar
+            self._write_file(symbol, PriceSeries.from_bars(bars.values()))
+            return True
+
+    def _remove_leftover(self, name: str):
+        """
+        Remove a temporary file left by an interrupted write. The symbol's
+        lock is taken first, so a write in progress (in any worker) finishes
+        and swaps its file in before anything is deleted.
+        """
+        symbol = name[:name.index(FILE_SUFFIX + ".tmp.")]
+        with self._lock(symbol):
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+
+    def compact_all(self):
+        """
+        Compact every stored symbol that needs it and remove leftover
+        temporary files. Stops after the current file once stop_compaction()
+        is called.
+        """
+        for name in os.listdir(self.root):
+            if self._stopping.is_set():
+                logger.info("Stopping OHLCV store compaction")
+                return
+            if FILE_SUFFIX + ".tmp." in name:
+                self._remove_leftover(name)
+            elif name.endswith(FILE_SUFFIX):
+                try:
+                    self.compact(name[:-len(FILE_SUFFIX)])
+                except Exception as e:
+                    logger.error(f"Failed to compact {os.path.join(self.root, name)}: {e}")
+
+    def stop_compaction(self):
+        """Ask a running compact_all() to stop (its thread cannot be cancelled)."""
+        self._stopping.set()
+
+
+def _bar(series: PriceSeries, index: int) -> tuple:
+    return tuple(getattr(series, name)[index] for name in COLUMNS)
+
+
+def _concat(first: PriceSeries, second: PriceSeries) -> PriceSeries:
+    """Copy two series into one array-backed series."""
+    columns = []
+    for name, type_code in zip(COLUMNS, COLUMN_TYPES):
+        column = array(type_code, getattr(first, name))
+        column.extend(getattr(second, name))
+        columns.append(column)
+    return PriceSeries(*columns)
+
+
+# Global store instance (None when disabled)
+_store: Optional[OHLCVStore] = None
+
+
+def get_ohlcv_store() -> Optional[OHLCVStore]:
+    """Get the daily history store, or None if HISTORY_STORE_ENABLED is off."""
+    global _store
+    if _store is None and settings.HISTORY_STORE_ENABLED:
+        _store = OHLCVStore(os.path.join(settings.HISTORY_DATA_DIR, "daily"))
+    return _store
@@ -4,10 +4,11 @@ OpenAI service for AI-powered stock analysis and recommendations.
 
 import logging
 from typing import Dict, Any
-from openai import AsyncOpenAI
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError
 from pydantic import ValidationError
 from app.config import settings
 from app.schemas.recommendation import Factor
+from app.utils.circuit_breaker import get_circuit_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,15 @@ logger = logging.getLogger(__name__)
 _openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
 
 
+def _is_openai_failure(error: BaseException) -> bool:
+    """Connection errors, timeouts and 5xx count against OpenAI; rate limits and bad requests do not."""
+    return isinstance(error, (APIConnectionError, InternalServerError))
+
+
+# Adaptive timeout and fast failure for OpenAI calls
+_breaker = get_circuit_breaker("openai", settings.OPENAI_TIMEOUT, _is_openai_failure)
+
+
 async def analyze_stock(prompt: str) -> Dict[str, Any]:
     """
     analyse stock data using OpenAI and return structured recommendation.
@@ -66,8 +76,8 @@ async def analyze_stock(prompt: str) -> Dict[str, Any]:
 
 Base analysis on technical indicators, trends, and volume. Be objective."""
 
-        # wait for response completion
-        response = await _openai_client.chat.completions.create(
+        # wait for response completion (fails fast while the OpenAI circuit is open)
+        response = await _breaker.call(lambda: _openai_client.chat.completions.create(
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -76,7 +86,7 @@ Base analysis on technical indicators, trends, and volume. Be objective."""
             response_format=response_format,
             temperature=0.3,
             max_tokens=settings.OPENAI_MAX_TOKENS
-        )
+        ))
         
         # Parse the JSON content from the response
         import json
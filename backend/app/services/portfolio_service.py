@@ -2,7 +2,7 @@
 
 from supabase import Client
 from decimal import Decimal
-from typing import List, Optional, Dict
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -22,37 +22,6 @@ def get_holding_by_symbol(supabase: Client, user_id: str, symbol: str) -> Option
     return result.data[0] if result.data else None
 
 
-def calculate_portfolio_metrics(holdings: List[dict], current_prices: Dict[str, Decimal]) -> dict:
-    """
-    Calculate portfolio-level metrics including total value, total invested, and profit/loss.
-    """
-    total_value = Decimal("0")
-    total_invested = Decimal("0")
-    
-    for holding in holdings:
-        shares = Decimal(str(holding["shares"]))
-        average_cost = Decimal(str(holding["average_cost"]))
-        symbol = holding["symbol"]
-        
-        current_price = current_prices.get(symbol, average_cost)
-        
-        holding_value = shares * current_price
-        holding_cost = shares * average_cost
-        
-        total_value += holding_value
-        total_invested += holding_cost
-    
-    profit_loss = total_value - total_invested
-    profit_loss_percent = (profit_loss / total_invested * 100) if total_invested > 0 else Decimal("0")
-    
-    return {
-        "total_value": total_value,
-        "total_invested": total_invested,
-        "profit_loss": profit_loss,
-        "profit_loss_percent": profit_loss_percent
-    }
-
-
 def update_or_create_holding(
     supabase: Client,
     user_id: str,
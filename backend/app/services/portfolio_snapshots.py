@@ -0,0 +1,255 @@
+"""
+Materialized per-user portfolio snapshots.
+
+Every GET /api/portfolio used to read the holdings from Supabase, look up a
+quote per holding and value the whole portfolio again, even when nothing
+had changed since the previous request. Each user's valued portfolio is
+now kept as a snapshot with a version, together with its encoded JSON, so
+a repeated dashboard refresh is a dictionary lookup.
+
+A snapshot is kept current by events instead of being recomputed:
+- a trade (create_transaction) drops the user's snapshot, and the next
+  request rebuilds it from the updated holdings
+- a new quote for a held symbol reprices only the holdings in that symbol
+  and adjusts the totals by the change, then bumps the version. The JSON
+  is re-encoded on the next read.
+
+Snapshots are rebuilt after PORTFOLIO_SNAPSHOT_TTL regardless, which
+picks up holdings changed some other way.
+
+Every worker keeps its own snapshots. With a shared cache backend
+(CACHE_BACKEND other than "memory"), a trade also writes a new generation
+token for the user to the shared tier. Every read compares the snapshot's
+token with the shared one, so a trade made through any worker
+invalidates the snapshots in all of them. If the shared tier cannot be
+read, snapshots are not served.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, Optional, Set, Tuple
+from app.config import settings
+from app.schemas.portfolio import HoldingResponse, PortfolioResponse
+from app.services.stock_service import get_stock_cache
+from app.utils.cache_backend import CacheBackend, get_cache_backend
+from app.utils.holding_calculator import reprice_holding
+
+logger = logging.getLogger(__name__)
+
+# Shared-tier region holding each user's generation token
+GENERATION_REGION = "portfolio_generation"
+
+# (local generation, shared generation token) read before valuing a portfolio
+Generation = Tuple[int, Optional[str]]
+
+
+class PortfolioSnapshot:
+    """A user's valued portfolio, its version and its last encoded form."""
+
+    __slots__ = ("portfolio", "by_symbol", "version", "created_at", "shared_token", "_encoded", "_encoded_version")
+
+    def __init__(self, portfolio: PortfolioResponse, shared_token: Optional[str] = None):
+        self.portfolio = portfolio
+        self.shared_token = shared_token
+        self.by_symbol: Dict[str, HoldingResponse] = {
+            holding.symbol.upper(): holding for holding in portfolio.holdings
+        }
+        self.version = 0
+        self.created_at = time.monotonic()
+        self._encoded: Optional[bytes] = None
+        self._encoded_version = -1
+
+    def encoded(self) -> bytes:
+        """JSON for the current version, encoding it only if it changed since the last call."""
+        if self._encoded_version != self.version:
+            self._encoded = self.portfolio.model_dump_json().encode()
+            self._encoded_version = self.version
+        return self._encoded
+
+
+class PortfolioSnapshotCache:
+    """
+    Snapshots by user, with an index from symbol to the users holding it.
+
+    Each user also has a generation that every invalidation increments. A
+    request records the generation before reading holdings. Its snapshot
+    is only stored if no trade happened in the meantime, so a slow
+    valuation cannot overwrite a newer trade's invalidation.
+
+    backend is the shared cache tier used for cross-worker generation
+    tokens, or None when there is only one worker.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_users: Optional[int] = None,
+        backend: Optional[CacheBackend] = None
+    ):
+        self.ttl = settings.PORTFOLIO_SNAPSHOT_TTL if ttl is None else ttl
+        self.max_users = settings.PORTFOLIO_SNAPSHOT_MAX_USERS if max_users is None else max_users
+        self.backend = backend
+        self._snapshots: Dict[str, PortfolioSnapshot] = {}
+        self._holders: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self._publishing: Dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+        self.repriced = 0
+
+    async def _shared_token(self, user_id: str) -> Optional[str]:
+        """The user's generation token in the shared tier (None if there is none or it is unreachable)."""
+        entry = await self.backend.get(GENERATION_REGION, user_id)
+        return entry[0] if entry is not None else None
+
+    async def get(self, user_id: str) -> Optional[bytes]:
+        """Return the user's portfolio as JSON, or None if there is no current snapshot."""
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is not None and time.monotonic() - snapshot.created_at >= self.ttl:
+            self._remove(user_id)
+            snapshot = None
+        if snapshot is not None and self.backend is not None:
+            token = await self._shared_token(user_id)
+            # The snapshot may have been replaced or dropped while waiting
+            if token != snapshot.shared_token or self._snapshots.get(user_id) is not snapshot:
+                if self._snapshots.get(user_id) is snapshot:
+                    self._remove(user_id)
+                    self.remote_invalidations += 1
+                snapshot = None
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return snapshot.encoded()
+
+    async def generation(self, user_id: str) -> Generation:
+        """
+        Current generation for user_id; pass it to put() with the valuation
+        built after reading it. With a shared tier, a user without a token
+        gets one, so their snapshots can be checked against later trades.
+        """
+        local = self._generations.get(user_id, 0)
+        if self.backend is None:
+            return local, None
+        token = await self._shared_token(user_id)
+        if token is None:
+            token = await self._write_token(user_id)
+        return local, token
+
+    def put(self, user_id: str, generation: Generation, portfolio: PortfolioResponse) -> bytes:
+        """
+        Store portfolio as the user's snapshot unless it was invalidated since
+        generation was read. Returns the portfolio as JSON either way.
+        """
+        local, token = generation
+        snapshot = PortfolioSnapshot(portfolio, token)
+        if local != self._generations.get(user_id, 0):
+            return snapshot.encoded()
+
+        self._remove(user_id)
+        if len(self._snapshots) >= self.max_users:
+            # Drop the oldest snapshot (dicts keep insertion order)
+            self._remove(next(iter(self._snapshots)))
+        self._snapshots[user_id] = snapshot
+        for symbol in snapshot.by_symbol:
+            self._holders.setdefault(symbol, set()).add(user_id)
+        return snapshot.encoded()
+
+    def invalidate(self, user_id: str):
+        """
+        Drop the user's snapshot (e.g. after a trade changed their holdings or
+        balance). With a shared tier, a new generation token is written in the
+        background; await published() before answering the request that traded.
+        """
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        if self._remove(user_id):
+            self.invalidations += 1
+        if self.backend is not None:
+            previous = self._publishing.get(user_id)
+            self._publishing[user_id] = asyncio.get_running_loop().create_task(self._publish(user_id, previous))
+
+    async def _publish(self, user_id: str, previous: Optional[asyncio.Task]):
+        if previous is not None:
+            # Keep tokens in trade order
+            await asyncio.gather(previous, return_exceptions=True)
+        await self._write_token(user_id)
+
+    async def _write_token(self, user_id: str) -> str:
+        """Write a new generation token for the user to the shared tier and return it."""
+        token = uuid.uuid4().hex
+        now = time.time()
+        # A missing token is replaced on the next miss, so it only has to outlive a snapshot
+        ttl = 2 * self.ttl
+        await self.backend.set(GENERATION_REGION, user_id, (token, now, now + ttl), ttl)
+        return token
+
+    async def published(self, user_id: str):
+        """Wait until the user's latest invalidation is visible to the other workers."""
+        task = self._publishing.get(user_id)
+        if task is None:
+            return
+        try:
+            await asyncio.shield(task)
+        except Exception as e:
+            logger.warning(f"Failed to publish portfolio invalidation for {user_id}: {e}")
+        if self._publishing.get(user_id) is task:
+            del self._publishing[user_id]
+
+    def on_quote(self, symbol: str, quote: Any):
+        """Reprice the holdings in symbol of every snapshot that holds it."""
+        holders = self._holders.get(symbol)
+        if not holders:
+            return
+        price = Decimal(quote["current_price"])
+        for user_id in holders:
+            snapshot = self._snapshots[user_id]
+            holding = snapshot.by_symbol[symbol]
+            if holding.current_price != price:
+                reprice_holding(snapshot.portfolio, holding, price)
+                snapshot.version += 1
+                self.repriced += 1
+
+    def _remove(self, user_id: str) -> bool:
+        snapshot = self._snapshots.pop(user_id, None)
+        if snapshot is None:
+            return False
+        for symbol in snapshot.by_symbol:
+            holders = self._holders.get(symbol)
+            if holders is not None:
+                holders.discard(user_id)
+                if not holders:
+                    del self._holders[symbol]
+        return True
+
+    def stats(self) -> dict:
+        """Return snapshot counts and hit/invalidation counters."""
+        return {
+            "users": len(self._snapshots),
+            "symbols": len(self._holders),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+            "repriced_holdings": self.repriced
+        }
+
+
+# Global snapshot cache (created on first use)
+_snapshots: Optional[PortfolioSnapshotCache] = None
+
+
+def get_portfolio_snapshots() -> PortfolioSnapshotCache:
+    """Get the global portfolio snapshot cache, subscribing it to quote updates on first use."""
+    global _snapshots
+    if _snapshots is None:
+        backend = get_cache_backend()
+        _snapshots = PortfolioSnapshotCache(backend=backend if backend.name != "memory" else None)
+        get_stock_cache().add_listener("quote", _snapshots.on_quote)
+    return _snapshots
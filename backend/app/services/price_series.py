@@ -0,0 +1,131 @@
+"""
+Columnar OHLCV price series.
+
+A series stores each field in its own typed array (timestamps and volume as
+64-bit ints, prices as doubles) instead of a list of per-bar dicts, which
+keeps a 20-year daily history in a few hundred kilobytes. Timestamps are
+sorted ascending, so any date range is a binary-searched slice.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterable, List, Sequence, Tuple
+from app.schemas.stock import HistoricalPrice
+
+# (timestamp, open, high, low, close, volume)
+Bar = Tuple[int, float, float, float, float, int]
+
+
+def to_timestamp(dt: datetime) -> int:
+    """Convert a naive datetime to integer epoch seconds (treated as UTC)."""
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def from_timestamp(ts: int) -> datetime:
+    """Convert epoch seconds back to the naive datetime used in responses."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+class PriceSeries:
+    """
+    OHLCV bars stored as parallel columns sorted by timestamp.
+
+    Columns are array.array instances by default, but any sequence of the
+    right type works (e.g. a memoryview over a memory-mapped file), so slices
+    can be served without copying the underlying data.
+    """
+
+    __slots__ = ("timestamps", "open", "high", "low", "close", "volume")
+
+    def __init__(
+        self,
+        timestamps: Sequence[int] = None,
+        open: Sequence[float] = None,
+        high: Sequence[float] = None,
+        low: Sequence[float] = None,
+        close: Sequence[float] = None,
+        volume: Sequence[int] = None
+    ):
+        self.timestamps = timestamps if timestamps is not None else array("q")
+        self.open = open if open is not None else array("d")
+        self.high = high if high is not None else array("d")
+        self.low = low if low is not None else array("d")
+        self.close = close if close is not None else array("d")
+        self.volume = volume if volume is not None else array("q")
+
+    @classmethod
+    def from_bars(cls, bars: Iterable[Bar]) -> "PriceSeries":
+        """Build a series from (timestamp, open, high, low, close, volume) tuples in any order."""
+        series = cls()
+        for ts, o, h, l, c, v in sorted(bars):
+            series.timestamps.append(ts)
+            series.open.append(o)
+            series.high.append(h)
+            series.low.append(l)
+            series.close.append(c)
+            series.volume.append(v)
+        return series
+
+    def __reduce__(self):
+        # Memoryview columns cannot be pickled, so always pickle array copies
+        return (PriceSeries, tuple(
+            column if isinstance(column, array) else array(type_code, column)
+            for type_code, column in zip(
+                ("q", "d", "d", "d", "d", "q"),
+                (self.timestamps, self.open, self.high, self.low, self.close, self.volume)
+            )
+        ))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the columns."""
+        return sum(
+            len(column) * getattr(column, "itemsize", 8)
+            for column in (self.timestamps, self.open, self.high, self.low, self.close, self.volume)
+        )
+
+    @property
+    def last_timestamp(self) -> int:
+        """Timestamp of the newest bar (0 if empty)."""
+        return self.timestamps[-1] if len(self.timestamps) else 0
+
+    def index_at_or_after(self, ts: int) -> int:
+        """Binary search for the first bar at or after ts."""
+        return bisect_left(self.timestamps, ts)
+
+    def slice(self, start: int, end: int = None) -> "PriceSeries":
+        """Return bars[start:end] as a new series."""
+        end = len(self) if end is None else end
+        return PriceSeries(
+            self.timestamps[start:end],
+            self.open[start:end],
+            self.high[start:end],
+            self.low[start:end],
+            self.close[start:end],
+            self.volume[start:end]
+        )
+
+    def since(self, ts: int) -> "PriceSeries":
+        """Return every bar at or after ts."""
+        return self.slice(self.index_at_or_after(ts))
+
+    def to_historical_prices(self) -> List[HistoricalPrice]:
+        """Convert the bars to response models."""
+        return [
+            HistoricalPrice.model_construct(
+                date=from_timestamp(ts),
+                open=Decimal(repr(o)),
+                high=Decimal(repr(h)),
+                low=Decimal(repr(l)),
+                close=Decimal(repr(c)),
+                volume=v
+            )
+            for ts, o, h, l, c, v in zip(
+                self.timestamps, self.open, self.high, self.low, self.close, self.volume
+            )
+        ]
@@ -0,0 +1,192 @@
+"""
+Background refresher that keeps the quote cache warm.
+
+Without it, the first request after each quote expires pays the upstream
+latency. The refresher periodically re-fetches the hot symbols (every
+symbol held in any portfolio plus symbols users recently requested) while
+the market is open or in pre-market/after-hours trading, so portfolio and
+quote endpoints are served from cache in steady state.
+
+Refreshes go through the upstream scheduler at BACKGROUND priority and are
+capped to QUOTE_REFRESH_QUOTA_SHARE of the plan's per-minute and per-day
+limits, leaving the rest for user traffic.
+"""
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+from app.config import settings
+from app.database import get_supabase, get_supabase_breaker
+from app.services.market_data_provider import get_market_data_provider
+from app.services.stock_service import (
+    BULK_QUOTE_CHUNK_SIZE,
+    get_hot_symbols,
+    get_market_status,
+    get_stock_cache,
+    refresh_stock_quotes
+)
+from app.services.upstream_scheduler import Priority, get_upstream_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Market statuses during which quotes can change
+ACTIVE_STATUSES = ("open", "pre-market", "after-hours")
+
+# Holdings rows per Supabase request (PostgREST's default max-rows)
+HOLDINGS_PAGE_SIZE = 1000
+
+
+def _load_holding_symbols() -> List[str]:
+    """
+    Distinct symbols held across all portfolios (blocking Supabase calls).
+    PostgREST caps each response (1000 rows by default), so rows are read
+    in pages until a short page comes back.
+    """
+    symbols = set()
+    start = 0
+    while True:
+        result = get_supabase().table("holdings")\
+            .select("symbol")\
+            .order("id")\
+            .range(start, start + HOLDINGS_PAGE_SIZE - 1)\
+            .execute()
+        rows = result.data or []
+        symbols.update(row["symbol"].upper() for row in rows if row.get("symbol"))
+        if len(rows) < HOLDINGS_PAGE_SIZE:
+            return sorted(symbols)
+        start += HOLDINGS_PAGE_SIZE
+
+
+class QuoteRefresher:
+    """
+    Periodic quote refresh for hot symbols.
+
+    Each cycle picks the hot symbols whose cached quote is missing or would
+    expire before the next cycle (holdings first, then recently requested
+    symbols), trims the list to the cycle's quota budget and re-fetches it.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = settings.QUOTE_REFRESH_INTERVAL if interval is None else interval
+        self._task: Optional[asyncio.Task] = None
+        self._holdings: List[str] = []
+        self._holdings_loaded_at = 0.0
+
+        # Metrics
+        self.cycles = 0
+        self.skipped_closed = 0
+        self.skipped_quota = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_cycle_symbols = 0
+
+    async def _holding_symbols(self) -> List[str]:
+        """Holding symbols, reloaded every HOLDINGS_SYMBOLS_REFRESH seconds."""
+        if time.monotonic() - self._holdings_loaded_at >= settings.HOLDINGS_SYMBOLS_REFRESH:
+            try:
+                self._holdings = await get_supabase_breaker().call(lambda: asyncio.to_thread(_load_holding_symbols))
+            except Exception as e:
+                logger.warning(f"Failed to load holding symbols: {e}")
+            self._holdings_loaded_at = time.monotonic()
+        return self._holdings
+
+    def _budget(self) -> int:
+        """Symbols this cycle may refresh, or 0 if the refresher's quota share is used up."""
+        bucket = get_upstream_scheduler().bucket
+        share = settings.QUOTE_REFRESH_QUOTA_SHARE
+        if bucket.per_day > 0 and bucket.day_used >= bucket.per_day * share:
+            return 0
+        if bucket.capacity <= 0:
+            calls = settings.BATCH_QUOTE_MAX_SYMBOLS
+        else:
+            calls = int(bucket.capacity * share * self.interval / 60)
+        per_call = BULK_QUOTE_CHUNK_SIZE if get_market_data_provider().supports_bulk_quotes else 1
+        return calls * per_call
+
+    def _due(self, symbols: List[str]) -> List[str]:
+        """Symbols whose cached quote is missing or expires before the next cycle."""
+        cache = get_stock_cache().engine
+        horizon = time.time() + self.interval
+        due = []
+        for symbol in symbols:
+            entry = cache.peek("quote", symbol)
+            if entry is None or entry.expires_at <= horizon:
+                due.append(symbol)
+        return due
+
+    async def refresh_once(self) -> int:
+        """Run one refresh cycle. Returns the number of symbols requested."""
+        self.cycles += 1
+        if get_market_status().status not in ACTIVE_STATUSES:
+            self.skipped_closed += 1
+            return 0
+
+        hot = list(dict.fromkeys(await self._holding_symbols() + get_hot_symbols().recent()))
+        due = self._due(hot)
+        if not due:
+            return 0
+
+        budget = self._budget()
+        if budget <= 0:
+            self.skipped_quota += 1
+            return 0
+
+        batch = due[:budget]
+        refreshed, failed = await refresh_stock_quotes(batch, Priority.BACKGROUND)
+        self.refreshed += refreshed
+        self.failed += failed
+        self.last_cycle_symbols = len(batch)
+        if failed:
+            logger.warning(f"Quote refresh: {failed} of {len(batch)} symbols failed")
+        return len(batch)
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Quote refresh cycle failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Start the refresh loop if it is not running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the refresh loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Return refresh counters and the current hot set size."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "cycles": self.cycles,
+            "skipped_closed": self.skipped_closed,
+            "skipped_quota": self.skipped_quota,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_cycle_symbols": self.last_cycle_symbols,
+            "holding_symbols": len(self._holdings),
+            "recent_symbols": len(get_hot_symbols())
+        }
+
+
+# Global refresher instance
+_refresher: Optional[QuoteRefresher] = None
+
+
+def get_quote_refresher() -> QuoteRefresher:
+    """Get the global quote refresher, creating it on first use."""
+    global _refresher
+    if _refresher is None:
+        _refresher = QuoteRefresher()
+    return _refresher
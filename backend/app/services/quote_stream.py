@@ -0,0 +1,167 @@
+"""
+Live quote streaming with shared per-symbol polling.
+
+Clients subscribe to a set of symbols once (over WebSocket or SSE) instead
+of polling the quote endpoint for every visible ticker. For each symbol
+with at least one subscriber there is exactly one poller task, which reads
+the quote through the normal cache path and fans new ticks out to every
+subscription.
+
+Each subscription keeps only the latest undelivered tick per symbol, so a
+slow client never builds up a backlog: newer ticks replace older ones
+until the connection is ready to send again.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set
+from app.config import settings
+from app.services.stock_service import get_stock_quote
+from app.services.upstream_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteSubscription:
+    """
+    One client connection's view of the stream.
+    Pending ticks are coalesced per symbol; the connection drains them with
+    next_batch() at its own pace.
+    """
+
+    def __init__(self):
+        self.symbols: Set[str] = set()
+        self._pending: Dict[str, dict] = {}
+        self._ready = asyncio.Event()
+        self.delivered = 0
+        self.coalesced = 0
+
+    def push(self, symbol: str, tick: dict):
+        """Queue a tick, replacing any undelivered tick for the same symbol."""
+        if symbol in self._pending:
+            self.coalesced += 1
+        self._pending[symbol] = tick
+        self._ready.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> Dict[str, dict]:
+        """
+        Wait for pending ticks and take them all.
+        Returns an empty dict if timeout passes with nothing to send.
+        """
+        if not self._pending:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return {}
+        batch = self._pending
+        self._pending = {}
+        self.delivered += len(batch)
+        return batch
+
+
+class QuoteHub:
+    """Tracks subscriptions per symbol and runs one poller per subscribed symbol."""
+
+    def __init__(self, poll_interval: Optional[float] = None):
+        self.poll_interval = settings.STREAM_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._subscribers: Dict[str, Set[QuoteSubscription]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, dict] = {}
+        self.connections = 0
+        self.ticks_published = 0
+
+    def open(self) -> QuoteSubscription:
+        """Create a subscription for a new connection."""
+        self.connections += 1
+        return QuoteSubscription()
+
+    def close(self, subscription: QuoteSubscription):
+        """Remove a connection's subscriptions."""
+        self.unsubscribe(subscription, list(subscription.symbols))
+        self.connections -= 1
+
+    def subscribe(self, subscription: QuoteSubscription, symbols: Iterable[str]):
+        """Subscribe to symbols, sending the latest known tick for each straight away."""
+        for symbol in symbols:
+            symbol = symbol.strip().upper()
+            if not symbol or symbol in subscription.symbols:
+                continue
+            if len(subscription.symbols) >= settings.STREAM_MAX_SYMBOLS:
+                break
+            subscription.symbols.add(symbol)
+            self._subscribers.setdefault(symbol, set()).add(subscription)
+            if symbol in self._latest:
+                subscription.push(symbol, self._latest[symbol])
+            if symbol not in self._pollers:
+                self._pollers[symbol] = asyncio.create_task(self._poll(symbol))
+
+    def unsubscribe(self, subscription: QuoteSubscription, symbols: Iterable[str]):
+        """Unsubscribe from symbols, stopping pollers nobody needs any more."""
+        for symbol in symbols:
+            symbol = symbol.strip().upper()
+            subscription.symbols.discard(symbol)
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[symbol]
+                self._latest.pop(symbol, None)
+                poller = self._pollers.pop(symbol, None)
+                if poller is not None:
+                    poller.cancel()
+
+    def _publish(self, symbol: str, tick: dict):
+        self._latest[symbol] = tick
+        self.ticks_published += 1
+        for subscription in self._subscribers.get(symbol, ()):
+            subscription.push(symbol, tick)
+
+    async def _poll(self, symbol: str):
+        """Read the symbol's quote every poll interval and publish it when it changes."""
+        while True:
+            try:
+                quote = await get_stock_quote(symbol, Priority.INTERACTIVE)
+                tick = quote.model_dump(mode="json")
+                if tick != self._latest.get(symbol):
+                    self._publish(symbol, tick)
+            except ValueError as e:
+                # Unknown symbol: tell subscribers once and stop polling it
+                self._publish(symbol, {"symbol": symbol, "error": str(e)})
+                self._pollers.pop(symbol, None)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Quote stream poll failed for {symbol}: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def stop(self):
+        """Cancel every poller."""
+        pollers = list(self._pollers.values())
+        self._pollers.clear()
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Return connection, symbol and tick counters."""
+        return {
+            "connections": self.connections,
+            "symbols": len(self._subscribers),
+            "pollers": len(self._pollers),
+            "ticks_published": self.ticks_published
+        }
+
+
+# Global hub instance
+_hub: Optional[QuoteHub] = None
+
+
+def get_quote_hub() -> QuoteHub:
+    """Get the global quote hub, creating it on first use."""
+    global _hub
+    if _hub is None:
+        _hub = QuoteHub()
+    return _hub
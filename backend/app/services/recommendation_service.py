@@ -9,75 +9,141 @@ and improve response times.
 import logging
 from decimal import Decimal
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Awaitable, Callable, Optional, Dict
+from app.config import settings
 from app.schemas.recommendation import Recommendation, Factor
-from app.services.stock_service import get_stock_details
+from app.services.stock_service import get_latest_indicators, get_stock_details
 from app.services.openai_service import analyze_stock
+from app.utils.cache import CacheEngine, RegionConfig
+from app.utils.cache_backend import CacheBackend, get_cache_backend
+from app.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 
 class RecommendationCache:
     """
-    In-memory cache for recommendation data to reduce OpenAI API calls.
-    Follows the same pattern as StockCache in stock_service.py
+    Bounded in-memory cache for recommendation data to reduce OpenAI API calls.
+    Follows the same pattern as StockCache in stock_service.py, including
+    single-flight misses and the shared cache backend across workers.
     """
     
-    def __init__(self):
-        self.cache: Dict[str, Dict] = {}
-        self.ttl = {
-            "recommendation": timedelta(minutes=15)
-        }
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.engine = CacheEngine({
+            "recommendation": RegionConfig(
+                ttl=15 * 60, max_entries=2_000, max_bytes=8 * 1024 * 1024,
+                fallback_ttl=settings.UPSTREAM_FALLBACK_WINDOW
+            )
+        })
+        self.flight = SingleFlight()
+        self.fallbacks = 0
+        self.backend = get_cache_backend() if backend is None else backend
     
     def get(self, key: str, data_type: str = "recommendation") -> Optional[dict]:
         """
         Retrieve cached data if not expired.
         """
-        cache_key = f"{data_type}:{key}"
-        if cache_key in self.cache:
-            cached_data = self.cache[cache_key]
-            if datetime.utcnow() < cached_data["expires_at"]:
-                return cached_data["data"]
-            else:
-                # Cache expired, remove it
-                del self.cache[cache_key]
-        return None
+        return self.engine.get(data_type, key)
     
     def set(self, key: str, data_type: str, data: dict):
         """
         Store data in cache with TTL.
         """
-        cache_key = f"{data_type}:{key}"
-        self.cache[cache_key] = {
-            "data": data,
-            "expires_at": datetime.utcnow() + self.ttl[data_type]
-        }
+        self.engine.set(data_type, key, data)
+    
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[dict]], data_type: str = "recommendation") -> dict:
+        """
+        Return cached data, or fetch it with at most one call per key.
+        Only successful results are cached. If the fetch fails for any
+        reason other than an unknown symbol, the last recommendation for the
+        key (up to UPSTREAM_FALLBACK_WINDOW old) is returned instead.
+        """
+        cached = self.get(key, data_type)
+        if cached is not None:
+            return cached
+        region = self.engine.region(data_type)
+        try:
+            return await self.flight.do(key, lambda: self.backend.load(region, key, fetch))
+        except ValueError:
+            raise
+        except Exception as e:
+            entry = self.engine.fallback(data_type, key)
+            if entry is None:
+                raise
+            self.fallbacks += 1
+            logger.warning(f"Serving recommendation for {key} from {entry.age():.0f}s ago: {e}")
+            return entry.value
+    
+    def stats(self) -> dict:
+        """
+        Return hit, miss, eviction, size and single-flight statistics.
+        """
+        stats = self.engine.stats()
+        stats["recommendation"].update(self.flight.stats())
+        stats["recommendation"]["fallbacks"] = self.fallbacks
+        return stats
 
 # Global cache instance
 _recommendation_cache = RecommendationCache()
 
+
+def get_recommendation_cache() -> RecommendationCache:
+    """Get the global recommendation cache instance."""
+    return _recommendation_cache
+
+
 async def get_recommendation(symbol: str) -> Recommendation:
     """
     Generate AI-powered stock recommendation for a given symbol.
     
     Process:
-    1. Check cache for existing recommendation
+    1. Return the cached recommendation if there is one
     2. If cache miss, fetch stock details from Alpha Vantage
     3. Build analysis prompt with stock data
     4. Call OpenAI API for AI-powered analysis
     5. Parse response and create Recommendation object
     6. Cache result for 15 minutes
     """
-    # Check cache first to avoid unnecessary API calls
-    cached = _recommendation_cache.get(symbol, "recommendation")
-    if cached:
-        logger.info(f"Returning cached recommendation for {symbol}")
-        # Check if cached data is stale (older than 15 minutes)
-        calculated_at = datetime.fromisoformat(cached["calculated_at"])
-        is_stale = (datetime.utcnow() - calculated_at) > timedelta(minutes=15)
-        cached["is_stale"] = is_stale
-        return Recommendation(**cached)
-    
+    # Concurrent misses for a symbol (in any worker) share one OpenAI call
+    data = await _recommendation_cache.get_or_fetch(symbol, lambda: _generate_recommendation(symbol))
+    # May be an older recommendation if OpenAI or Alpha Vantage is unavailable
+    calculated_at = datetime.fromisoformat(data["calculated_at"])
+    is_stale = (datetime.utcnow() - calculated_at) > timedelta(minutes=15)
+    return Recommendation(**{**data, "is_stale": is_stale})
+
+
+def _value(indicators: dict, name: str) -> str:
+    value = indicators.get(name)
+    return "N/A" if value is None else f"{value:.2f}"
+
+
+def _technical_summary(symbol: str) -> str:
+    """
+    Prompt lines with the latest daily indicators, or "" if the daily price
+    history is not already cached or stored (it is never downloaded here).
+    """
+    try:
+        latest = get_latest_indicators(symbol)
+    except Exception as e:
+        logger.warning(f"Technical indicators unavailable for {symbol}: {e}")
+        return ""
+    if not latest:
+        return ""
+    return f"""
+Technical Indicators (daily):
+RSI (14): {_value(latest, "rsi_14")}
+MACD (12, 26, 9): {_value(latest, "macd")} (signal {_value(latest, "macd_signal")}, histogram {_value(latest, "macd_hist")})
+SMA 20 / 50: ${_value(latest, "sma_20")} / ${_value(latest, "sma_50")}
+Bollinger Bands (20, 2): ${_value(latest, "bb_lower")} - ${_value(latest, "bb_upper")}
+ATR (14): ${_value(latest, "atr_14")}
+"""
+
+
+async def _generate_recommendation(symbol: str) -> dict:
+    """
+    Build a fresh recommendation from stock details and OpenAI analysis.
+    Returns it in its cached (JSON) form.
+    """
     try:
         stock_details = await get_stock_details(symbol)
     except ValueError as e:
@@ -89,6 +155,9 @@ async def get_recommendation(symbol: str) -> Recommendation:
         logger.error(f"Alpha Vantage API error for {symbol}: {str(e)}")
         raise Exception("Stock data unavailable - Alpha Vantage API error")
     
+    # Latest daily indicators from the cached or stored price history (omitted if neither has it)
+    technicals = _technical_summary(symbol)
+    
     # Build analysis prompt with key stock metrics
     prompt = f"""Analyze the following stock data for {stock_details.symbol} ({stock_details.name}):
 
@@ -98,8 +167,8 @@ Change: ${stock_details.change} ({stock_details.change_percent}%)
 Volume: {stock_details.volume if stock_details.volume else 'N/A'}
 Market Cap: ${stock_details.market_cap if stock_details.market_cap else 'N/A'}
 P/E Ratio: {stock_details.pe_ratio if stock_details.pe_ratio else 'N/A'}
-
-Consider the price movement, volume, and valuation metrics in your analysis."""
+{technicals}
+Consider the price movement, volume, valuation metrics and technical indicators in your analysis."""
 
     # Call AI service to analyze the stock
     logger.info(f"Calling OpenAI API to analyze {symbol}")
@@ -150,12 +219,6 @@ Consider the price movement, volume, and valuation metrics in your analysis."""
         is_stale=False  # Fresh recommendation
     )
     
-    # Cache the result for 15 minutes
-    _recommendation_cache.set(
-        symbol,
-        "recommendation",
-        recommendation.model_dump(mode='json')
-    )
-    
     logger.info(f"Successfully generated recommendation for {symbol}: {recommendation_type} (score: {score})")
-    return recommendation
+    # Cached for 15 minutes by the caller
+    return recommendation.model_dump(mode='json')
@@ -0,0 +1,185 @@
+"""
+OHLC resampling of base price series into larger bar sizes.
+
+Only two bar sizes are ever fetched upstream: 5-minute intraday and daily.
+Every other interval is aggregated from one of them:
+
+    15min, 30min, 1h  <- 5-minute intraday series
+    1wk, 1mo          <- daily series
+
+Bars are grouped by the bucket their timestamp falls in: open is the
+bucket's first open, close its last close, high/low its extremes and
+volume the bucket total.
+
+Aggregates are kept between requests and updated incrementally. When the
+base series gains bars (or its newest bar is revised), only the last
+aggregate bucket and anything after it is recomputed.
+"""
+
+from datetime import date
+from typing import Callable, Dict, List, Optional
+from app.services.price_series import PriceSeries
+
+SECONDS_PER_DAY = 86400
+
+# Intraday buckets are aligned to the 9:30 regular-session open, so hourly
+# bars run 9:30-10:30, 10:30-11:30, ...
+SESSION_OPEN_OFFSET = 9 * 3600 + 30 * 60
+
+# Base series each interval is built from; 5min and 1d are served as-is
+INTERVAL_BASES = {
+    "5min": "intraday",
+    "15min": "intraday",
+    "30min": "intraday",
+    "1h": "intraday",
+    "1d": "daily",
+    "1wk": "daily",
+    "1mo": "daily"
+}
+
+_INTRADAY_SECONDS = {"15min": 15 * 60, "30min": 30 * 60, "1h": 60 * 60}
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _intraday_bucket(seconds: int) -> Callable[[int], int]:
+    def bucket(ts: int) -> int:
+        return ts - (ts - SESSION_OPEN_OFFSET) % seconds
+    return bucket
+
+
+def _week_bucket(ts: int) -> int:
+    """Start of the Monday-based week containing ts (1970-01-01 was a Thursday)."""
+    day = ts // SECONDS_PER_DAY
+    return (day - (day + 3) % 7) * SECONDS_PER_DAY
+
+
+def _month_bucket(ts: int) -> int:
+    """Start of the calendar month containing ts."""
+    d = date.fromordinal(ts // SECONDS_PER_DAY + _EPOCH_ORDINAL)
+    return (d.replace(day=1).toordinal() - _EPOCH_ORDINAL) * SECONDS_PER_DAY
+
+
+def bucket_function(interval: str) -> Callable[[int], int]:
+    """Return the function mapping a bar timestamp to its bucket start for interval."""
+    if interval in _INTRADAY_SECONDS:
+        return _intraday_bucket(_INTRADAY_SECONDS[interval])
+    if interval == "1wk":
+        return _week_bucket
+    if interval == "1mo":
+        return _month_bucket
+    raise ValueError(f"Unsupported resampling interval '{interval}'")
+
+
+def _group_bounds(keys: List[int]) -> List[int]:
+    """Start index of each run of equal keys, plus the final end index."""
+    bounds = [0]
+    bounds.extend(i for i in range(1, len(keys)) if keys[i] != keys[i - 1])
+    bounds.append(len(keys))
+    return bounds
+
+
+def _aggregate(series: PriceSeries, bucket: Callable[[int], int], into: PriceSeries):
+    """Append one aggregated bar per bucket of series to into."""
+    if not len(series):
+        return
+    keys = list(map(bucket, series.timestamps))
+    bounds = _group_bounds(keys)
+    starts = bounds[:-1]
+    ends = bounds[1:]
+    o, h, l, c, v = series.open, series.high, series.low, series.close, series.volume
+
+    into.timestamps.extend(keys[s] for s in starts)
+    into.open.extend(o[s] for s in starts)
+    into.high.extend(max(h[s:e]) for s, e in zip(starts, ends))
+    into.low.extend(min(l[s:e]) for s, e in zip(starts, ends))
+    into.close.extend(c[e - 1] for e in ends)
+    into.volume.extend(sum(v[s:e]) for s, e in zip(starts, ends))
+
+
+def resample(series: PriceSeries, interval: str) -> PriceSeries:
+    """Aggregate series into interval bars."""
+    result = PriceSeries()
+    _aggregate(series, bucket_function(interval), result)
+    return result
+
+
+def _truncate(series: PriceSeries, length: int):
+    """Drop every bar from index length onwards, in place."""
+    for column in (series.timestamps, series.open, series.high, series.low, series.close, series.volume):
+        del column[length:]
+
+
+def update_resampled(base: PriceSeries, interval: str, previous: Optional[PriceSeries] = None) -> PriceSeries:
+    """
+    Bring an aggregate of base up to date.
+
+    previous is the aggregate built from an earlier version of base. Its
+    last bucket is dropped and rebuilt together with any newer bars, so an
+    update costs O(bars in the last bucket + new bars). If base no longer
+    starts in previous's first bucket (e.g. a rolling intraday window moved
+    on), the aggregate is rebuilt from scratch.
+    """
+    bucket = bucket_function(interval)
+    if (
+        previous is None
+        or not len(previous)
+        or not len(base)
+        or previous.timestamps[0] != bucket(base.timestamps[0])
+    ):
+        return resample(base, interval)
+
+    last_bucket = previous.timestamps[-1]
+    _truncate(previous, len(previous) - 1)
+    _aggregate(base.since(last_bucket), bucket, previous)
+    return previous
+
+
+class ResampleCache:
+    """
+    Incrementally maintained aggregates per (symbol, interval).
+
+    Each entry remembers the base series it was built from, so repeated
+    requests against an unchanged base are free, and a refreshed base only
+    recomputes its tail.
+    """
+
+    def __init__(self, max_entries: int = 2_000):
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, tuple] = {}
+        self.full_builds = 0
+        self.incremental_updates = 0
+
+    def get(self, symbol: str, interval: str, base: PriceSeries) -> PriceSeries:
+        """Return interval bars for symbol aggregated from base."""
+        key = (symbol, interval)
+        entry = self._entries.get(key)
+        if entry is not None:
+            built_from, aggregate = entry
+            if built_from is base:
+                return aggregate
+            if base.last_timestamp < built_from.last_timestamp:
+                # Base went backwards (e.g. replaced by a shorter fetch)
+                aggregate = None
+        else:
+            aggregate = None
+
+        if aggregate is None:
+            self.full_builds += 1
+        else:
+            self.incremental_updates += 1
+        aggregate = update_resampled(base, interval, aggregate)
+
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Drop the oldest entry (dicts keep insertion order)
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (base, aggregate)
+        return aggregate
+
+    def stats(self) -> dict:
+        """Return entry count and build counters."""
+        return {
+            "entries": len(self._entries),
+            "full_builds": self.full_builds,
+            "incremental_updates": self.incremental_updates
+        }
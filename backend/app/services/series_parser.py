@@ -0,0 +1,69 @@
+"""
+Fast parser for Alpha Vantage time series payloads.
+
+Turns the "Time Series (Daily)" / "Time Series (5min)" dicts straight into
+PriceSeries columns. Each column is built with one map() over the payload
+values and date keys use fixed-format ISO parsing, so there is no per-row
+strptime, Decimal or pydantic model construction.
+"""
+
+from array import array
+from datetime import date, datetime
+from operator import itemgetter
+from typing import Dict
+from app.services.price_series import PriceSeries
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SECONDS_PER_DAY = 86400
+
+_open = itemgetter("1. open")
+_high = itemgetter("2. high")
+_low = itemgetter("3. low")
+_close = itemgetter("4. close")
+_volume = itemgetter("5. volume")
+
+
+def _daily_timestamp(key: str) -> int:
+    """Epoch seconds for a "YYYY-MM-DD" key."""
+    return (date.fromisoformat(key).toordinal() - _EPOCH_ORDINAL) * _SECONDS_PER_DAY
+
+
+def _intraday_timestamp(key: str) -> int:
+    """Epoch seconds for a "YYYY-MM-DD HH:MM:SS" key."""
+    dt = datetime.fromisoformat(key)
+    return (
+        (dt.toordinal() - _EPOCH_ORDINAL) * _SECONDS_PER_DAY
+        + dt.hour * 3600 + dt.minute * 60 + dt.second
+    )
+
+
+def parse_time_series(time_series: Dict[str, Dict[str, str]], intraday: bool = False) -> PriceSeries:
+    """
+    Parse an Alpha Vantage time series dict into a PriceSeries sorted ascending.
+
+    Alpha Vantage returns bars newest first, so the columns are normally just
+    reversed; a full sort is only done if the keys arrive out of order.
+    """
+    keys = list(time_series)
+    if not keys:
+        return PriceSeries()
+    values = list(time_series.values())
+
+    # ISO date strings sort the same way as the dates they represent
+    if keys[0] > keys[-1]:
+        keys.reverse()
+        values.reverse()
+    if any(a >= b for a, b in zip(keys, keys[1:])):
+        pairs = sorted(zip(keys, values), key=itemgetter(0))
+        keys = [k for k, _ in pairs]
+        values = [v for _, v in pairs]
+
+    to_ts = _intraday_timestamp if intraday else _daily_timestamp
+    return PriceSeries(
+        array("q", map(to_ts, keys)),
+        array("d", map(float, map(_open, values))),
+        array("d", map(float, map(_high, values))),
+        array("d", map(float, map(_low, values))),
+        array("d", map(float, map(_close, values))),
+        array("q", map(int, map(_volume, values)))
+    )
@@ -1,429 +1,648 @@
 """Stock service for fetching real-time and historical market data."""
 
-import httpx
+import asyncio
 import logging
-from decimal import Decimal
-from datetime import datetime, timedelta, time
-from typing import List, Optional, Dict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, List, Optional, Dict, Tuple
 from app.config import settings
-from app.schemas.stock import StockQuote, StockDetails, StockSearchResult, HistoricalPrice, MarketStatus
-import pytz
+from app.schemas.stock import StockQuote, StockDetails, StockSearchResult, HistoricalPrice, IndicatorSeries
+from app.services.downsampling import downsample
+from app.services.hot_symbols import HotSymbolTracker
+from app.services.indicators import GROUPS, IndicatorCache, to_json_values
+from app.services.intraday_series import IntradaySeriesManager
+from app.services.market_data_provider import get_market_data_provider
+from app.services.ohlcv_store import get_ohlcv_store
+from app.services.price_series import PriceSeries, from_timestamp, to_timestamp
+from app.services.resampling import INTERVAL_BASES, ResampleCache
+from app.services.symbol_index import get_symbol_index
+from app.services.trading_calendar import get_market_status
+from app.services.upstream_scheduler import Priority
+from app.utils.cache import CacheEngine, RegionConfig
+from app.utils.cache_backend import CacheBackend, get_cache_backend
+from app.utils.exceptions import UpstreamNotFoundError, UpstreamUnavailableError
+from app.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+
+# Cache region remembering "not found" / "no data" outcomes
+NEGATIVE_REGION = "missing"
+
+# Maximum symbols per bulk quote request (REALTIME_BULK_QUOTES allows 100)
+BULK_QUOTE_CHUNK_SIZE = 100
+
+# Oldest stored bar that compact output (last 100 trading days) can still extend
+COMPACT_MAX_GAP = timedelta(days=120)
+
+# Oldest intraday bar a compact refresh (last 100 bars) is tried for; covers weekends and holidays
+INTRADAY_COMPACT_MAX_GAP = timedelta(days=4)
+
+# Days of history per chart period (5d uses ~2 weeks to ensure 5 trading days)
+PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 10,
+    "1mo": 30,
+    "3mo": 90,
+    "1y": 365,
+    "5y": 1825
+}
+
 
 class StockCache:
     """
-    In-memory cache for stock data to reduce API calls.
+    Bounded in-memory cache for stock data to reduce API calls.
     
     Cache TTL by data type:
     - quote: 1 minute (real-time data needs frequent updates)
-    - details: 5 minutes (fundamentals change less frequently)
-    - historical: 1 hour (historical data is static)
+    - overview: 24 hours (company fundamentals change at most daily)
+    - intraday: 1 minute (rolling 5-minute series, refreshed with compact output)
+    - historical: 1 hour (daily series per symbol)
+    - chart: 5 minutes (downsampled series per symbol, period and point budget)
     - search: 10 minutes (search results are relatively stable)
+    
+    Each data type has its own entry and byte budget with LRU eviction, and
+    expired entries are swept in the background.
+    
+    Quotes and overviews use stale-while-revalidate: within the stale window an
+    expired entry is returned at once (its last_update shows the data's age)
+    and a single background refresh per key replaces it.
+    
+    Expired entries are kept for UPSTREAM_FALLBACK_WINDOW longer and served
+    if a refetch fails because the upstream is unavailable (circuit open,
+    timeout, rate limit), so a slow or down upstream degrades to old data
+    instead of errors.
+    
+    Keys the API has no data for (unknown symbols, empty searches) are
+    negative-cached for NEGATIVE_CACHE_TTL, so repeated bad lookups do not
+    cost an upstream call each. Rate-limit notices are never cached.
+    
+    Cache misses go through a single-flight layer per data type, so concurrent
+    misses for the same key share one upstream fetch. With a shared cache
+    backend (CACHE_BACKEND), misses also check the tier shared by all
+    workers and only one worker fetches each key.
+    
+    Listeners (add_listener) see every newly fetched value, so derived data
+    such as portfolio snapshots can follow quote updates.
     """
     
-    def __init__(self):
-        self.cache: Dict[str, Dict] = {}
-        self.ttl = {
-            "quote": timedelta(minutes=1),
-            "details": timedelta(minutes=5),
-            "historical": timedelta(hours=1),
-            "search": timedelta(minutes=10)
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        fallback = settings.UPSTREAM_FALLBACK_WINDOW
+        self.engine = CacheEngine({
+            "quote": RegionConfig(
+                ttl=60, max_entries=10_000, max_bytes=16 * MB,
+                stale_ttl=settings.QUOTE_STALE_WINDOW, fallback_ttl=fallback
+            ),
+            "overview": RegionConfig(
+                ttl=24 * 60 * 60, max_entries=5_000, max_bytes=16 * MB,
+                stale_ttl=settings.OVERVIEW_STALE_WINDOW, fallback_ttl=fallback
+            ),
+            "intraday": RegionConfig(
+                ttl=settings.INTRADAY_REFRESH_INTERVAL, max_entries=500, max_bytes=64 * MB, fallback_ttl=fallback
+            ),
+            "historical": RegionConfig(ttl=60 * 60, max_entries=500, max_bytes=128 * MB, fallback_ttl=fallback),
+            "chart": RegionConfig(ttl=5 * 60, max_entries=2_000, max_bytes=32 * MB, fallback_ttl=fallback),
+            "search": RegionConfig(ttl=10 * 60, max_entries=5_000, max_bytes=8 * MB, fallback_ttl=fallback),
+            NEGATIVE_REGION: RegionConfig(ttl=settings.NEGATIVE_CACHE_TTL, max_entries=20_000, max_bytes=4 * MB)
+        })
+        self.flights = {
+            data_type: SingleFlight() for data_type in self.engine.regions if data_type != NEGATIVE_REGION
         }
-    
-    def get(self, key: str, data_type: str) -> Optional[dict]:
+        self.backend = get_cache_backend() if backend is None else backend
+        self.fallbacks = 0
+        self._listeners: Dict[str, List[Callable[[str, Any], None]]] = {}
+    
+    def add_listener(self, data_type: str, listener: Callable[[str, Any], None]):
+        """Call listener(key, value) whenever a fetch stores a new value for data_type."""
+        self._listeners.setdefault(data_type, []).append(listener)
+    
+    def _notify(self, key: str, data_type: str, value: Any):
+        for listener in self._listeners.get(data_type, ()):
+            try:
+                listener(key, value)
+            except Exception as e:
+                logger.warning(f"Cache listener failed for {data_type}:{key}: {e}")
+    
+    def get(self, key: str, data_type: str) -> Optional[Any]:
         """Retrieve cached data if not expired."""
-        cache_key = f"{data_type}:{key}"
-        if cache_key in self.cache:
-            cached_data = self.cache[cache_key]
-            if datetime.utcnow() < cached_data["expires_at"]:
-                return cached_data["data"]
-            else:
-                del self.cache[cache_key]
-        return None
-    
-    def set(self, key: str, data_type: str, data: dict):
+        return self.engine.get(data_type, key)
+    
+    def set(self, key: str, data_type: str, data: Any):
         """Store data in cache with TTL."""
-        cache_key = f"{data_type}:{key}"
-        self.cache[cache_key] = {
-            "data": data,
-            "expires_at": datetime.utcnow() + self.ttl[data_type]
+        self.engine.set(data_type, key, data)
+    
+    def _loader(self, key: str, data_type: str, fetch: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """
+        Wrap fetch so its result is stored in the cache (and shared tier) when it succeeds.
+        A not-found result is remembered in the negative region and replayed
+        without calling fetch until it expires.
+        """
+        region = self.engine.region(data_type)
+        negative_key = f"{data_type}:{key}"
+        
+        async def load():
+            message = self.engine.get(NEGATIVE_REGION, negative_key)
+            if message is not None:
+                raise UpstreamNotFoundError(message)
+            try:
+                value = await self.backend.load(region, key, fetch)
+            except UpstreamNotFoundError as e:
+                self.engine.set(NEGATIVE_REGION, negative_key, str(e))
+                raise
+            self._notify(key, data_type, value)
+            return value
+        return load
+    
+    def lookup(self, key: str, data_type: str, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        """
+        Return cached data without waiting, or None on a miss.
+        Stale entries (past TTL but inside the region's stale window) are
+        returned immediately and refreshed in the background with fetch.
+        """
+        entry = self.engine.get_entry(data_type, key)
+        if entry is None:
+            return None
+        if not entry.is_fresh():
+            self._revalidate(key, data_type, self._loader(key, data_type, fetch))
+        return entry.value
+    
+    def fetch_task(self, key: str, data_type: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start the single-flight fetch for key, or join the one already running."""
+        return self.flights[data_type].start(key, self._loader(key, data_type, fetch))
+    
+    async def get_or_fetch(self, key: str, data_type: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return cached data, or fetch it with at most one upstream call per key.
+        
+        Only successful results are cached. If the fetch raises, every waiter
+        receives the same exception and the next request will try again.
+        """
+        cached = self.lookup(key, data_type, fetch)
+        if cached is not None:
+            return cached
+        try:
+            return await asyncio.shield(self.fetch_task(key, data_type, fetch))
+        except UpstreamUnavailableError as e:
+            return self.fallback(key, data_type, e)
+    
+    def fallback(self, key: str, data_type: str, error: Exception) -> Any:
+        """Return the newest retained value for key after an upstream failure, or re-raise error."""
+        entry = self.engine.fallback(data_type, key)
+        if entry is None:
+            raise error
+        self.fallbacks += 1
+        logger.warning(f"Serving {data_type}:{key} from {entry.age():.0f}s ago: {error}")
+        return entry.value
+    
+    def _revalidate(self, key: str, data_type: str, load: Callable[[], Awaitable[Any]]):
+        """Start a background refresh for key unless one is already running."""
+        flight = self.flights[data_type]
+        if flight.in_flight(key):
+            return
+        
+        def log_failure(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Background refresh failed for {data_type}:{key}: {task.exception()}")
+        
+        flight.start(key, load).add_done_callback(log_failure)
+    
+    def stats(self) -> dict:
+        """Return cache and single-flight statistics per data type."""
+        cache_stats = self.engine.stats()
+        return {
+            **{
+                data_type: {**cache_stats[data_type], **flight.stats()}
+                for data_type, flight in self.flights.items()
+            },
+            # hits here are upstream calls saved on known-bad keys
+            "negative": cache_stats[NEGATIVE_REGION],
+            "fallbacks": self.fallbacks
         }
 
 
 # Global cache instance
 _cache = StockCache()
 
+# Symbols users have recently requested quotes for (kept warm by the quote refresher)
+_hot_symbols = HotSymbolTracker(settings.HOT_SYMBOL_WINDOW)
 
-async def get_stock_quote(symbol: str) -> StockQuote:
+# Incrementally maintained 15min/30min/1h/1wk/1mo aggregates
+_resampled = ResampleCache()
+
+# Technical indicators per symbol and interval, extended as bars arrive
+_indicators = IndicatorCache()
+
+# Working 5-minute series per symbol, merged with compact refreshes
+_intraday = IntradaySeriesManager(
+    settings.INTRADAY_WINDOW_DAYS * 86400,
+    INTRADAY_COMPACT_MAX_GAP.total_seconds()
+)
+
+
+def get_stock_cache() -> StockCache:
+    """Get the global stock cache instance."""
+    return _cache
+
+
+def get_hot_symbols() -> HotSymbolTracker:
+    """Get the tracker of recently requested quote symbols."""
+    return _hot_symbols
+
+
+def get_cache_stats() -> dict:
+    """Get stock cache statistics for the metrics endpoint."""
+    return {
+        **_cache.stats(),
+        "intraday_series": _intraday.stats(),
+        "resampled": _resampled.stats(),
+        "indicators": _indicators.stats()
+    }
+
+
+async def _fetch_quote(symbol: str, priority: Priority) -> dict:
+    """Fetch a quote from the market data provider in cacheable form."""
+    return await get_market_data_provider().quote(symbol, priority)
+
+
+async def get_stock_quote(symbol: str, priority: Priority = Priority.INTERACTIVE) -> StockQuote:
     """
-    Fetch current stock quote using Alpha Vantage GLOBAL_QUOTE endpoint.
+    Fetch current stock quote from the market data provider.
     Returns real-time price, change, and change percent.
     """
-    cached = _cache.get(symbol, "quote")
-    if cached:
-        return StockQuote(**cached)
-    
-    url = "https://www.alphavantage.co/query"
-    params = {
-        "function": "GLOBAL_QUOTE",
-        "symbol": symbol,
-        "apikey": settings.ALPHA_VANTAGE_API_KEY
-    }
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params, timeout=10.0)
-        response.raise_for_status()
-        data = response.json()
-    
-    if "Global Quote" not in data or not data["Global Quote"]:
-        logger.warning(f"No Global Quote data for '{symbol}': {data}")
-        raise ValueError(f"Stock symbol '{symbol}' not found")
+    _hot_symbols.touch([symbol])
+    data = await _cache.get_or_fetch(symbol, "quote", lambda: _fetch_quote(symbol, priority))
+    return StockQuote(**data)
+
+
+async def _fetch_bulk_chunk(symbols: List[str], priority: Priority) -> Dict[str, dict]:
+    """Fetch up to BULK_QUOTE_CHUNK_SIZE quotes with one provider call."""
+    return await get_market_data_provider().quotes(symbols, priority)
+
+
+async def _fetch_quotes_bulk(symbols: List[str], priority: Priority) -> List[Any]:
+    """
+    Fetch quotes in chunks through the bulk endpoint.
+    Each symbol still gets its own single-flight task (backed by its chunk's
+    request), so concurrent single-quote lookups join the same fetch.
+    """
+    flight = _cache.flights["quote"]
+    tasks: Dict[str, asyncio.Task] = {}
+    to_fetch = []
+    for symbol in symbols:
+        if flight.in_flight(symbol):
+            tasks[symbol] = _cache.fetch_task(symbol, "quote", lambda s=symbol: _fetch_quote(s, priority))
+        else:
+            to_fetch.append(symbol)
+    
+    for i in range(0, len(to_fetch), BULK_QUOTE_CHUNK_SIZE):
+        chunk = to_fetch[i:i + BULK_QUOTE_CHUNK_SIZE]
+        bulk = asyncio.ensure_future(_fetch_bulk_chunk(chunk, priority))
+        
+        for symbol in chunk:
+            async def pick(symbol=symbol, bulk=bulk) -> dict:
+                rows = await asyncio.shield(bulk)
+                if symbol not in rows:
+                    raise UpstreamNotFoundError(f"Stock symbol '{symbol}' not found")
+                return rows[symbol]
+            tasks[symbol] = _cache.fetch_task(symbol, "quote", pick)
+    
+    return await asyncio.gather(*[asyncio.shield(tasks[s]) for s in symbols], return_exceptions=True)
+
+
+async def _fetch_quotes_fan_out(symbols: List[str], priority: Priority) -> List[Any]:
+    """Fetch quotes one symbol at a time with bounded concurrency."""
+    semaphore = asyncio.Semaphore(settings.BATCH_QUOTE_CONCURRENCY)
     
-    quote_data = data["Global Quote"]
+    async def fetch_one(symbol: str) -> dict:
+        async with semaphore:
+            return await asyncio.shield(_cache.fetch_task(symbol, "quote", lambda: _fetch_quote(symbol, priority)))
     
-    current_price = Decimal(quote_data.get("05. price", "0"))
-    change = Decimal(quote_data.get("09. change", "0"))
-    change_percent_str = quote_data.get("10. change percent", "0%").rstrip("%")
-    change_percent = Decimal(change_percent_str)
+    return await asyncio.gather(*[fetch_one(s) for s in symbols], return_exceptions=True)
+
+
+async def _fetch_quotes(symbols: List[str], priority: Priority) -> List[Any]:
+    """Fetch quotes for symbols regardless of what is cached, storing the results."""
+    if get_market_data_provider().supports_bulk_quotes:
+        return await _fetch_quotes_bulk(symbols, priority)
+    return await _fetch_quotes_fan_out(symbols, priority)
+
+
+async def refresh_stock_quotes(symbols: List[str], priority: Priority = Priority.BACKGROUND) -> Tuple[int, int]:
+    """
+    Re-fetch quotes for symbols and write them into the quote cache, even if
+    the cached copies are still fresh. Returns (refreshed, failed) counts.
+    """
+    results = await _fetch_quotes(symbols, priority)
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    return len(results) - failed, failed
+
+
+async def get_stock_quotes(
+    symbols: List[str],
+    priority: Priority = Priority.INTERACTIVE
+) -> Tuple[Dict[str, StockQuote], Dict[str, str]]:
+    """
+    Fetch quotes for many symbols at once.
     
-    quote = StockQuote(
-        symbol=symbol.upper(),
-        current_price=current_price,
-        change=change,
-        change_percent=change_percent,
-        last_update=datetime.utcnow()
-    )
+    Cache hits are served directly. Misses are fetched together, through the
+    provider's bulk quote call when it has one (ALPHA_VANTAGE_BULK_QUOTES), otherwise
+    by bounded-concurrency fan-out of single quote calls.
     
-    _cache.set(symbol, "quote", quote.model_dump())
-    return quote
+    Returns (quotes, errors): quotes by symbol, and an error message for
+    each symbol that could not be fetched.
+    """
+    quotes: Dict[str, StockQuote] = {}
+    errors: Dict[str, str] = {}
+    misses = []
+    
+    unique = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    _hot_symbols.touch(unique)
+    for symbol in unique:
+        cached = _cache.lookup(symbol, "quote", lambda s=symbol: _fetch_quote(s, priority))
+        if cached is not None:
+            quotes[symbol] = StockQuote(**cached)
+        else:
+            misses.append(symbol)
+    
+    if not misses:
+        return quotes, errors
+    
+    results = await _fetch_quotes(misses, priority)
+    for symbol, result in zip(misses, results):
+        if isinstance(result, UpstreamUnavailableError):
+            try:
+                result = _cache.fallback(symbol, "quote", result)
+            except UpstreamUnavailableError:
+                pass
+        if isinstance(result, ValueError):
+            errors[symbol] = str(result)
+        elif isinstance(result, Exception):
+            logger.warning(f"Failed to fetch quote for {symbol}: {result}")
+            errors[symbol] = "Failed to fetch data from stock API"
+        else:
+            quotes[symbol] = StockQuote(**result)
+    
+    return quotes, errors
+
+
+async def _fetch_overview(symbol: str) -> dict:
+    """Fetch company fundamentals from the market data provider in cacheable form."""
+    return await get_market_data_provider().overview(symbol)
 
 
 async def get_stock_details(symbol: str) -> StockDetails:
     """
     Fetch detailed stock information including fundamentals.
-    Combines GLOBAL_QUOTE and OVERVIEW endpoints for complete data.
-    """
-    # Check cache first to avoid unnecessary API calls
-    cached = _cache.get(symbol, "details")
-    if cached:
-        return StockDetails(**cached)
-    
-    url = "https://www.alphavantage.co/query"
-    
-    # Prepare parameters for GLOBAL_QUOTE endpoint (real-time price data)
-    quote_params = {
-        "function": "GLOBAL_QUOTE",
-        "symbol": symbol,
-        "apikey": settings.ALPHA_VANTAGE_API_KEY
-    }
-    
-    # Prepare parameters for OVERVIEW endpoint (company fundamentals)
-    overview_params = {
-        "function": "OVERVIEW",
-        "symbol": symbol,
-        "apikey": settings.ALPHA_VANTAGE_API_KEY
-    }
     
-    # Make both API calls concurrently for better performance
-    async with httpx.AsyncClient() as client:
-        quote_response = await client.get(url, params=quote_params, timeout=10.0)
-        overview_response = await client.get(url, params=overview_params, timeout=10.0)
-        
-        quote_response.raise_for_status()
-        overview_response.raise_for_status()
-        
-        quote_data = quote_response.json()
-        overview_data = overview_response.json()
-    
-    # Validate that we received quote data
-    if "Global Quote" not in quote_data or not quote_data["Global Quote"]:
-        logger.warning(f"No Global Quote data for '{symbol}': {quote_data}")
-        raise ValueError(f"Stock symbol '{symbol}' not found")
-    
-    quote = quote_data["Global Quote"]
+    Built from two independently cached parts fetched concurrently:
+    - price data from the quote cache (1 minute)
+    - fundamentals from the overview cache (24 hours)
+    Only the parts that are missing from the cache are fetched.
+    """
+    quote, overview = await asyncio.gather(
+        get_stock_quote(symbol, Priority.INTERACTIVE),
+        _cache.get_or_fetch(symbol, "overview", lambda: _fetch_overview(symbol))
+    )
     
-    # Extract price data from quote response
-    # Alpha Vantage uses numbered keys like "05. price", "08. previous close"
-    current_price = Decimal(quote.get("05. price", "0"))
-    previous_close = Decimal(quote.get("08. previous close", "0"))
-    change = Decimal(quote.get("09. change", "0"))
-    # Remove the "%" suffix from change percent string
-    change_percent_str = quote.get("10. change percent", "0%").rstrip("%")
-    change_percent = Decimal(change_percent_str)
+    # Fall back to deriving previous close when the quote source omits it
+    previous_close = quote.previous_close
+    if previous_close is None:
+        previous_close = quote.current_price - quote.change
     
     # Get current market status (open/closed/pre-market/after-hours)
     market_status_info = get_market_status()
     
-    # Build the complete StockDetails object
-    details = StockDetails(
+    return StockDetails(
         symbol=symbol.upper(),
-        name=overview_data.get("Name", symbol.upper()),
-        current_price=current_price,
+        name=overview["name"],
+        current_price=quote.current_price,
         previous_close=previous_close,
-        change=change,
-        change_percent=change_percent,
-        last_update=datetime.utcnow(),
+        change=quote.change,
+        change_percent=quote.change_percent,
+        last_update=quote.last_update,
         market_status=market_status_info.status,
-        volume=quote.get("06. volume"),
-        day_high=quote.get("03. high"),
-        day_low=quote.get("04. low"),
-        market_cap=overview_data.get("MarketCapitalization"),
-        pe_ratio=overview_data.get("PERatio"),
-        dividend_yield=overview_data.get("DividendYield")
+        volume=quote.volume,
+        day_high=quote.day_high,
+        day_low=quote.day_low,
+        market_cap=overview["market_cap"],
+        pe_ratio=overview["pe_ratio"],
+        dividend_yield=overview["dividend_yield"]
     )
-    
-    # Cache the result for 5 minutes to reduce API calls
-    _cache.set(symbol, "details", details.model_dump())
-    return details
+
+
+async def _fetch_search(query: str) -> list:
+    """Fetch all provider search matches for a query in cacheable form."""
+    results = await get_market_data_provider().search(query)
+    if not results:
+        logger.warning(f"No search matches for '{query}'")
+        raise UpstreamNotFoundError(f"No matches for '{query}'")
+    return results
 
 
 async def search_stocks(query: str, limit: int = 10) -> List[StockSearchResult]:
     """
-    Search for stocks by symbol or company name using Alpha Vantage SYMBOL_SEARCH.
-    Returns list of matching stocks with basic information.
-    """
-    cached = _cache.get(query, "search")
-    if cached:
-        return [StockSearchResult(**item) for item in cached[:limit]]
-    
-    url = "https://www.alphavantage.co/query"
-    params = {
-        "function": "SYMBOL_SEARCH",
-        "keywords": query,
-        "apikey": settings.ALPHA_VANTAGE_API_KEY
-    }
+    Search for stocks by symbol or company name.
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params, timeout=10.0)
-        response.raise_for_status()
-        data = response.json()
+    Answered from the local symbol index when it has matches; other queries
+    (or all of them, until the index has loaded) fall back to the market
+    data provider's search. Returns list of matching stocks with basic information.
+    """
+    local = get_symbol_index().search(query, limit)
+    if local:
+        return local
     
-    if "bestMatches" not in data:
-        logger.warning(f"No bestMatches in search response for '{query}': {data}")
+    try:
+        cached = await _cache.get_or_fetch(query, "search", lambda: _fetch_search(query))
+    except ValueError:
         return []
+    return [StockSearchResult(**item) for item in cached[:limit]]
+
+
+async def _fetch_intraday_series(symbol: str) -> PriceSeries:
+    """
+    Refresh the rolling 5-minute series for a symbol.
     
-    if not data["bestMatches"]:
-        logger.warning(f"Empty bestMatches for '{query}'")
-        return []
+    The full series is downloaded once; after that only the last 100 bars
+    are fetched and merged in (see app.services.intraday_series). A series
+    still held by the cache (e.g. restored from a snapshot) seeds the
+    manager, so a restart does not cost a full download either.
+    """
+    if not _intraday.has(symbol):
+        entry = _cache.engine.fallback("intraday", f"intraday:{symbol}")
+        if entry is not None:
+            _intraday.seed(symbol, entry.value)
     
-    results = []
-    for match in data["bestMatches"][:limit]:
-        result = StockSearchResult(
-            symbol=match.get("1. symbol", ""),
-            name=match.get("2. name", ""),
-            type=match.get("3. type", ""),
-            region=match.get("4. region", "")
-        )
-        results.append(result)
-    
-    _cache.set(query, "search", [r.model_dump() for r in results])
-    return results
+    async def fetch(compact: bool) -> PriceSeries:
+        return await get_market_data_provider().intraday_series(symbol, compact)
+    
+    return await _intraday.refresh(symbol, fetch)
 
 
-async def get_historical_data(symbol: str, period: str = "1mo") -> List[HistoricalPrice]:
+async def _fetch_daily_series(symbol: str) -> PriceSeries:
     """
-    Fetch historical price data for charting using Alpha Vantage.
+    Fetch the daily series for a symbol, reading through the on-disk store.
     
-    Supported periods:
-    - 1d: 1 day (intraday data)
-    - 5d: 5 days
-    - 1mo: 1 month
-    - 3mo: 3 months
-    - 1y: 1 year
-    - 5y: 5 years
+    One full history serves every daily period, so switching chart ranges
+    never triggers another upstream call. With the store enabled, only bars
+    newer than the last stored date are downloaded (using compact output
+    when the gap fits in it) and appended, and the result is served from
+    the memory-mapped file.
+    """
+    store = get_ohlcv_store()
+    if store is None:
+        return await get_market_data_provider().daily_series(symbol)
+    
+    stored = store.read(symbol)
+    has_history = stored is not None and len(stored) > 0
+    compact = False
+    if has_history:
+        gap = datetime.utcnow() - from_timestamp(stored.last_timestamp)
+        compact = gap < COMPACT_MAX_GAP
+    
+    try:
+        fresh = await get_market_data_provider().daily_series(symbol, compact)
+    except Exception as e:
+        if has_history:
+            logger.warning(f"Serving stored history for {symbol} after refresh failed: {e}")
+            return stored
+        raise
+    
+    await asyncio.to_thread(store.append, symbol, fresh)
+    return store.read(symbol) or fresh
+
+
+async def _get_base_series(symbol: str, base: str) -> PriceSeries:
+    """Get the cached 5-minute ("intraday") or daily ("daily") series for a symbol."""
+    if base == "intraday":
+        return await _cache.get_or_fetch(f"intraday:{symbol}", "intraday", lambda: _fetch_intraday_series(symbol))
+    return await _cache.get_or_fetch(f"daily:{symbol}", "historical", lambda: _fetch_daily_series(symbol))
+
+
+def default_interval(period: str) -> str:
+    """Bar size used when a request does not ask for one (5min for 1d, daily otherwise)."""
+    return "5min" if period == "1d" else "1d"
+
+
+async def get_price_series(symbol: str, period: str = "1mo", interval: Optional[str] = None) -> PriceSeries:
+    """
+    Get the bars for a period as a columnar series.
     
-    Returns OHLCV data points for the requested period.
+    Each symbol has one canonical cached series per fetched bar size
+    (5-minute intraday and daily); other intervals are resampled from them,
+    so no interval costs an extra upstream call. Periods are served as
+    binary-searched slices.
     """
-    cache_key = f"{symbol}:{period}"
-    cached = _cache.get(cache_key, "historical")
-    if cached:
-        return [HistoricalPrice(**item) for item in cached]
-    
-    url = "https://www.alphavantage.co/query"
-    
-    # For 1 day, use intraday data
-    if period == "1d":
-        params = {
-            "function": "TIME_SERIES_INTRADAY",
-            "symbol": symbol,
-            "interval": "5min",
-            "outputsize": "full",
-            "apikey": settings.ALPHA_VANTAGE_API_KEY
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-        
-        time_series_key = "Time Series (5min)"
-        if time_series_key not in data:
-            raise ValueError(f"No intraday data found for symbol '{symbol}'")
-        
-        time_series = data[time_series_key]
-        
-        # Get last trading day's data
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=1)
-        
-        historical_data = []
-        for datetime_str, values in time_series.items():
-            dt = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S")
-            
-            if dt < start_date:
-                continue
-            
-            price_point = HistoricalPrice(
-                date=dt,
-                open=Decimal(values["1. open"]),
-                high=Decimal(values["2. high"]),
-                low=Decimal(values["3. low"]),
-                close=Decimal(values["4. close"]),
-                volume=int(values["5. volume"])
-            )
-            historical_data.append(price_point)
-        
-        historical_data.sort(key=lambda x: x.date)
-        _cache.set(cache_key, "historical", [h.model_dump() for h in historical_data])
-        return historical_data
-    
-    # For other periods, use daily data
-    outputsize = "full" if period in ["1y", "5y"] else "compact"
-    
-    params = {
-        "function": "TIME_SERIES_DAILY",
-        "symbol": symbol,
-        "outputsize": outputsize,
-        "apikey": settings.ALPHA_VANTAGE_API_KEY
-    }
+    interval = interval or default_interval(period)
+    series = await _get_interval_series(symbol, interval)
+    return series.since(_period_start(period))
+
+
+async def _get_interval_series(symbol: str, interval: str) -> PriceSeries:
+    """Get every cached bar of a symbol at interval, resampling the base series if needed."""
+    series = await _get_base_series(symbol, INTERVAL_BASES[interval])
+    if interval not in ("5min", "1d"):
+        series = _resampled.get(symbol, interval, series)
+    return series
+
+
+def _period_start(period: str) -> int:
+    """Timestamp a period starts at (daily periods add extra days to account for weekends)."""
+    start_date = datetime.utcnow() - timedelta(days=PERIOD_DAYS.get(period, 30))
+    return to_timestamp(start_date)
+
+
+async def get_indicators(
+    symbol: str,
+    period: str = "1mo",
+    interval: Optional[str] = None,
+    groups: Optional[List[str]] = None
+) -> IndicatorSeries:
+    """
+    Get technical indicators for the bars of a period.
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params, timeout=10.0)
-        response.raise_for_status()
-        data = response.json()
-    
-    # Log the response to debug API issues
-    if "Time Series (Daily)" not in data:
-        logger.warning(f"Alpha Vantage response for {symbol}: {data}")
-        raise ValueError(f"No historical data found for symbol '{symbol}'")
-    
-    time_series = data["Time Series (Daily)"]
-    
-    # Calculate date range based on period (add extra days to account for weekends)
-    end_date = datetime.utcnow()
-    if period == "5d":
-        start_date = end_date - timedelta(days=10)  # ~2 weeks to ensure 5 trading days
-    elif period == "1mo":
-        start_date = end_date - timedelta(days=30)
-    elif period == "3mo":
-        start_date = end_date - timedelta(days=90)
-    elif period == "1y":
-        start_date = end_date - timedelta(days=365)
-    elif period == "5y":
-        start_date = end_date - timedelta(days=1825)
-    else:
-        start_date = end_date - timedelta(days=30)
+    Indicators are computed over the symbol's whole cached series, so the
+    moving averages are already warmed up at the start of the period, and
+    are kept per series version: a refreshed series only computes its new
+    bars (see app.services.indicators).
     
-    historical_data = []
-    for date_str, values in time_series.items():
-        date = datetime.strptime(date_str, "%Y-%m-%d")
-        
-        if date < start_date:
-            continue
-        
-        price_point = HistoricalPrice(
-            date=date,
-            open=Decimal(values["1. open"]),
-            high=Decimal(values["2. high"]),
-            low=Decimal(values["3. low"]),
-            close=Decimal(values["4. close"]),
-            volume=int(values["5. volume"])
-        )
-        historical_data.append(price_point)
+    groups selects indicator groups (sma, ema, rsi, macd, bollinger, atr,
+    vwap); all of them by default.
+    """
+    interval = interval or default_interval(period)
+    series = await _get_interval_series(symbol, interval)
+    outputs = _indicators.get(symbol, interval, series)
+    start = series.index_at_or_after(_period_start(period))
+    names = [name for group in (groups or GROUPS) for name in GROUPS[group]]
+    return IndicatorSeries(
+        symbol=symbol.upper(),
+        interval=interval,
+        timestamps=[from_timestamp(ts) for ts in series.timestamps[start:]],
+        values={name: to_json_values(outputs[name][start:]) for name in names}
+    )
+
+
+def _local_daily_series(symbol: str) -> Optional[PriceSeries]:
+    """The daily series already held in the cache or the on-disk store, without fetching it."""
+    entry = _cache.engine.fallback("historical", f"daily:{symbol}")
+    if entry is not None:
+        return entry.value
+    store = get_ohlcv_store()
+    return store.read(symbol) if store is not None else None
+
+
+def get_latest_indicators(symbol: str) -> Dict[str, Optional[float]]:
+    """
+    Latest daily value of every indicator (None while there is not enough
+    history). Only uses a daily series that is already cached or stored, so
+    it never starts a full history download; returns {} if there is none.
+    """
+    series = _local_daily_series(symbol)
+    if series is None or not len(series):
+        return {}
+    outputs = _indicators.get(symbol, "1d", series)
+    return {name: to_json_values(outputs[name][-1:])[0] for names in GROUPS.values() for name in names}
+
+
+async def get_chart_series(symbol: str, period: str, max_points: int, interval: Optional[str] = None) -> PriceSeries:
+    """
+    Get the bars for a period downsampled to at most max_points.
+    Results are cached per (symbol, period, interval, budget).
+    """
+    interval = interval or default_interval(period)
     
-    # Sort by date ascending
-    historical_data.sort(key=lambda x: x.date)
+    async def build():
+        return downsample(await get_price_series(symbol, period, interval), max_points)
     
-    #caching all the historical data
-    _cache.set(cache_key, "historical", [h.model_dump() for h in historical_data])
-    return historical_data
+    return await _cache.get_or_fetch(f"{symbol}:{period}:{interval}:{max_points}", "chart", build)
 
 
-def get_market_status() -> MarketStatus:
+async def get_historical_data(
+    symbol: str,
+    period: str = "1mo",
+    max_points: Optional[int] = None,
+    interval: Optional[str] = None
+) -> List[HistoricalPrice]:
     """
-    Determine current market status based on US market hours.
+    Fetch historical price data for charting from the market data provider.
     
-    US Market hours (Eastern Time):
-    - Regular: 9:30 AM - 4:00 PM (Mon-Fri)
-    - Pre-market: 4:00 AM - 9:30 AM
-    - After-hours: 4:00 PM - 8:00 PM
+    Supported periods:
+    - 1d: 1 day (intraday data)
+    - 5d: 5 days
+    - 1mo: 1 month
+    - 3mo: 3 months
+    - 1y: 1 year
+    - 5y: 5 years
     
-    Returns market status and next open/close times.
+    interval selects the bar size (5min, 15min, 30min, 1h, 1d, 1wk, 1mo);
+    by default 1d uses 5-minute bars and other periods use daily bars.
+    
+    If max_points is given, the series is downsampled to that many points
+    with LTTB (see app.services.downsampling).
+    
+    Returns OHLCV data points for the requested period.
     """
-    et_tz = pytz.timezone("America/New_York")
-    now_et = datetime.now(et_tz)
-    
-    # Market hours
-    market_open = time(9, 30)
-    market_close = time(16, 0)
-    pre_market_start = time(4, 0)
-    after_hours_end = time(20, 0)
-    
-    current_time = now_et.time()
-    is_weekday = now_et.weekday() < 5
-    
-    # Weekend (Saturday/Sunday) - Market is closed
-    if not is_weekday:
-        status = "closed"
-        is_open = False
-        # Calculate days until next Monday (weekday() returns 0=Monday, 5=Saturday, 6=Sunday)
-        days_until_monday = (7 - now_et.weekday()) % 7
-        if days_until_monday == 0:  # Today is Monday, advance to next Monday
-            days_until_monday = 1
-        # Add calculated days to get next Monday, then combine with market open time
-        next_open_date = now_et + timedelta(days=days_until_monday)
-        next_open = et_tz.localize(datetime.combine(next_open_date.date(), market_open))
-        next_close = None
-    
-    # Regular trading hours (9:30 AM - 4:00 PM ET)
-    elif market_open <= current_time < market_close:
-        status = "open"
-        is_open = True
-        next_open = None  # Already open, no next open time
-        # Combine today's date with market close time
-        next_close = et_tz.localize(datetime.combine(now_et.date(), market_close))
-    
-    # Pre-market hours (4:00 AM - 9:30 AM ET)
-    elif pre_market_start <= current_time < market_open:
-        status = "pre-market"
-        is_open = False  # Pre-market trading available but regular market closed
-        # Combine today's date with market open time
-        next_open = et_tz.localize(datetime.combine(now_et.date(), market_open))
-        next_close = None
-    
-    # After-hours trading (4:00 PM - 8:00 PM ET)
-    elif market_close <= current_time < after_hours_end:
-        status = "after-hours"
-        is_open = False  # After-hours trading available but regular market closed
-        # Add one day to get tomorrow, then combine with market open time
-        next_open_date = now_et + timedelta(days=1)
-        next_open = et_tz.localize(datetime.combine(next_open_date.date(), market_open))
-        next_close = None
-    
-    # Overnight hours (8:00 PM - 4:00 AM ET)
+    if max_points is not None:
+        series = await get_chart_series(symbol, period, max_points, interval)
     else:
-        status = "closed"
-        is_open = False
-        # Add one day to get tomorrow, then combine with market open time
-        next_open_date = now_et + timedelta(days=1)
-        next_open = et_tz.localize(datetime.combine(next_open_date.date(), market_open))
-        next_close = None
-    
-    return MarketStatus(
-        is_open=is_open,
-        status=status,
-        next_open=next_open.astimezone(pytz.utc).replace(tzinfo=None) if next_open else None,
-        next_close=next_close.astimezone(pytz.utc).replace(tzinfo=None) if next_close else None
-    )
+        series = await get_price_series(symbol, period, interval)
+    return series.to_historical_prices()
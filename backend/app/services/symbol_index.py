@@ -0,0 +1,315 @@
+"""
+Local search index over the listed-symbol universe.
+
+Autocomplete used to cost one SYMBOL_SEARCH upstream call per uncached
+keystroke. The index answers those queries in memory from Alpha Vantage's
+LISTING_STATUS file, which is downloaded at most once a day and kept on
+disk so restarts do not need it again.
+
+Lookups combine two structures:
+- Tickers are kept in one sorted array, so all tickers starting with a
+  prefix form a contiguous range found with two binary searches (a
+  flattened prefix trie).
+- Company names are split into word tokens; a sorted token array gives
+  prefix matches per query word and a posting list maps each token to
+  the symbols whose names contain it.
+
+Matches are ranked with a score in [0, 1] in the spirit of Alpha Vantage's
+matchScore: exact ticker, then ticker prefix, then name matches, with
+shorter (closer) matches ranked higher.
+"""
+
+import asyncio
+import csv
+import heapq
+import io
+import logging
+import os
+import re
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.schemas.stock import StockSearchResult
+from app.services.market_data_provider import get_market_data_provider
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Listing asset types mapped to the type labels SYMBOL_SEARCH returns
+ASSET_TYPES = {"Stock": "Equity", "ETF": "ETF"}
+REGION = "United States"
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+    """Index range of keys starting with prefix (keys must be sorted)."""
+    lo = bisect_left(keys, prefix)
+    hi = bisect_left(keys, prefix + "\uffff", lo)
+    return lo, hi
+
+
+class SymbolIndex:
+    """
+    In-memory ticker and company-name index for autocomplete.
+
+    Entries are numbered in rank order (shortest name first), so every
+    posting list is already sorted best-first for name matches and a
+    lookup can stop as soon as it has enough results.
+    """
+
+    def __init__(self, listings: List[Tuple[str, str, str]]):
+        """Build the index from (symbol, name, type) rows."""
+        by_symbol: Dict[str, Tuple[str, str, str]] = {}
+        for symbol, name, asset_type in listings:
+            symbol = symbol.strip().upper()
+            if symbol:
+                by_symbol[symbol] = (symbol, name.strip(), asset_type)
+
+        entries = sorted(by_symbol.values(), key=lambda e: (len(e[1]), len(e[0]), e[0]))
+        self.symbols: List[str] = [e[0] for e in entries]
+        self.names: List[str] = [e[1] for e in entries]
+        self.types: List[str] = [e[2] for e in entries]
+        self.name_tokens: List[Tuple[str, ...]] = [tuple(_tokens(name)) for name in self.names]
+
+        # Sorted tickers grouped by length, so ticker prefix matches can be
+        # taken shortest (best-scoring) first
+        self.tickers_by_length: Dict[int, Tuple[List[str], List[int]]] = {}
+        for i in sorted(range(len(entries)), key=lambda i: self.symbols[i]):
+            keys, ids = self.tickers_by_length.setdefault(len(self.symbols[i]), ([], []))
+            keys.append(self.symbols[i])
+            ids.append(i)
+        self.max_ticker_length = max(self.tickers_by_length, default=0)
+
+        # Token -> entry ids, ascending (i.e. best-ranked first), for any word
+        # of the name and for the first word only
+        postings: Dict[str, List[int]] = {}
+        first_postings: Dict[str, List[int]] = {}
+        for i, tokens in enumerate(self.name_tokens):
+            for token in dict.fromkeys(tokens):
+                postings.setdefault(token, []).append(i)
+            if tokens:
+                first_postings.setdefault(tokens[0], []).append(i)
+        self.tokens: List[str] = sorted(postings)
+        self.postings: List[List[int]] = [postings[t] for t in self.tokens]
+        self.first_tokens: List[str] = sorted(first_postings)
+        self.first_postings: List[List[int]] = [first_postings[t] for t in self.first_tokens]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _ticker_matches(self, query: str, limit: int, scores: Dict[int, float]):
+        """Tickers starting with query, shortest first; exact ticker scores 1.0."""
+        found = 0
+        for length in range(len(query), self.max_ticker_length + 1):
+            bucket = self.tickers_by_length.get(length)
+            if bucket is None:
+                continue
+            keys, ids = bucket
+            lo, hi = _prefix_range(keys, query)
+            for k in range(lo, min(hi, lo + limit - found)):
+                scores[ids[k]] = 0.5 + 0.5 * len(query) / length
+            found += min(hi - lo, limit - found)
+            if found >= limit:
+                return
+
+    def _name_score(self, i: int, query_length: int) -> float:
+        """Share of the name the query covers."""
+        return 0.4 * min(1.0, query_length / max(len(self.names[i]), 1))
+
+    def _name_prefix_matches(self, query: str, first_word: str, limit: int, scores: Dict[int, float]):
+        """Names starting with the whole query get a boost (best-ranked first)."""
+        lo, hi = _prefix_range(self.first_tokens, first_word)
+        found = 0
+        previous = -1
+        for i in heapq.merge(*self.first_postings[lo:hi]):
+            if i == previous or not self.names[i].lower().startswith(query):
+                continue
+            previous = i
+            score = self._name_score(i, len(query)) + 0.2
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+            found += 1
+            if found >= limit:
+                break
+
+    def _name_token_matches(self, words: List[str], query_length: int, limit: int, scores: Dict[int, float]):
+        """
+        Names with a word starting with every query word.
+        Candidates come from the query word with the fewest postings, merged
+        in rank order, and stop after limit matches (later ones score lower).
+        """
+        ranges = [_prefix_range(self.tokens, word) for word in words]
+        sizes = [sum(len(self.postings[t]) for t in range(lo, hi)) for lo, hi in ranges]
+        rarest = min(range(len(words)), key=sizes.__getitem__)
+        if not sizes[rarest]:
+            return
+        others = [w for j, w in enumerate(words) if j != rarest]
+        lo, hi = ranges[rarest]
+
+        found = 0
+        previous = -1
+        for i in heapq.merge(*self.postings[lo:hi]):
+            if i == previous:
+                continue
+            previous = i
+            tokens = self.name_tokens[i]
+            if all(any(t.startswith(w) for t in tokens) for w in others):
+                score = self._name_score(i, query_length)
+                if score > scores.get(i, 0.0):
+                    scores[i] = score
+                found += 1
+                if found >= limit:
+                    break
+
+    def search(self, query: str, limit: int = 10) -> List[StockSearchResult]:
+        """Return up to limit best matches for query, best first."""
+        query = query.strip()
+        if not query:
+            return []
+
+        scores: Dict[int, float] = {}
+        self._ticker_matches(query.upper(), limit, scores)
+        words = _tokens(query)
+        # One-letter queries are ticker lookups; name prefixes that short match too much
+        if words and len(query) > 1:
+            self._name_prefix_matches(query.lower(), words[0], limit, scores)
+            self._name_token_matches(words, len(query), limit, scores)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -len(self.symbols[item[0]])))
+        return [
+            StockSearchResult(
+                symbol=self.symbols[i],
+                name=self.names[i],
+                type=self.types[i],
+                region=REGION
+            )
+            for i, _ in best
+        ]
+
+
+def parse_listing_csv(text: str) -> List[Tuple[str, str, str]]:
+    """Parse a LISTING_STATUS CSV into (symbol, name, type) rows for active listings."""
+    rows = []
+    for row in csv.DictReader(io.StringIO(text)):
+        if row.get("status", "Active") != "Active":
+            continue
+        asset_type = ASSET_TYPES.get(row.get("assetType", ""), row.get("assetType", ""))
+        rows.append((row.get("symbol", ""), row.get("name", ""), asset_type))
+    return rows
+
+
+async def _download_listing() -> str:
+    """Download the active listings CSV from the market data provider."""
+    return await get_market_data_provider().listing()
+
+
+class SymbolIndexManager:
+    """
+    Owns the current index and keeps it fresh.
+    The listing file is reloaded from disk at startup and re-downloaded
+    whenever it is older than SYMBOL_LISTING_MAX_AGE.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = settings.SYMBOL_LISTING_PATH if path is None else path
+        self.index: Optional[SymbolIndex] = None
+        self._task: Optional[asyncio.Task] = None
+        self.loaded_at: Optional[float] = None
+
+    def _file_age(self) -> Optional[float]:
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _load_file(self) -> Optional[SymbolIndex]:
+        with open(self.path, encoding="utf-8") as f:
+            listings = parse_listing_csv(f.read())
+        return SymbolIndex(listings) if listings else None
+
+    def _save_file(self, text: str):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+    async def _download(self) -> bool:
+        """Download and save a new listing file. Returns whether it succeeded."""
+        try:
+            text = await _download_listing()
+            if not isinstance(text, str) or not parse_listing_csv(text):
+                raise ValueError("Listing download returned no rows")
+            await asyncio.to_thread(self._save_file, text)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to download symbol listing: {e}")
+            return False
+
+    async def refresh(self):
+        """Load the listing file, downloading a new one first if it is missing or stale."""
+        age = self._file_age()
+        downloaded = False
+        if age is None or age >= settings.SYMBOL_LISTING_MAX_AGE:
+            downloaded = await self._download()
+        if not downloaded and (age is None or self.index is not None):
+            return
+
+        index = await asyncio.to_thread(self._load_file)
+        if index is not None:
+            self.index = index
+            self.loaded_at = time.time()
+            logger.info(f"Symbol index loaded with {len(index)} symbols")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Symbol index refresh failed: {e}")
+            await asyncio.sleep(settings.SYMBOL_LISTING_CHECK_INTERVAL)
+
+    def start(self):
+        """Start the background load/refresh loop if it is not running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the refresh loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def search(self, query: str, limit: int = 10) -> Optional[List[StockSearchResult]]:
+        """Search the index, or return None if it is not loaded yet."""
+        if self.index is None:
+            return None
+        return self.index.search(query, limit)
+
+    def stats(self) -> dict:
+        """Return index size and age."""
+        return {
+            "symbols": len(self.index) if self.index is not None else 0,
+            "loaded_at": self.loaded_at
+        }
+
+
+# Global index manager
+_manager: Optional[SymbolIndexManager] = None
+
+
+def get_symbol_index() -> SymbolIndexManager:
+    """Get the global symbol index manager, creating it on first use."""
+    global _manager
+    if _manager is None:
+        _manager = SymbolIndexManager()
+    return _manager
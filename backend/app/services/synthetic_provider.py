@@ -0,0 +1,390 @@
+"""
+Synthetic market data for offline load testing.
+
+Prices follow geometric Brownian motion from HISTORY_START. Each symbol
+gets its own start price, drift, volatility and typical volume, all
+derived from (seed, symbol), so the same seed always produces the same
+history for the same symbol, in every worker and on every run.
+
+Generating a symbol's price on a given day must not mean simulating every
+day since 2010, so the path is built in two levels:
+- one N(0, days) draw per calendar year gives the year's total shock
+- within a year, a Brownian bridge of daily shocks ends exactly at that
+  total, so each year is generated (and cached) on its own
+Intraday 5-minute bars are a second bridge inside each session, running
+from the previous close to the day's close, so quotes, intraday charts and
+daily bars all agree. Only bars that have completed by the current New
+York time are returned.
+
+Any well-formed ticker is priced. The listing (and search) covers a
+universe of generated tickers, so the local symbol index has something
+realistic to load.
+"""
+
+import csv
+import io
+import math
+import random
+import re
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+from app.schemas.stock import StockQuote, StockSearchResult
+from app.services.market_data_provider import MarketDataProvider
+from app.services.price_series import Bar, PriceSeries
+from app.services.trading_calendar import ET, get_trading_calendar
+from app.services.upstream_scheduler import Priority
+from app.utils.exceptions import UpstreamNotFoundError
+
+# First weekday of every synthetic price path
+HISTORY_START = date(2010, 1, 1)
+TRADING_DAYS_PER_YEAR = 252
+
+# Regular session in 5-minute bars (09:30-16:00 ET, or 09:30-13:00 on early-close days)
+BAR_SECONDS = 300
+SESSION_OPEN = 9 * 3600 + 30 * 60
+FULL_SESSION_BARS = 78
+EARLY_CLOSE_BARS = 42
+
+# Sessions in an intraday series and bars in a compact series
+INTRADAY_DAYS = 20
+COMPACT_BARS = 100
+
+MAX_SEARCH_RESULTS = 10
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SYMBOL_RE = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+_SYLLABLES = [
+    "ac", "al", "ar", "bel", "bio", "cor", "dyn", "el", "en", "gen", "in", "lu", "max", "med",
+    "nex", "no", "or", "pra", "quan", "ra", "sol", "ta", "tec", "tri", "ver", "vi", "zen"
+]
+_SUFFIXES = ["Inc", "Corp", "Holdings", "Group", "Technologies", "Industries", "Systems", "Partners"]
+
+
+def _rng(*parts) -> random.Random:
+    """Generator seeded from parts; stable across processes, unlike hash()."""
+    return random.Random(zlib.crc32(":".join(map(str, parts)).encode()))
+
+
+@lru_cache(maxsize=None)
+def _weekdays(year: int) -> Tuple[date, ...]:
+    """Weekdays of year on or after HISTORY_START (holidays included; they are skipped on output)."""
+    day = max(date(year, 1, 1), HISTORY_START)
+    days = []
+    while day.year == year:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return tuple(days)
+
+
+@lru_cache(maxsize=None)
+def _weekdays_before(year: int) -> int:
+    if year <= HISTORY_START.year:
+        return 0
+    return _weekdays_before(year - 1) + len(_weekdays(year - 1))
+
+
+@lru_cache(maxsize=16384)
+def _model(seed: int, symbol: str) -> Tuple[float, float, float, float]:
+    """(start price, annual drift, annual volatility, typical daily volume) for a symbol."""
+    rng = _rng(seed, symbol)
+    price = math.exp(rng.uniform(math.log(5), math.log(500)))
+    drift = rng.uniform(-0.05, 0.2)
+    volatility = rng.uniform(0.15, 0.6)
+    volume = math.exp(rng.uniform(math.log(2e5), math.log(5e7)))
+    return price, drift, volatility, volume
+
+
+@lru_cache(maxsize=65536)
+def _year_shock(seed: int, symbol: str, year: int) -> float:
+    """Sum of a year's standard normal daily shocks, drawn directly as N(0, weekdays)."""
+    return _rng(seed, symbol, year).gauss(0.0, math.sqrt(len(_weekdays(year))))
+
+
+@lru_cache(maxsize=16384)
+def _shock_before(seed: int, symbol: str, year: int) -> float:
+    """Sum of every daily shock before year."""
+    if year <= HISTORY_START.year:
+        return 0.0
+    return _shock_before(seed, symbol, year - 1) + _year_shock(seed, symbol, year - 1)
+
+
+@lru_cache(maxsize=4096)
+def _year_path(seed: int, symbol: str, year: int) -> Tuple[array, array, array]:
+    """
+    Cumulative shocks through each weekday of year (a Brownian bridge ending
+    at _year_shock), plus per-day high/low range and volume factors.
+    """
+    n = len(_weekdays(year))
+    rng = _rng(seed, symbol, year, "days")
+    walk = list(accumulate(rng.gauss(0.0, 1.0) for _ in range(n)))
+    correction = (walk[-1] - _year_shock(seed, symbol, year)) / n
+    start = _shock_before(seed, symbol, year)
+    shocks = array("d", (start + w - correction * (i + 1) for i, w in enumerate(walk)))
+    ranges = array("d", (abs(rng.gauss(0.0, 1.0)) for _ in range(2 * n)))
+    volumes = array("d", (rng.lognormvariate(0.0, 0.4) for _ in range(n)))
+    return shocks, ranges, volumes
+
+
+@lru_cache(maxsize=4096)
+def _session_bars(
+    seed: int,
+    symbol: str,
+    day: date,
+    total: int,
+    opening: float,
+    closing: float,
+    step_vol: float,
+    volume: float
+) -> Tuple[Bar, ...]:
+    """A session's 5-minute bars: a Brownian bridge from the previous close (opening) to the day's close."""
+    rng = _rng(seed, symbol, day.toordinal(), "bars")
+    bar_vol = step_vol / math.sqrt(total)
+    walk = list(accumulate(rng.gauss(0.0, bar_vol) for _ in range(total)))
+    correction = (walk[-1] - math.log(closing / opening)) / total
+    session_open = (day.toordinal() - _EPOCH_ORDINAL) * 86400 + SESSION_OPEN
+
+    bars = []
+    previous = opening
+    for i in range(total):
+        close = opening * math.exp(walk[i] - correction * (i + 1))
+        high = max(previous, close) * math.exp(0.5 * abs(rng.gauss(0.0, bar_vol)))
+        low = min(previous, close) * math.exp(-0.5 * abs(rng.gauss(0.0, bar_vol)))
+        bars.append((
+            session_open + i * BAR_SECONDS,
+            round(previous, 4), round(high, 4), round(low, 4), round(close, 4),
+            int(volume / total * rng.lognormvariate(0.0, 0.5))
+        ))
+        previous = close
+    return tuple(bars)
+
+
+def _company_name(seed: int, symbol: str) -> str:
+    rng = _rng(seed, symbol, "name")
+    word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3)))
+    return f"{word.capitalize()} {rng.choice(_SUFFIXES)}"
+
+
+def _price(value: float) -> Decimal:
+    return Decimal(f"{value:.4f}")
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Reproducible geometric Brownian motion prices for any ticker."""
+
+    name = "synthetic"
+    supports_bulk_quotes = True
+
+    def __init__(self, seed: int = 42, universe_size: int = 5000):
+        self.seed = seed
+        self.universe_size = universe_size
+        self._universe: Optional[List[Tuple[str, str, str]]] = None
+        self.generated = 0
+
+    def _symbol(self, symbol: str) -> str:
+        symbol = symbol.strip().upper()
+        if not _SYMBOL_RE.match(symbol):
+            raise UpstreamNotFoundError(f"Stock symbol '{symbol}' not found")
+        return symbol
+
+    def _steps(self, symbol: str) -> Tuple[float, float, float, float]:
+        """(start price, daily log drift, daily volatility, typical volume)."""
+        price, drift, volatility, volume = _model(self.seed, symbol)
+        step_drift = (drift - volatility * volatility / 2) / TRADING_DAYS_PER_YEAR
+        return price, step_drift, volatility / math.sqrt(TRADING_DAYS_PER_YEAR), volume
+
+    def _close(self, symbol: str, day: date) -> float:
+        """Close on a weekday (holidays have a close too; it is just never shown)."""
+        price, step_drift, step_vol, _ = self._steps(symbol)
+        days = _weekdays(day.year)
+        i = bisect_left(days, day)
+        shocks = _year_path(self.seed, symbol, day.year)[0]
+        return price * math.exp(step_drift * (_weekdays_before(day.year) + i + 1) + step_vol * shocks[i])
+
+    def _close_before(self, symbol: str, day: date) -> float:
+        """Close on the weekday before day, or the start price at HISTORY_START."""
+        day -= timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        if day < HISTORY_START:
+            return self._steps(symbol)[0]
+        return self._close(symbol, day)
+
+    def _daily(self, symbol: str, first: date, last: date) -> PriceSeries:
+        """Daily bars for trading days in [first, last]."""
+        price, step_drift, step_vol, volume = self._steps(symbol)
+        calendar = get_trading_calendar()
+        first = max(first, HISTORY_START)
+        series = PriceSeries()
+        for year in range(first.year, last.year + 1):
+            shocks, ranges, volumes = _year_path(self.seed, symbol, year)
+            base = _weekdays_before(year)
+            previous = price * math.exp(step_drift * base + step_vol * _shock_before(self.seed, symbol, year))
+            for i, day in enumerate(_weekdays(year)):
+                close = price * math.exp(step_drift * (base + i + 1) + step_vol * shocks[i])
+                if first <= day <= last and calendar.is_trading_day(day):
+                    series.timestamps.append((day.toordinal() - _EPOCH_ORDINAL) * 86400)
+                    series.open.append(round(previous, 4))
+                    series.high.append(round(max(previous, close) * math.exp(step_vol * 0.5 * ranges[2 * i]), 4))
+                    series.low.append(round(min(previous, close) * math.exp(-step_vol * 0.5 * ranges[2 * i + 1]), 4))
+                    series.close.append(round(close, 4))
+                    series.volume.append(int(volume * volumes[i]))
+                previous = close
+        return series
+
+    def _session_length(self, day: date) -> int:
+        return EARLY_CLOSE_BARS if day in get_trading_calendar().early_closes else FULL_SESSION_BARS
+
+    def _session(self, symbol: str, day: date, count: int) -> List[Bar]:
+        """The first count 5-minute bars of day's session."""
+        _, _, step_vol, volume = self._steps(symbol)
+        bars = _session_bars(
+            self.seed, symbol, day, self._session_length(day),
+            self._close_before(symbol, day), self._close(symbol, day), step_vol, volume
+        )
+        return bars[:count]
+
+    def _previous_trading_day(self, day: date) -> date:
+        calendar = get_trading_calendar()
+        day -= timedelta(days=1)
+        while not calendar.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def _latest_session(self) -> Tuple[date, int]:
+        """The latest trading day with a completed bar, and how many of its bars have completed."""
+        now = datetime.now(ET)
+        elapsed = now.hour * 3600 + now.minute * 60 + now.second - SESSION_OPEN
+        today = now.date()
+        if get_trading_calendar().is_trading_day(today) and elapsed >= BAR_SECONDS:
+            return today, min(elapsed // BAR_SECONDS, self._session_length(today))
+        day = self._previous_trading_day(today)
+        return day, self._session_length(day)
+
+    def _last_complete_day(self) -> date:
+        day, count = self._latest_session()
+        return day if count == self._session_length(day) else self._previous_trading_day(day)
+
+    def _quote(self, symbol: str) -> dict:
+        day, count = self._latest_session()
+        bars = self._session(symbol, day, count)
+        previous_close = self._close(symbol, self._previous_trading_day(day))
+        current = bars[-1][4]
+        change = current - previous_close
+        self.generated += 1
+        quote = StockQuote(
+            symbol=symbol,
+            current_price=_price(current),
+            change=_price(change),
+            change_percent=_price(change / previous_close * 100),
+            last_update=datetime.utcnow(),
+            previous_close=_price(previous_close),
+            volume=sum(bar[5] for bar in bars),
+            day_high=_price(max(bar[2] for bar in bars)),
+            day_low=_price(min(bar[3] for bar in bars))
+        )
+        return quote.model_dump()
+
+    async def quote(self, symbol: str, priority: Priority) -> dict:
+        """Generate the quote as of the latest completed 5-minute bar."""
+        return self._quote(self._symbol(symbol))
+
+    async def quotes(self, symbols: List[str], priority: Priority) -> Dict[str, dict]:
+        """Generate quotes for every well-formed symbol."""
+        result = {}
+        for symbol in symbols:
+            symbol = symbol.strip().upper()
+            if _SYMBOL_RE.match(symbol):
+                result[symbol] = self._quote(symbol)
+        return result
+
+    async def overview(self, symbol: str) -> dict:
+        """Generate a company name and fundamentals."""
+        symbol = self._symbol(symbol)
+        rng = _rng(self.seed, symbol, "overview")
+        price, _, _, volume = self._steps(symbol)
+        shares = volume * rng.uniform(50, 400)
+        return {
+            "name": _company_name(self.seed, symbol),
+            "market_cap": str(int(price * shares)),
+            "pe_ratio": f"{rng.uniform(6, 60):.2f}" if rng.random() < 0.85 else None,
+            "dividend_yield": f"{rng.uniform(0, 0.05):.4f}" if rng.random() < 0.5 else "0"
+        }
+
+    def _listings(self) -> List[Tuple[str, str, str]]:
+        """(symbol, name, asset type) for the generated universe, built on first use."""
+        if self._universe is None:
+            rng = _rng(self.seed, "universe")
+            symbols: Dict[str, None] = {}
+            while len(symbols) < self.universe_size:
+                length = rng.choice((1, 2, 3, 3, 4, 4, 4, 5))
+                symbols["".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(length))] = None
+            self._universe = [
+                (symbol, _company_name(self.seed, symbol), "ETF" if rng.random() < 0.1 else "Stock")
+                for symbol in symbols
+            ]
+        return self._universe
+
+    async def search(self, query: str) -> List[dict]:
+        """Match the query against tickers (prefix) and company names (substring) in the universe."""
+        ticker = query.strip().upper()
+        words = query.strip().lower()
+        if not words:
+            return []
+        ticker_matches = [row for row in self._listings() if row[0].startswith(ticker)]
+        name_matches = [row for row in self._listings() if words in row[1].lower() and row not in ticker_matches]
+        ticker_matches.sort(key=lambda row: len(row[0]))
+        return [
+            StockSearchResult(
+                symbol=symbol,
+                name=name,
+                type="Equity" if asset_type == "Stock" else asset_type,
+                region="United States"
+            ).model_dump()
+            for symbol, name, asset_type in (ticker_matches + name_matches)[:MAX_SEARCH_RESULTS]
+        ]
+
+    async def intraday_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        """
+        5-minute bars for the last INTRADAY_DAYS sessions, or only the last 100
+        bars if compact, up to the latest completed bar.
+        """
+        symbol = self._symbol(symbol)
+        day, count = self._latest_session()
+        sessions = [(day, count)]
+        # Three sessions always hold 100 bars, even with a short day among them
+        while len(sessions) < (3 if compact else INTRADAY_DAYS):
+            day = self._previous_trading_day(day)
+            sessions.append((day, self._session_length(day)))
+        series = PriceSeries.from_bars(bar for day, count in sessions for bar in self._session(symbol, day, count))
+        if compact:
+            return series.slice(max(0, len(series) - COMPACT_BARS), len(series))
+        return series
+
+    async def daily_series(self, symbol: str, compact: bool = False) -> PriceSeries:
+        """Daily bars through the last completed session, from HISTORY_START or for the last 100 sessions."""
+        symbol = self._symbol(symbol)
+        last = self._last_complete_day()
+        if not compact:
+            return self._daily(symbol, HISTORY_START, last)
+        series = self._daily(symbol, last - timedelta(days=COMPACT_BARS * 7 // 5 + 14), last)
+        return series.slice(max(0, len(series) - COMPACT_BARS), len(series))
+
+    async def listing(self) -> str:
+        """The generated universe as LISTING_STATUS CSV."""
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(["symbol", "name", "exchange", "assetType", "ipoDate", "delistingDate", "status"])
+        for symbol, name, asset_type in self._listings():
+            writer.writerow([symbol, name, "NYSE", asset_type, HISTORY_START.isoformat(), "null", "Active"])
+        return output.getvalue()
+
+    def stats(self) -> dict:
+        """Return the provider name, universe size and quotes generated."""
+        return {"provider": self.name, "symbols": self.universe_size, "generated_quotes": self.generated}
@@ -0,0 +1,239 @@
+"""
+NYSE trading calendar.
+
+Sessions are precomputed once for a range of years, with exchange holidays
+removed and early closes (1:00 PM ET) applied. Each session is stored as
+four UTC timestamps in sorted arrays:
+
+    pre-market start (4:00 AM ET), open (9:30 AM), close (4:00 PM or
+    1:00 PM on half days), after-hours end (8:00 PM, or 5:00 PM on half days)
+
+Finding the current or next session is a binary search, and the derived
+market status is memoized per minute, so "is the market open?" is cheap
+enough to ask on every request.
+
+Holidays follow the NYSE rules (weekend observance included). One-off
+closures such as national days of mourning are not modelled.
+"""
+
+import time as time_module
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Set, Tuple
+import pytz
+from app.schemas.stock import MarketStatus
+
+ET = pytz.timezone("America/New_York")
+
+# Years either side of the current year to precompute sessions for
+YEARS_BACK = 5
+YEARS_AHEAD = 5
+
+PRE_MARKET_START = time(4, 0)
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+AFTER_HOURS_END = time(20, 0)
+EARLY_AFTER_HOURS_END = time(17, 0)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The nth (1-based) given weekday of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    """Weekend holidays are observed on the Friday before or the Monday after."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> Set[date]:
+    """Full-day NYSE holidays for a year."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _observed(date(year, 7, 4)),    # Independence Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        _observed(date(year, 12, 25))   # Christmas
+    }
+    # New Year's Day on a Saturday is not observed on the previous Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return holidays
+
+
+def nyse_early_closes(year: int, holidays: Set[date]) -> Set[date]:
+    """Days the NYSE closes at 1:00 PM ET."""
+    candidates = [
+        date(year, 7, 3),                                   # Day before Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),   # Day after Thanksgiving
+        date(year, 12, 24)                                  # Christmas Eve
+    ]
+    return {day for day in candidates if day.weekday() < 5 and day not in holidays}
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _seconds(at: time) -> int:
+    return at.hour * 3600 + at.minute * 60
+
+
+def _utc_timestamp(day: date, at: time, offset: int) -> int:
+    """Epoch seconds for a local ET wall-clock time with a known UTC offset in seconds."""
+    return (day.toordinal() - _EPOCH_ORDINAL) * 86400 + _seconds(at) - offset
+
+
+class TradingCalendar:
+    """Precomputed NYSE sessions with binary-searched lookups."""
+
+    def __init__(self, first_year: Optional[int] = None, last_year: Optional[int] = None):
+        this_year = date.today().year
+        first_year = this_year - YEARS_BACK if first_year is None else first_year
+        last_year = this_year + YEARS_AHEAD if last_year is None else last_year
+        self.pre_open = array("q")
+        self.open = array("q")
+        self.close = array("q")
+        self.post_close = array("q")
+        self.holidays: Set[date] = set()
+        self.early_closes: Set[date] = set()
+
+        for year in range(first_year, last_year + 1):
+            holidays = nyse_holidays(year)
+            early = nyse_early_closes(year, holidays)
+            self.holidays |= holidays
+            self.early_closes |= early
+
+            day = date(year, 1, 1)
+            offset = None
+            while day.year == year:
+                if day.weekday() == 0 or offset is None:
+                    # DST changes happen early on Sundays, so one offset covers Monday-Friday
+                    offset = int(ET.utcoffset(datetime.combine(day, time(12, 0))).total_seconds())
+                if day.weekday() < 5 and day not in holidays:
+                    half_day = day in early
+                    self.pre_open.append(_utc_timestamp(day, PRE_MARKET_START, offset))
+                    self.open.append(_utc_timestamp(day, MARKET_OPEN, offset))
+                    self.close.append(_utc_timestamp(day, EARLY_CLOSE if half_day else MARKET_CLOSE, offset))
+                    self.post_close.append(
+                        _utc_timestamp(day, EARLY_AFTER_HOURS_END if half_day else AFTER_HOURS_END, offset)
+                    )
+                day += timedelta(days=1)
+
+    def _session_index(self, ts: float) -> int:
+        """Index of the current session, or the next one if ts is between sessions."""
+        return bisect_right(self.post_close, ts)
+
+    def status_at(self, ts: float) -> Tuple[str, Optional[int], Optional[int]]:
+        """
+        Market status at epoch seconds ts.
+        Returns (status, next_open, next_close) with UTC epoch timestamps.
+        """
+        i = self._session_index(ts)
+        if i >= len(self.open):
+            return "closed", None, None
+        if ts < self.pre_open[i]:
+            return "closed", self.open[i], None
+        if ts < self.open[i]:
+            return "pre-market", self.open[i], None
+        if ts < self.close[i]:
+            return "open", None, self.close[i]
+        next_open = self.open[i + 1] if i + 1 < len(self.open) else None
+        return "after-hours", next_open, None
+
+    def is_open(self, ts: Optional[float] = None) -> bool:
+        """Check whether the regular session is open at ts (default: now)."""
+        ts = time_module.time() if ts is None else ts
+        i = self._session_index(ts)
+        return i < len(self.open) and self.open[i] <= ts < self.close[i]
+
+    def is_trading_day(self, day: date) -> bool:
+        """Check whether the exchange has a session on day."""
+        return day.weekday() < 5 and day not in self.holidays
+
+    def sessions_between(self, start: float, end: float) -> List[Tuple[int, int]]:
+        """(open, close) of every regular session starting in [start, end)."""
+        lo = bisect_left(self.open, start)
+        hi = bisect_left(self.open, end)
+        return list(zip(self.open[lo:hi], self.close[lo:hi]))
+
+
+# Global calendar instance (built on first use)
+_calendar: Optional[TradingCalendar] = None
+
+# Market status memoized per minute: (minute, status)
+_status_cache: Tuple[int, Optional[MarketStatus]] = (-1, None)
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Get the global NYSE calendar, building it on first use."""
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar()
+    return _calendar
+
+
+def _to_datetime(ts: Optional[int]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(ts) if ts is not None else None
+
+
+def get_market_status() -> MarketStatus:
+    """
+    Determine current market status from the NYSE calendar.
+
+    US Market hours (Eastern Time):
+    - Regular: 9:30 AM - 4:00 PM (1:00 PM on early-close days)
+    - Pre-market: 4:00 AM - 9:30 AM
+    - After-hours: 4:00 PM - 8:00 PM (5:00 PM on early-close days)
+    Weekends and exchange holidays are closed.
+
+    Returns market status and next open/close times (naive UTC).
+    The result is memoized for the current minute.
+    """
+    global _status_cache
+    now = time_module.time()
+    minute = int(now // 60)
+    cached_minute, cached = _status_cache
+    if cached_minute == minute and cached is not None:
+        return cached
+
+    status, next_open, next_close = get_trading_calendar().status_at(now)
+    market_status = MarketStatus(
+        is_open=status == "open",
+        status=status,
+        next_open=_to_datetime(next_open),
+        next_close=_to_datetime(next_close)
+    )
+    _status_cache = (minute, market_status)
+    return market_status
@@ -0,0 +1,408 @@
+"""
+Quota-aware scheduler for Alpha Vantage API calls.
+
+Every upstream market data request is queued here and released at the rate
+allowed by the configured plan. Requests are served by priority lane so
+portfolio valuation is not starved by search or chart traffic when a burst
+hits the per-minute limit.
+"""
+
+import asyncio
+import logging
+import time
+import httpx
+from collections import deque
+from datetime import datetime
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+from app.config import settings
+from app.services.market_data_client import get_market_data_client
+from app.utils.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.utils.exceptions import CircuitOpenError, UpstreamRateLimitedError, UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """
+    Priority lanes for upstream calls (lower value is served first).
+    - VALUATION: portfolio valuation and trades
+    - INTERACTIVE: quotes and details a user is looking at
+    - BACKGROUND: search, charts and background refreshes
+    """
+    VALUATION = 0
+    INTERACTIVE = 1
+    BACKGROUND = 2
+
+
+class TokenBucket:
+    """
+    Token bucket matching a per-minute call limit, plus a per-day counter.
+    A limit of 0 disables that check.
+    """
+
+    def __init__(self, per_minute: int, per_day: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.per_day = per_day
+        self.day_used = 0
+        self._day = datetime.utcnow().date()
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        today = datetime.utcnow().date()
+        if today != self._day:
+            self._day = today
+            self.day_used = 0
+
+    def daily_exhausted(self) -> bool:
+        """Check whether the per-day quota has been used up."""
+        self._refill()
+        return self.per_day > 0 and self.day_used >= self.per_day
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Consume one token and one call from the daily quota."""
+        if self.rate > 0:
+            self.tokens -= 1
+        self.day_used += 1
+
+    def refund(self):
+        """Give back a token taken for a call that was never sent."""
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + 1)
+        self.day_used = max(0, self.day_used - 1)
+
+
+class UpstreamRequest:
+    """A queued upstream call shared by every caller with the same key."""
+
+    __slots__ = ("key", "params", "priority", "deadline", "enqueued_at", "future")
+
+    def __init__(self, key: Hashable, params: dict, priority: Priority, deadline: float):
+        self.key = key
+        self.params = params
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+# Alpha Vantage functions that only return CSV
+CSV_FUNCTIONS = {"LISTING_STATUS"}
+
+
+def _is_market_data_failure(error: BaseException) -> bool:
+    """Errors that mean Alpha Vantage is down or struggling (not bad requests)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+# Breaker for small Alpha Vantage calls (quotes, fundamentals, search, compact
+# series), with an adaptive timeout; the configured client timeout is its upper bound
+_breaker = get_circuit_breaker("alpha_vantage", settings.MARKET_DATA_TIMEOUT, _is_market_data_failure)
+
+# Breaker for multi-megabyte downloads (outputsize=full, listings). Their
+# latency says nothing about the small calls and vice versa, so they get a
+# fixed MARKET_DATA_TIMEOUT and their own failure count.
+_download_breaker = get_circuit_breaker(
+    "alpha_vantage_downloads",
+    settings.MARKET_DATA_TIMEOUT,
+    _is_market_data_failure,
+    min_timeout=settings.MARKET_DATA_TIMEOUT
+)
+
+
+def _breaker_for(params: dict) -> CircuitBreaker:
+    """Breaker for a call: the download breaker for full series and CSV listings."""
+    if params.get("outputsize") == "full" or params.get("function") in CSV_FUNCTIONS:
+        return _download_breaker
+    return _breaker
+
+
+async def _send_alpha_vantage(params: dict) -> Any:
+    """
+    Send one Alpha Vantage query through the shared pooled client.
+    Returns the decoded JSON, or the raw text for CSV-only functions.
+    Calls go through the Alpha Vantage circuit breaker for their payload
+    size, which applies the timeout and fails fast while the service is down.
+    """
+    client = get_market_data_client()
+    
+    async def request() -> httpx.Response:
+        response = await client.get("/query", params={**params, "apikey": settings.ALPHA_VANTAGE_API_KEY})
+        response.raise_for_status()
+        return response
+    
+    try:
+        response = await _breaker_for(params).call(request)
+    except httpx.TransportError as e:
+        raise UpstreamUnavailableError(f"Market data API unreachable: {e!r}") from e
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code < 500:
+            raise
+        raise UpstreamUnavailableError(f"Market data API error {e.response.status_code}") from e
+    if params.get("function") in CSV_FUNCTIONS:
+        return response.text
+    data = response.json()
+    if is_rate_limit_notice(data):
+        raise UpstreamRateLimitedError(data.get("Note") or data.get("Information"))
+    return data
+
+
+def is_rate_limit_notice(data: Any) -> bool:
+    """
+    Check for Alpha Vantage's throttling reply: HTTP 200 with only a "Note"
+    or "Information" message (rate limit, daily limit or premium notice)
+    instead of data. It must not be mistaken for "symbol not found".
+    """
+    return isinstance(data, dict) and len(data) == 1 and ("Note" in data or "Information" in data)
+
+
+class UpstreamScheduler:
+    """
+    Priority scheduler in front of the market data API.
+
+    - Token bucket sized to the plan's per-minute and per-day limits
+    - One bounded FIFO queue per priority lane
+    - Queued requests carry a deadline and fail fast once it passes
+    - Identical queued requests (same function and symbol) share one call,
+      and a higher-priority duplicate promotes the queued request
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict], Awaitable[Any]] = _send_alpha_vantage,
+        per_minute: Optional[int] = None,
+        per_day: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        deadline: Optional[float] = None
+    ):
+        self._send = send
+        self.bucket = TokenBucket(
+            settings.ALPHA_VANTAGE_CALLS_PER_MINUTE if per_minute is None else per_minute,
+            settings.ALPHA_VANTAGE_CALLS_PER_DAY if per_day is None else per_day
+        )
+        self.max_queue_size = settings.UPSTREAM_QUEUE_MAX_SIZE if max_queue_size is None else max_queue_size
+        self.deadline = settings.UPSTREAM_QUEUE_DEADLINE if deadline is None else deadline
+        self._lanes: Dict[Priority, Deque[UpstreamRequest]] = {p: deque() for p in Priority}
+        self._queued: Dict[Hashable, UpstreamRequest] = {}
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+        # Metrics
+        self.dispatched = 0
+        self.deduplicated = 0
+        self.rejected_full = 0
+        self.rejected_quota = 0
+        self.expired = 0
+        self.rate_limited = 0
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+
+    async def submit(
+        self,
+        params: dict,
+        priority: Priority = Priority.INTERACTIVE,
+        key: Optional[Hashable] = None
+    ) -> Any:
+        """
+        Queue an upstream call and wait for its result.
+        Raises UpstreamUnavailableError if the queue is full, the daily
+        quota is spent, the Alpha Vantage circuit is open, or the request's
+        deadline passes while queued.
+        """
+        self.start()
+        # Fail fast instead of queueing behind an upstream that is down
+        _breaker_for(params).check()
+        key = key if key is not None else tuple(sorted(params.items()))
+
+        request = self._queued.get(key)
+        if request is not None:
+            self.deduplicated += 1
+            if priority < request.priority:
+                # Re-queue in the faster lane; the stale slot is skipped when popped
+                request.priority = priority
+                self._lanes[priority].append(request)
+                self._wakeup.set()
+            return await asyncio.shield(request.future)
+
+        if self.bucket.daily_exhausted():
+            self.rejected_quota += 1
+            raise UpstreamUnavailableError("Daily market data quota exhausted", "UPSTREAM_QUOTA_EXHAUSTED")
+
+        if self._depth(priority) >= self.max_queue_size:
+            self.rejected_full += 1
+            raise UpstreamUnavailableError("Market data request queue is full", "UPSTREAM_QUEUE_FULL")
+
+        request = UpstreamRequest(key, params, priority, time.monotonic() + self.deadline)
+        self._lanes[priority].append(request)
+        self._queued[key] = request
+        self._wakeup.set()
+        return await asyncio.shield(request.future)
+
+    def _depth(self, priority: Priority) -> int:
+        """
+        Requests waiting in a lane. Lanes also hold stale slots left by
+        promoted requests, so their length overstates the depth.
+        """
+        return sum(1 for request in self._queued.values() if request.priority == priority)
+
+    def _next_request(self) -> Optional[UpstreamRequest]:
+        """Pop the highest-priority live request, failing any that expired."""
+        now = time.monotonic()
+        for priority in Priority:
+            lane = self._lanes[priority]
+            while lane:
+                request = lane.popleft()
+                if request.priority != priority or self._queued.get(request.key) is not request:
+                    # Promoted to another lane or already handled
+                    continue
+                if now > request.deadline:
+                    self._fail_expired(request)
+                    continue
+                del self._queued[request.key]
+                return request
+        return None
+
+    def _fail_expired(self, request: UpstreamRequest):
+        del self._queued[request.key]
+        self.expired += 1
+        if not request.future.done():
+            request.future.set_exception(
+                UpstreamUnavailableError("Market data request timed out in queue", "UPSTREAM_DEADLINE_EXCEEDED")
+            )
+            # Mark retrieved in case every waiter has gone away
+            request.future.exception()
+
+    async def _dispatch_loop(self):
+        while True:
+            if not self._queued:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if self.bucket.daily_exhausted():
+                self._fail_all(UpstreamUnavailableError("Daily market data quota exhausted", "UPSTREAM_QUOTA_EXHAUSTED"))
+                continue
+
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(min(wait, 1.0))
+                self._expire_overdue()
+                continue
+
+            request = self._next_request()
+            if request is None:
+                continue
+
+            self.bucket.take()
+            self.dispatched += 1
+            self._wait_times.append(time.monotonic() - request.enqueued_at)
+            task = asyncio.create_task(self._execute(request))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def _expire_overdue(self):
+        """Fail queued requests whose deadline has passed while waiting for tokens."""
+        now = time.monotonic()
+        for request in [r for r in self._queued.values() if now > r.deadline]:
+            self._fail_expired(request)
+
+    async def _execute(self, request: UpstreamRequest):
+        try:
+            result = await self._send(request.params)
+        except Exception as e:
+            if isinstance(e, CircuitOpenError):
+                self.bucket.refund()
+            if isinstance(e, UpstreamRateLimitedError):
+                # Our limits are out of step with the provider's; hold off until the bucket refills
+                self.rate_limited += 1
+                self.bucket.tokens = min(self.bucket.tokens, 0.0)
+                logger.warning(f"Alpha Vantage rate limit notice: {e.message}")
+            if not request.future.done():
+                request.future.set_exception(e)
+                request.future.exception()
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+
+    def start(self):
+        """Start the dispatcher task if it is not running."""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        """Stop the dispatcher and fail anything still queued."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        self._fail_all(UpstreamUnavailableError("Market data scheduler stopped"))
+
+    def _fail_all(self, error: Exception):
+        """Fail every queued request with error and empty the lanes."""
+        for request in list(self._queued.values()):
+            if not request.future.done():
+                request.future.set_exception(error)
+                request.future.exception()
+        self._queued.clear()
+        for lane in self._lanes.values():
+            lane.clear()
+
+    def stats(self) -> dict:
+        """Return queue depth, wait time and quota metrics."""
+        waits: List[float] = sorted(self._wait_times)
+        depth = {priority.name.lower(): self._depth(priority) for priority in Priority}
+        return {
+            "queue_depth": depth,
+            "dispatched": self.dispatched,
+            "deduplicated": self.deduplicated,
+            "rejected_full": self.rejected_full,
+            "rejected_quota": self.rejected_quota,
+            "expired": self.expired,
+            "rate_limited": self.rate_limited,
+            "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0,
+            "wait_max_ms": round(waits[-1] * 1000, 2) if waits else 0.0,
+            "tokens_available": round(self.bucket.tokens, 2),
+            "calls_today": self.bucket.day_used,
+            "daily_limit": self.bucket.per_day
+        }
+
+
+# Global scheduler instance
+_scheduler: Optional[UpstreamScheduler] = None
+
+
+def get_upstream_scheduler() -> UpstreamScheduler:
+    """Get the global upstream scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = UpstreamScheduler()
+    return _scheduler
+
+
+def set_upstream_scheduler(scheduler: UpstreamScheduler) -> Optional[UpstreamScheduler]:
+    """Replace the global upstream scheduler (e.g. in tests). Returns the previous one."""
+    global _scheduler
+    previous = _scheduler
+    _scheduler = scheduler
+    return previous
@@ -2,7 +2,7 @@
 Utility modules for the application.
 """
 
-from app.utils.exceptions import AppException
+from app.utils.exceptions import AppException, UpstreamUnavailableError
 
 from app.utils.error_handlers import (
     app_exception_handler,
@@ -16,6 +16,7 @@ from app.utils.middleware import RequestLoggingMiddleware
 __all__ = [
     # Exceptions
     "AppException",
+    "UpstreamUnavailableError",
     # Error handlers
     "app_exception_handler",
     "http_exception_handler",
@@ -0,0 +1,351 @@
+"""
+Bounded in-memory cache engine with LRU eviction and TTL expiry.
+
+Each data type gets its own region with an entry budget and a byte budget.
+Lookups and inserts are O(1); expired entries are removed by a periodic
+background sweep instead of waiting for someone to read that exact key.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a cached value in bytes.
+    Walks dicts, lists and tuples; other objects use sys.getsizeof.
+    """
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, array):
+        return sys.getsizeof(value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+@dataclass
+class RegionConfig:
+    """
+    Budget and TTL settings for one cache region (data type).
+    stale_ttl is how long after expiry an entry may still be served
+    stale while it is refreshed in the background. fallback_ttl is how much
+    longer it is kept (but not served normally) as a last resort for when
+    the upstream is unavailable.
+    """
+    ttl: float
+    max_entries: int = 10_000
+    max_bytes: int = 64 * 1024 * 1024
+    stale_ttl: float = 0.0
+    fallback_ttl: float = 0.0
+
+    @property
+    def retain_ttl(self) -> float:
+        """Seconds after expiry that an entry is kept at all."""
+        return self.stale_ttl + self.fallback_ttl
+
+
+class CacheEntry:
+    """A cached value with its expiry time and estimated size."""
+
+    __slots__ = ("value", "stored_at", "expires_at", "size")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float, size: int):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.size = size
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """Check whether the entry is still within its TTL."""
+        now = time.time() if now is None else now
+        return now < self.expires_at
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds since the entry was stored."""
+        now = time.time() if now is None else now
+        return now - self.stored_at
+
+
+class CacheRegion:
+    """
+    LRU + TTL store for a single data type.
+
+    Two ordered maps are kept: one in recency order for LRU eviction and one
+    in write order for expiry. Every entry in a region shares the same TTL,
+    so write order is also expiry order and the sweep only touches entries
+    that have actually expired. (Entries copied from a shared tier keep an
+    earlier expiry; the sweep may reach them late, but reads check expiry.)
+    """
+
+    def __init__(self, name: str, config: RegionConfig):
+        self.name = name
+        self.config = config
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._expiry: "OrderedDict[Hashable, None]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, now: Optional[float] = None) -> Any:
+        """Return the value for key if present and not expired, else None."""
+        now = time.time() if now is None else now
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if now >= entry.expires_at:
+            if now >= entry.expires_at + self.config.retain_ttl:
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def get_entry(self, key: Hashable, now: Optional[float] = None) -> Optional[CacheEntry]:
+        """
+        Return the entry for key if it is fresh or within the stale window.
+        Callers use CacheEntry.is_fresh() to decide whether to revalidate.
+        """
+        now = time.time() if now is None else now
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if now >= entry.expires_at + self.config.stale_ttl:
+            if now >= entry.expires_at + self.config.retain_ttl:
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry.is_fresh(now):
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for key, if any, without touching LRU order or stats."""
+        return self._entries.get(key)
+
+    def fallback(self, key: Hashable, now: Optional[float] = None) -> Optional[CacheEntry]:
+        """
+        Return the entry for key however old it is, as long as it is still
+        retained (see RegionConfig.fallback_ttl). For use when the upstream
+        cannot be reached; does not touch LRU order or stats.
+        """
+        now = time.time() if now is None else now
+        entry = self._entries.get(key)
+        if entry is None or now >= entry.expires_at + self.config.retain_ttl:
+            return None
+        return entry
+
+    def set(self, key: Hashable, value: Any, now: Optional[float] = None, expires_at: Optional[float] = None):
+        """
+        Store value under key, evicting least recently used entries if over budget.
+        expires_at defaults to now + TTL; values shared between workers pass
+        their original stored time and expiry so the TTL is not restarted.
+        """
+        now = time.time() if now is None else now
+        expires_at = now + self.config.ttl if expires_at is None else expires_at
+        size = estimate_size(value)
+        if size > self.config.max_bytes:
+            logger.warning(f"Cache value for {self.name}:{key} ({size} bytes) exceeds region budget, not cached")
+            self.delete(key)
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = CacheEntry(value, now, expires_at, size)
+        self._expiry[key] = None
+        self.bytes += size
+
+        while len(self._entries) > self.config.max_entries or self.bytes > self.config.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Remove key if present."""
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        """Remove every entry in the region."""
+        self._entries.clear()
+        self._expiry.clear()
+        self.bytes = 0
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove entries past their TTL, stale and fallback windows. Returns the number removed."""
+        now = time.time() if now is None else now
+        retain_ttl = self.config.retain_ttl
+        removed = 0
+        while self._expiry:
+            key = next(iter(self._expiry))
+            if self._entries[key].expires_at + retain_ttl > now:
+                break
+            self._remove(key)
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    def export(self, now: Optional[float] = None) -> List[Tuple[Hashable, Any, float, float]]:
+        """
+        Return (key, value, stored_at, expires_at) for every live entry,
+        most recently used first.
+        """
+        now = time.time() if now is None else now
+        retain_ttl = self.config.retain_ttl
+        return [
+            (key, entry.value, entry.stored_at, entry.expires_at)
+            for key, entry in reversed(self._entries.items())
+            if entry.expires_at + retain_ttl > now
+        ]
+
+    def restore(self, records: List[Tuple[Hashable, Any, float, float]], now: Optional[float] = None) -> int:
+        """
+        Load exported records (most recently used first), keeping their
+        original timestamps. Entries already cached and entries no longer
+        retained are skipped. Restored entries count as older than
+        anything already cached. Returns the number of entries restored.
+        """
+        now = time.time() if now is None else now
+        retain_ttl = self.config.retain_ttl
+        restored = 0
+        for key, value, stored_at, expires_at in records:
+            if key in self._entries or expires_at + retain_ttl <= now:
+                continue
+            size = estimate_size(value)
+            if size > self.config.max_bytes:
+                continue
+            # Each record is older than the previous one, so it goes to the LRU end
+            self._entries[key] = CacheEntry(value, stored_at, expires_at, size)
+            self._entries.move_to_end(key, last=False)
+            self.bytes += size
+            restored += 1
+
+        # Restored entries carry their own expiry times, so rebuild expiry order
+        self._expiry = OrderedDict(
+            (key, None) for key in sorted(self._entries, key=lambda k: self._entries[k].expires_at)
+        )
+        while len(self._entries) > self.config.max_entries or self.bytes > self.config.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return restored
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        del self._expiry[key]
+        self.bytes -= entry.size
+
+    def stats(self) -> dict:
+        """Return hit, miss, eviction and size statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.config.max_entries,
+            "max_bytes": self.config.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class CacheEngine:
+    """
+    Collection of cache regions keyed by data type.
+    Owns the background task that sweeps expired entries.
+    """
+
+    def __init__(self, regions: Dict[str, RegionConfig]):
+        self.regions = {name: CacheRegion(name, config) for name, config in regions.items()}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def region(self, data_type: str) -> CacheRegion:
+        """Get the region for a data type."""
+        return self.regions[data_type]
+
+    def get(self, data_type: str, key: Hashable) -> Any:
+        """Return a cached value or None."""
+        return self.regions[data_type].get(key)
+
+    def get_entry(self, data_type: str, key: Hashable) -> Optional[CacheEntry]:
+        """Return a fresh or stale entry, or None."""
+        return self.regions[data_type].get_entry(key)
+
+    def peek(self, data_type: str, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for key without affecting LRU order or stats."""
+        return self.regions[data_type].peek(key)
+
+    def fallback(self, data_type: str, key: Hashable) -> Optional[CacheEntry]:
+        """Return a retained entry of any age, for serving while the upstream is down."""
+        return self.regions[data_type].fallback(key)
+
+    def set(self, data_type: str, key: Hashable, value: Any):
+        """Store a value in the region for data_type."""
+        self.regions[data_type].set(key, value)
+
+    def delete(self, data_type: str, key: Hashable):
+        """Remove a value from the region for data_type."""
+        self.regions[data_type].delete(key)
+
+    def sweep(self) -> int:
+        """Remove expired entries from every region."""
+        now = time.time()
+        return sum(region.sweep(now) for region in self.regions.values())
+
+    def stats(self) -> dict:
+        """Return statistics for every region."""
+        return {name: region.stats() for name, region in self.regions.items()}
+
+    def start_sweeper(self, interval: float):
+        """Start the background expiry sweep (called on app startup)."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop(interval))
+
+    async def stop_sweeper(self):
+        """Stop the background expiry sweep (called on app shutdown)."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = self.sweep()
+                if removed:
+                    logger.debug(f"Cache sweep removed {removed} expired entries")
+            except Exception as e:
+                logger.error(f"Cache sweep failed: {e}")
@@ -0,0 +1,376 @@
+"""
+Shared cache tier for running several uvicorn workers.
+
+Every worker keeps its own CacheEngine as the first tier. A cache backend
+is the second tier, shared by all workers, so a value one worker fetched
+from Alpha Vantage or OpenAI is reused by the others instead of costing
+another upstream call in each process.
+
+Backends (CACHE_BACKEND):
+- "memory": InProcessBackend, no shared tier (a single worker)
+- "local": RespBackend on a Unix socket served by cache_server.CacheServer,
+  hosted by whichever worker gets there first (no Redis needed)
+- "redis": RespBackend against Redis at CACHE_REDIS_URL
+
+Cache misses go through CacheBackend.load, which keeps the single-flight
+and TTL behaviour of the in-process cache across workers:
+- a fresh value already in the shared tier is used with its original
+  stored_at/expires_at, so the TTL and stale window line up everywhere
+- otherwise one worker takes a lock key (SET NX PX) and fetches, while the
+  others poll the shared tier until the value appears or the lock lapses
+
+If the shared tier is unreachable the backend behaves like "memory" until
+it can reconnect, so an outage costs hit ratio, not availability.
+
+Values are pickled, so the shared tier must be private to this app.
+"""
+
+import asyncio
+import logging
+import os
+import pickle
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlparse
+from app.config import settings
+from app.utils.cache import CacheRegion
+from app.utils.cache_server import RELEASE_SCRIPT, CacheServer
+from app.utils.resp import RespError, encode_command, read_reply
+
+logger = logging.getLogger(__name__)
+
+# Seconds between shared-tier checks while another worker holds the fetch lock
+LOCK_POLL_INTERVAL = 0.05
+
+# Seconds to stop using an unreachable shared tier before reconnecting
+RECONNECT_DELAY = 5.0
+
+SharedEntry = Tuple[Any, float, float]
+
+
+class CacheBackend:
+    """
+    Interface for the shared cache tier.
+    Subclasses provide get/set/acquire/release; load() builds the
+    cross-worker single-flight on top of them.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.lock_waits = 0
+        self.fetches = 0
+
+    async def get(self, region: str, key: Hashable) -> Optional[SharedEntry]:
+        """Return (value, stored_at, expires_at) from the shared tier, or None."""
+        raise NotImplementedError
+
+    async def set(self, region: str, key: Hashable, entry: SharedEntry, ttl: float):
+        """Store an entry in the shared tier for ttl seconds."""
+        raise NotImplementedError
+
+    async def acquire(self, region: str, key: Hashable, ttl: float) -> bool:
+        """Try to take the fetch lock for key. Returns whether it was taken."""
+        raise NotImplementedError
+
+    async def release(self, region: str, key: Hashable):
+        """Release the fetch lock for key."""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release connections and anything the backend hosts."""
+
+    def _use(self, region: CacheRegion, key: Hashable, entry: Optional[SharedEntry]) -> bool:
+        """Copy a fresh shared entry into the local region. Returns whether it was fresh."""
+        if entry is None or time.time() >= entry[2]:
+            return False
+        value, stored_at, expires_at = entry
+        region.set(key, value, now=stored_at, expires_at=expires_at)
+        self.shared_hits += 1
+        return True
+
+    async def load(self, region: CacheRegion, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Load key into the local region, fetching it at most once across workers.
+        Only successful fetches are stored; errors propagate to the caller.
+        """
+        lock_ttl = settings.CACHE_LOCK_TTL
+        deadline = time.monotonic() + lock_ttl
+        locked = False
+        waited = False
+        while True:
+            entry = await self.get(region.name, key)
+            if self._use(region, key, entry):
+                return entry[0]
+            if time.monotonic() >= deadline:
+                break
+            locked = await self.acquire(region.name, key, lock_ttl)
+            if locked:
+                break
+            if not waited:
+                waited = True
+                self.lock_waits += 1
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+        self.shared_misses += 1
+        self.fetches += 1
+        try:
+            value = await fetch()
+            now = time.time()
+            expires_at = now + region.config.ttl
+            region.set(key, value, now=now, expires_at=expires_at)
+            await self.set(region.name, key, (value, now, expires_at), region.config.ttl + region.config.stale_ttl)
+            return value
+        finally:
+            if locked:
+                await self.release(region.name, key)
+
+    def stats(self) -> dict:
+        """Return shared-tier counters."""
+        lookups = self.shared_hits + self.shared_misses
+        return {
+            "backend": self.name,
+            "shared_hits": self.shared_hits,
+            "shared_misses": self.shared_misses,
+            "shared_hit_ratio": round(self.shared_hits / lookups, 4) if lookups else 0.0,
+            "lock_waits": self.lock_waits,
+            "fetches": self.fetches
+        }
+
+
+class InProcessBackend(CacheBackend):
+    """No shared tier: every miss is fetched by the worker that had it."""
+
+    name = "memory"
+
+    async def load(self, region: CacheRegion, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        self.fetches += 1
+        value = await fetch()
+        region.set(key, value)
+        return value
+
+
+class RespBackend(CacheBackend):
+    """
+    Shared tier over the Redis protocol, either Redis itself (redis://host:port/db)
+    or the local cache server (unix:///path/to.sock).
+
+    Commands are pipelined on one connection: each request queues a future
+    and a reader task resolves them in reply order. With host=True and a
+    Unix socket, the first worker to take the host lock file serves the
+    socket itself.
+    """
+
+    def __init__(self, url: str, prefix: str = "cache", timeout: float = 0.5, host: bool = False):
+        super().__init__()
+        self.url = url
+        parsed = urlparse(url)
+        self.name = "local" if parsed.scheme == "unix" else "redis"
+        self._parsed = parsed
+        self.prefix = prefix
+        self.timeout = timeout
+        self.host = host
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Deque[asyncio.Future] = deque()
+        self._connect_lock = asyncio.Lock()
+        self._down_until = 0.0
+        self._server: Optional[CacheServer] = None
+        self._host_lock_fd: Optional[int] = None
+        # Token written to each lock key this worker holds, so it only releases its own
+        self._lock_tokens: Dict[Tuple[str, Hashable], str] = {}
+        self.errors = 0
+        self.command_errors = 0
+
+    def _key(self, region: str, key: Hashable) -> str:
+        return f"{self.prefix}:{region}:{key}"
+
+    def _lock_key(self, region: str, key: Hashable) -> str:
+        return f"{self.prefix}:lock:{region}:{key}"
+
+    async def _host_server(self, path: str):
+        """Serve the socket from this worker if no other worker holds the host lock."""
+        import fcntl
+
+        if self._server is not None:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(f"{path}.lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return
+        # The lock is held for the life of the process, so a crashed host frees it
+        self._host_lock_fd = fd
+        server = CacheServer(settings.CACHE_LOCAL_MAX_BYTES)
+        await server.serve_unix(path)
+        self._server = server
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        parsed = self._parsed
+        if parsed.scheme == "unix":
+            path = parsed.path if not parsed.netloc else parsed.netloc + parsed.path
+            try:
+                return await asyncio.open_unix_connection(path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not self.host:
+                    raise
+                await self._host_server(path)
+                return await asyncio.open_unix_connection(path)
+        return await asyncio.open_connection(parsed.hostname or "localhost", parsed.port or 6379)
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            reader, writer = await asyncio.wait_for(self._open(), self.timeout)
+            self._reader, self._writer = reader, writer
+            self._reader_task = asyncio.create_task(self._read_loop(reader))
+            try:
+                if self._parsed.password:
+                    await self._send("AUTH", self._parsed.password)
+                db = self._parsed.path.strip("/") if self._parsed.scheme != "unix" else ""
+                if db:
+                    await self._send("SELECT", db)
+            except RespError as e:
+                # Unusable connection, unlike an error reply to a single command
+                raise ConnectionError(f"Shared cache rejected the connection: {e}") from e
+            logger.info(f"Connected to shared cache at {self._parsed.scheme}://{self._parsed.hostname or self._parsed.path}")
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                reply = await read_reply(reader)
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError) as e:
+            # A reader for a connection that was already replaced must not drop the new one
+            if reader is self._reader:
+                self._disconnect(ConnectionError(f"Shared cache connection lost: {e}"))
+
+    def _disconnect(self, error: Exception):
+        writer, self._writer, self._reader = self._writer, None, None
+        task, self._reader_task = self._reader_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        if writer is not None:
+            writer.close()
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def _send(self, *args) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(encode_command(*args))
+        reply = await asyncio.wait_for(future, self.timeout)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    async def execute(self, *args) -> Any:
+        """
+        Run a command, connecting if needed.
+        Returns None without trying while the shared tier is marked down,
+        and None for an error reply, which only fails this command.
+        """
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            if self._writer is None:
+                await self._connect()
+            return await self._send(*args)
+        except RespError as e:
+            self.command_errors += 1
+            logger.warning(f"Shared cache command {args[0]} failed: {e}")
+            return None
+        except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+            self.errors += 1
+            self._down_until = time.monotonic() + RECONNECT_DELAY
+            self._disconnect(ConnectionError(str(e)))
+            logger.warning(f"Shared cache unavailable ({e!r}); using the local cache only for {RECONNECT_DELAY}s")
+            return None
+
+    async def get(self, region: str, key: Hashable) -> Optional[SharedEntry]:
+        data = await self.execute("GET", self._key(region, key))
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable shared cache entry {region}:{key}: {e}")
+            return None
+
+    async def set(self, region: str, key: Hashable, entry: SharedEntry, ttl: float):
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        await self.execute("SET", self._key(region, key), data, "PX", max(1, int(ttl * 1000)))
+
+    async def acquire(self, region: str, key: Hashable, ttl: float) -> bool:
+        if time.monotonic() < self._down_until:
+            return True
+        token = f"{os.getpid()}:{uuid.uuid4().hex}"
+        reply = await self.execute("SET", self._lock_key(region, key), token, "NX", "PX", max(1, int(ttl * 1000)))
+        if reply is not None:
+            self._lock_tokens[(region, key)] = token
+            return True
+        # None means either "already locked" or "shared tier down"; only wait in the first case
+        return time.monotonic() < self._down_until
+
+    async def release(self, region: str, key: Hashable):
+        # A fill that outlived the lock TTL must not delete another worker's lock
+        token = self._lock_tokens.pop((region, key), None)
+        if token is not None:
+            await self.execute("EVAL", RELEASE_SCRIPT, 1, self._lock_key(region, key), token)
+
+    async def close(self):
+        self._disconnect(ConnectionError("Shared cache closed"))
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+        if self._host_lock_fd is not None:
+            os.close(self._host_lock_fd)
+            self._host_lock_fd = None
+
+    def stats(self) -> dict:
+        stats = {
+            **super().stats(),
+            "errors": self.errors,
+            "command_errors": self.command_errors,
+            "connected": self._writer is not None
+        }
+        if self._server is not None:
+            stats["hosted_server"] = self._server.stats()
+        return stats
+
+
+def create_cache_backend() -> CacheBackend:
+    """Create the backend selected by CACHE_BACKEND."""
+    kind = settings.CACHE_BACKEND
+    if kind == "local":
+        path = os.path.abspath(settings.CACHE_SOCKET_PATH)
+        return RespBackend(f"unix://{path}", timeout=settings.CACHE_BACKEND_TIMEOUT, host=True)
+    if kind == "redis":
+        return RespBackend(settings.CACHE_REDIS_URL, timeout=settings.CACHE_BACKEND_TIMEOUT)
+    if kind != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND {kind!r}, using in-process caching only")
+    return InProcessBackend()
+
+
+# Global backend shared by every cache in this worker (connects on first use)
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    """Get the global shared-tier backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_cache_backend()
+    return _backend
@@ -0,0 +1,253 @@
+"""
+Small Redis-compatible cache server for sharing a cache between workers.
+
+Implements the subset of commands the RESP cache backend uses (PING, GET,
+SET with EX/PX/NX, DEL, EXISTS, DBSIZE, FLUSHDB, and EVAL of the lock
+release script only) with per-key expiry and an LRU byte budget. It listens on a Unix socket so every uvicorn worker on
+the host can share it without running Redis, and it doubles as a local
+stand-in for testing the Redis client.
+
+One worker hosts it (see RespBackend); it can also run on its own:
+
+    python -m app.utils.cache_server --socket data/cache.sock
+    python -m app.utils.cache_server --port 6390
+"""
+
+import argparse
+import asyncio
+import heapq
+import logging
+import os
+import socket
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from app.utils.resp import RespError, encode_reply, read_command
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = 1.0
+
+# Deletes a lock key only if it still holds the caller's token (KEYS[1], ARGV[1])
+RELEASE_SCRIPT = 'if redis.call("GET", KEYS[1]) == ARGV[1] then return redis.call("DEL", KEYS[1]) else return 0 end'
+
+
+class CacheServer:
+    """In-memory key/value store with expiry, served over RESP."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # key -> (value, expires_at or None), in LRU order
+        self._data: "OrderedDict[bytes, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        # (expires_at, key) min-heap; entries are checked against _data when popped
+        self._expiry: List[Tuple[float, bytes]] = []
+        self.bytes = 0
+        self.commands = 0
+        self.evictions = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def _alive(self, key: bytes, now: float) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and now >= expires_at:
+            self._remove(key)
+            return None
+        return value
+
+    def _remove(self, key: bytes):
+        value, _ = self._data.pop(key)
+        self.bytes -= len(key) + len(value)
+
+    def _store(self, key: bytes, value: bytes, expires_at: Optional[float]):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, expires_at)
+        self.bytes += len(key) + len(value)
+        if expires_at is not None:
+            heapq.heappush(self._expiry, (expires_at, key))
+        while self.bytes > self.max_bytes and self._data:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove expired keys. Returns the number removed."""
+        now = time.monotonic() if now is None else now
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            item = self._data.get(key)
+            # Skip heap entries left behind by a later SET of the same key
+            if item is not None and item[1] == expires_at:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def _set(self, args: List[bytes], now: float):
+        if len(args) < 2:
+            return RespError("ERR wrong number of arguments for 'set' command")
+        key, value = args[0], args[1]
+        expires_at = None
+        only_new = False
+        options = [a.upper() for a in args[2:]]
+        i = 0
+        while i < len(options):
+            option = options[i]
+            if option in (b"EX", b"PX") and i + 1 < len(options):
+                amount = int(options[i + 1])
+                if amount <= 0:
+                    return RespError("ERR invalid expire time in 'set' command")
+                expires_at = now + (amount if option == b"EX" else amount / 1000)
+                i += 2
+            elif option == b"NX":
+                only_new = True
+                i += 1
+            else:
+                return RespError("ERR syntax error")
+        if only_new and self._alive(key, now) is not None:
+            return None
+        self._store(key, value, expires_at)
+        return "OK"
+
+    def _eval(self, args: List[bytes], now: float):
+        """Run RELEASE_SCRIPT; no other script is supported."""
+        if len(args) != 4 or args[0].decode(errors="replace") != RELEASE_SCRIPT or args[1] != b"1":
+            return RespError("ERR only the lock release script is supported")
+        key, token = args[2], args[3]
+        if self._alive(key, now) != token:
+            return 0
+        self._remove(key)
+        return 1
+
+    def execute(self, command: List[bytes]):
+        """Run one command and return its reply value."""
+        self.commands += 1
+        name = command[0].upper()
+        args = command[1:]
+        now = time.monotonic()
+        if name == b"GET" and len(args) == 1:
+            value = self._alive(args[0], now)
+            if value is not None:
+                self._data.move_to_end(args[0])
+            return value
+        if name == b"SET":
+            return self._set(args, now)
+        if name == b"DEL":
+            removed = 0
+            for key in args:
+                if self._alive(key, now) is not None:
+                    self._remove(key)
+                    removed += 1
+            return removed
+        if name == b"EVAL":
+            return self._eval(args, now)
+        if name == b"EXISTS":
+            return sum(1 for key in args if self._alive(key, now) is not None)
+        if name == b"PING":
+            return args[0] if args else "PONG"
+        if name == b"DBSIZE":
+            return len(self._data)
+        if name == b"FLUSHDB":
+            self._data.clear()
+            self._expiry.clear()
+            self.bytes = 0
+            return "OK"
+        if name in (b"SELECT", b"AUTH", b"CLIENT"):
+            return "OK"
+        return RespError(f"ERR unknown command '{name.decode(errors='replace')}'")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while True:
+                try:
+                    command = await read_command(reader)
+                except RespError as e:
+                    writer.write(encode_reply(e))
+                    break
+                if command is None:
+                    break
+                try:
+                    reply = self.execute(command)
+                except ValueError:
+                    reply = RespError("ERR value is not an integer or out of range")
+                writer.write(encode_reply(reply))
+                # Only wait for the socket when replies are piling up
+                if writer.transport.get_write_buffer_size() > 64 * 1024:
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.sweep()
+
+    async def serve_unix(self, path: str):
+        """Listen on a Unix socket, replacing a leftover socket file nobody is listening on."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise OSError(f"A cache server is already listening on {path}")
+            finally:
+                probe.close()
+        self._server = await asyncio.start_unix_server(self._handle, path)
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+        logger.info(f"Cache server listening on {path}")
+
+    async def serve_tcp(self, host: str, port: int):
+        """Listen on a TCP port."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+        logger.info(f"Cache server listening on {host}:{port}")
+
+    async def close(self):
+        """Stop listening, disconnect clients (so they can fail over) and stop the expiry sweep."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for writer in list(self._clients):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return key count, size and command counters."""
+        return {
+            "keys": len(self._data),
+            "bytes": self.bytes,
+            "commands": self.commands,
+            "evictions": self.evictions
+        }
+
+
+async def _main(args: argparse.Namespace):
+    server = CacheServer(args.max_bytes)
+    if args.port:
+        await server.serve_tcp(args.host, args.port)
+    else:
+        await server.serve_unix(args.socket)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--socket", default="data/cache.sock", help="Unix socket path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Listen on TCP instead of a Unix socket")
+    parser.add_argument("--max-bytes", type=int, default=256 * 1024 * 1024)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,186 @@
+"""
+Cache snapshots for warm restarts.
+
+A CacheEngine can be written to a local file periodically and on shutdown,
+and reloaded on startup, so a deploy does not start every worker with an
+empty cache and send a burst of upstream calls.
+
+File format:
+
+    header: magic (8 bytes), version (uint32), written_at (float64)
+    records: length (uint32) + pickle of (region, key, value, stored_at, expires_at)
+
+Records are written most recently used first. Loading stops at the time
+budget, so the entries most likely to be needed are the ones restored.
+A truncated or corrupt tail simply ends the load.
+
+Snapshots are pickles and must only be read from files this app wrote.
+"""
+
+import asyncio
+import logging
+import os
+import pickle
+import struct
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from app.utils.cache import CacheEngine
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CACHESNP"
+VERSION = 1
+HEADER = struct.Struct("<8sId")
+LENGTH = struct.Struct("<I")
+
+Record = Tuple[str, Hashable, Any, float, float]
+
+
+def write_snapshot(path: str, records: List[Record]):
+    """Write records to path atomically (write a temporary file, then replace)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, time.time()))
+        for record in records:
+            try:
+                data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.debug(f"Skipping unpicklable cache entry {record[0]}:{record[1]}: {e}")
+                continue
+            f.write(LENGTH.pack(len(data)))
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str, budget: float) -> List[Record]:
+    """
+    Read records from path until the file ends or budget seconds pass.
+    Returns an empty list if the file is missing or not a snapshot.
+    """
+    deadline = time.monotonic() + budget
+    records: List[Record] = []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return records
+
+    with f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return records
+        magic, version, _ = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            logger.warning(f"Ignoring cache snapshot {path} with unknown format")
+            return records
+
+        while time.monotonic() < deadline:
+            prefix = f.read(LENGTH.size)
+            if len(prefix) < LENGTH.size:
+                break
+            (length,) = LENGTH.unpack(prefix)
+            data = f.read(length)
+            if len(data) < length:
+                logger.warning(f"Cache snapshot {path} is truncated")
+                break
+            try:
+                records.append(pickle.loads(data))
+            except Exception as e:
+                logger.warning(f"Stopping at corrupt record in cache snapshot {path}: {e}")
+                break
+        else:
+            logger.info(f"Cache snapshot load from {path} hit its {budget}s budget")
+    return records
+
+
+def export_engine(engine: CacheEngine) -> List[Record]:
+    """Collect every live entry of an engine, most recently used first per region."""
+    now = time.time()
+    records: List[Record] = []
+    for name, region in engine.regions.items():
+        records.extend((name, *entry) for entry in region.export(now))
+    return records
+
+
+def restore_engine(engine: CacheEngine, records: List[Record]) -> int:
+    """Load records into an engine's regions. Returns the number restored."""
+    by_region: Dict[str, list] = {}
+    for name, key, value, stored_at, expires_at in records:
+        if name in engine.regions:
+            by_region.setdefault(name, []).append((key, value, stored_at, expires_at))
+    now = time.time()
+    return sum(engine.regions[name].restore(entries, now) for name, entries in by_region.items())
+
+
+class CacheSnapshotter:
+    """
+    Periodically snapshots a CacheEngine to a file and restores it on startup.
+    Serialization and file I/O run in a worker thread.
+    """
+
+    def __init__(self, engine: CacheEngine, path: str, interval: float):
+        self.engine = engine
+        self.path = path
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.restored = 0
+        self.saved = 0
+        self.last_saved_at: Optional[float] = None
+
+    async def load(self, budget: float) -> int:
+        """Restore the engine from its snapshot, reading for at most budget seconds."""
+        started = time.monotonic()
+        try:
+            records = await asyncio.wait_for(asyncio.to_thread(read_snapshot, self.path, budget), budget + 1.0)
+        except Exception as e:
+            logger.warning(f"Failed to load cache snapshot {self.path}: {e}")
+            return 0
+        self.restored = restore_engine(self.engine, records)
+        logger.info(
+            f"Restored {self.restored} of {len(records)} cache entries from {self.path} "
+            f"in {time.monotonic() - started:.3f}s"
+        )
+        return self.restored
+
+    async def save(self):
+        """Write the engine's current entries to the snapshot file."""
+        # Collect references on the event loop; values are never mutated in place
+        records = export_engine(self.engine)
+        await asyncio.to_thread(write_snapshot, self.path, records)
+        self.saved = len(records)
+        self.last_saved_at = time.time()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Cache snapshot to {self.path} failed: {e}")
+
+    def start(self):
+        """Start periodic snapshots."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic snapshots and write a final one."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.save()
+        except Exception as e:
+            logger.error(f"Final cache snapshot to {self.path} failed: {e}")
+
+    def stats(self) -> dict:
+        """Return restore/save counts."""
+        return {
+            "restored": self.restored,
+            "saved": self.saved,
+            "last_saved_at": self.last_saved_at
+        }
@@ -0,0 +1,217 @@
+"""
+Circuit breakers with adaptive timeouts for upstream services.
+
+A slow upstream used to hold every request for the full fixed timeout, so
+a slowdown at Alpha Vantage tied up the whole worker. Each upstream now
+gets a breaker that:
+
+- times calls out at a multiple of its recent p99 latency, clamped to
+  [min_timeout, max_timeout]. Timed-out calls count as samples at the
+  timeout, so the limit rises if the upstream is slow for a long time.
+- opens after failure_threshold consecutive failures. While it is open,
+  calls fail at once with CircuitOpenError, which callers can answer
+  from stale cached data.
+- after reset_timeout, lets one probe call through with max_timeout
+  (half-open). A success closes the circuit; a failure opens it again.
+
+Only errors the is_failure predicate accepts count against the upstream
+(timeouts, connection errors, 5xx). An answer such as 404 or a rate-limit
+notice shows the service is up, so it does not count.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+from app.config import settings
+from app.utils.exceptions import CircuitOpenError, UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Latency samples needed before the adaptive timeout replaces max_timeout
+MIN_SAMPLES = 20
+
+# Recompute the latency percentile after this many new samples
+PERCENTILE_REFRESH = 10
+
+
+def _any_error(error: BaseException) -> bool:
+    return True
+
+
+class CircuitBreaker:
+    """Circuit breaker and adaptive timeout for one upstream service."""
+
+    def __init__(
+        self,
+        name: str,
+        max_timeout: float,
+        is_failure: Callable[[BaseException], bool] = _any_error,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        min_timeout: Optional[float] = None,
+        multiplier: Optional[float] = None,
+        window: int = 200
+    ):
+        self.name = name
+        self.max_timeout = max_timeout
+        self.is_failure = is_failure
+        self.failure_threshold = settings.BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.reset_timeout = settings.BREAKER_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.min_timeout = settings.BREAKER_MIN_TIMEOUT if min_timeout is None else min_timeout
+        self.multiplier = settings.BREAKER_TIMEOUT_MULTIPLIER if multiplier is None else multiplier
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._p99: Optional[float] = None
+        self._new_samples = 0
+
+        # Metrics
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _record_latency(self, seconds: float):
+        self._latencies.append(seconds)
+        self._new_samples += 1
+        if self._new_samples >= PERCENTILE_REFRESH or self._p99 is None:
+            self._new_samples = 0
+            if len(self._latencies) >= MIN_SAMPLES:
+                ordered = sorted(self._latencies)
+                self._p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    def timeout(self) -> float:
+        """Current timeout for a call in the closed state."""
+        if self._p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self._p99 * self.multiplier))
+
+    def is_open(self) -> bool:
+        """Check whether calls are currently being rejected without trying."""
+        if self.state == OPEN:
+            return time.monotonic() < self.opened_at + self.reset_timeout
+        return self.state == HALF_OPEN and self._probe_in_flight
+
+    def check(self):
+        """Raise CircuitOpenError if the circuit is rejecting calls (e.g. before queueing one)."""
+        if self.is_open():
+            self.rejected += 1
+            raise CircuitOpenError(self.name)
+
+    def _admit(self) -> Tuple[float, bool]:
+        """Return (timeout, is_probe) for a new call, or raise CircuitOpenError."""
+        if self.state == OPEN and time.monotonic() >= self.opened_at + self.reset_timeout:
+            self.state = HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open, sending a probe")
+        if self.state == CLOSED:
+            return self.timeout(), False
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return self.max_timeout, True
+        self.rejected += 1
+        raise CircuitOpenError(self.name)
+
+    def _on_success(self, probe: bool):
+        self.consecutive_failures = 0
+        if probe:
+            self._probe_in_flight = False
+            self.state = CLOSED
+            logger.info(f"Circuit for {self.name} closed")
+
+    def _on_failure(self, probe: bool):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if probe:
+            self._probe_in_flight = False
+        if probe or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            logger.warning(
+                f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failures; "
+                f"failing fast for {self.reset_timeout}s"
+            )
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn() under the breaker and the adaptive timeout.
+        Raises CircuitOpenError without calling fn while the circuit is open,
+        and UpstreamUnavailableError (UPSTREAM_TIMEOUT) if fn is too slow.
+        """
+        timeout, probe = self._admit()
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(fn(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            # A timed-out call took at least this long; counting it lets the limit adapt upward
+            self._record_latency(timeout)
+            self._on_failure(probe)
+            raise UpstreamUnavailableError(f"{self.name} did not respond within {timeout:.1f}s", "UPSTREAM_TIMEOUT")
+        except asyncio.CancelledError:
+            if probe:
+                self._probe_in_flight = False
+            raise
+        except Exception as e:
+            if self.is_failure(e):
+                self._on_failure(probe)
+            else:
+                self._record_latency(time.monotonic() - started)
+                self._on_success(probe)
+            raise
+        self._record_latency(time.monotonic() - started)
+        self._on_success(probe)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return state, timeout and failure counters."""
+        return {
+            "state": self.state,
+            "timeout": round(self.timeout(), 3),
+            "p99_latency": round(self._p99, 3) if self._p99 is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened
+        }
+
+
+# Global breakers by upstream name
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(
+    name: str,
+    max_timeout: float,
+    is_failure: Callable[[BaseException], bool] = _any_error,
+    min_timeout: Optional[float] = None
+) -> CircuitBreaker:
+    """
+    Get the breaker for an upstream, creating it on first use.
+    max_timeout, is_failure and min_timeout only apply when it is created;
+    min_timeout equal to max_timeout gives a fixed timeout.
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name, max_timeout, is_failure, min_timeout=min_timeout)
+        _breakers[name] = breaker
+    return breaker
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every breaker, for the metrics endpoint."""
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
@@ -1,23 +1,22 @@
 """FastAPI dependencies for Supabase Auth validation."""
 
-from fastapi import Depends, HTTPException, Header
+import asyncio
+import logging
+import httpx
+from fastapi import Depends, HTTPException, Header, Query
+from gotrue.errors import AuthRetryableError
 from supabase import Client
-from app.database import get_supabase
+from app.database import get_supabase, get_supabase_breaker
+from app.utils.exceptions import UpstreamUnavailableError
 
+logger = logging.getLogger(__name__)
 
-async def get_current_user(
-    authorization: str = Header(None),
-    supabase: Client = Depends(get_supabase)
-) -> dict:
+
+def authenticate_token(token: str, supabase: Client) -> dict:
     """
-    Validate Supabase JWT token and return user data.
-    Raises 401 if token is invalid or missing.
+    Validate a Supabase access token and return the app user's data.
+    Raises 401 if the token is invalid, 404 if the user row is missing.
     """
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(401, "Missing or invalid authorization header")
-    
-    token = authorization.split(" ")[1]
-    
     try:
         # Validate token with Supabase Auth
         user_response = supabase.auth.get_user(token)
@@ -37,6 +36,49 @@ async def get_current_user(
         
     except HTTPException:
         raise
+    except (httpx.TransportError, AuthRetryableError):
+        # Supabase is unreachable, not the token's fault; let the breaker see it
+        raise
     except Exception as e:
-        print(f"Auth error: {str(e)}")
+        logger.warning(f"Auth error: {str(e)}")
         raise HTTPException(401, "Could not validate credentials")
+
+
+async def authenticate(token: str, supabase: Client) -> dict:
+    """
+    Run authenticate_token off the event loop through the Supabase circuit breaker.
+    Raises UpstreamUnavailableError (503) if Supabase is down or too slow.
+    """
+    try:
+        return await get_supabase_breaker().call(lambda: asyncio.to_thread(authenticate_token, token, supabase))
+    except (httpx.TransportError, AuthRetryableError) as e:
+        raise UpstreamUnavailableError(f"Authentication service unavailable: {e}")
+
+
+async def get_current_user(
+    authorization: str = Header(None),
+    supabase: Client = Depends(get_supabase)
+) -> dict:
+    """
+    Validate Supabase JWT token and return user data.
+    Raises 401 if token is invalid or missing.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(401, "Missing or invalid authorization header")
+    
+    token = authorization.split(" ")[1]
+    return await authenticate(token, supabase)
+
+
+async def get_current_user_from_query(
+    token: str = Query(None, description="Access token (for clients that cannot send headers, e.g. EventSource)"),
+    supabase: Client = Depends(get_supabase)
+) -> dict:
+    """
+    Validate a Supabase JWT passed as the `token` query parameter.
+    Used by streaming endpoints, since browsers cannot set an
+    Authorization header on EventSource or WebSocket connections.
+    """
+    if not token:
+        raise HTTPException(401, "Missing token")
+    return await authenticate(token, supabase)
@@ -16,3 +16,37 @@ class AppException(Exception):
         self.error_code = error_code
         self.status_code = status_code
         super().__init__(self.message)
+
+
+class UpstreamUnavailableError(AppException):
+    """Raised when an upstream API call cannot be made or completed in time."""
+    
+    def __init__(
+        self,
+        message: str,
+        error_code: str = "UPSTREAM_UNAVAILABLE",
+        status_code: int = 503
+    ):
+        super().__init__(message, error_code, status_code)
+
+
+class UpstreamRateLimitedError(UpstreamUnavailableError):
+    """Raised when the market data API answers with a rate-limit or usage notice instead of data."""
+    
+    def __init__(self, message: str):
+        super().__init__(message, "UPSTREAM_RATE_LIMITED", 503)
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """Raised without calling an upstream whose circuit breaker is open."""
+    
+    def __init__(self, upstream: str):
+        super().__init__(f"{upstream} is temporarily unavailable", "UPSTREAM_CIRCUIT_OPEN", 503)
+
+
+class UpstreamNotFoundError(ValueError):
+    """
+    Raised when the market data API has no data for a symbol or query.
+    Subclasses ValueError so existing "not found" handling is unchanged;
+    unlike rate-limit responses, these outcomes are negative-cached.
+    """
@@ -1,41 +1,87 @@
 """Utility functions for holding calculations to eliminate duplicate logic."""
 
+import logging
 from decimal import Decimal
-from typing import Dict
-import asyncio
-from app.schemas.portfolio import HoldingResponse
-from app.services.stock_service import get_stock_quote
+from typing import Dict, List
+from app.schemas.portfolio import HoldingResponse, PortfolioResponse
+from app.services.stock_service import get_stock_quotes
+from app.services.upstream_scheduler import Priority
 
+logger = logging.getLogger(__name__)
 
-def calculate_holding_metrics(
-    holding: dict,
-    current_price: Decimal
-) -> HoldingResponse:
+# Constants reused for every holding
+ZERO = Decimal("0")
+HUNDRED = Decimal("100")
+
+
+def value_portfolio(holdings: List[dict], current_prices: Dict[str, Decimal]) -> PortfolioResponse:
     """
-    Calculate holding metrics including current value and unrealized P/L.
-    Centralizes calculation logic used across multiple portfolio endpoints.
+    Value every holding and the portfolio as a whole in a single pass.
+    
+    shares and average_cost are converted to Decimal once per holding, and
+    the per-holding metrics feed the portfolio totals directly instead of
+    being recomputed. Holdings without a price are valued at average_cost.
+    
+    The response is validated in one call over plain dicts rather than one
+    HoldingResponse per holding, which dominates for portfolios with tens
+    of thousands of positions.
     """
-    shares = Decimal(str(holding["shares"]))
-    average_cost = Decimal(str(holding["average_cost"]))
+    total_value = ZERO
+    total_invested = ZERO
+    rows = []
+    append = rows.append
     
-    current_value = shares * current_price
-    unrealized_pl = (current_price - average_cost) * shares
-    unrealized_pl_percent = (
-        (unrealized_pl / (average_cost * shares) * 100) 
-        if shares > 0 
-        else Decimal("0")
-    )
+    for holding in holdings:
+        shares = Decimal(str(holding["shares"]))
+        average_cost = Decimal(str(holding["average_cost"]))
+        current_price = current_prices.get(holding["symbol"], average_cost)
+        
+        current_value = shares * current_price
+        invested = average_cost * shares
+        unrealized_pl = (current_price - average_cost) * shares
+        
+        total_value += current_value
+        total_invested += invested
+        append({
+            "symbol": holding["symbol"],
+            "company_name": holding["company_name"],
+            "shares": shares,
+            "average_cost": average_cost,
+            "current_price": current_price,
+            "current_value": current_value,
+            "unrealized_pl": unrealized_pl,
+            "unrealized_pl_percent": unrealized_pl / invested * HUNDRED if invested > 0 else ZERO,
+            "purchased_at": holding["purchased_at"]
+        })
+    
+    profit_loss = total_value - total_invested
+    return PortfolioResponse.model_validate({
+        "total_value": total_value,
+        "total_invested": total_invested,
+        "profit_loss": profit_loss,
+        "profit_loss_percent": (profit_loss / total_invested * HUNDRED) if total_invested > 0 else ZERO,
+        "holdings": rows
+    })
+
+
+def reprice_holding(portfolio: PortfolioResponse, holding: HoldingResponse, current_price: Decimal):
+    """
+    Update one holding of a valued portfolio to a new price, in place.
+    Only that holding's metrics are recomputed; the portfolio totals are
+    adjusted by the change in its value.
+    """
+    previous_value = holding.current_value
+    invested = holding.average_cost * holding.shares
     
-    return HoldingResponse(
-        symbol=holding["symbol"],
-        company_name=holding["company_name"],
-        shares=shares,
-        average_cost=average_cost,
-        current_price=current_price,
-        current_value=current_value,
-        unrealized_pl=unrealized_pl,
-        unrealized_pl_percent=unrealized_pl_percent,
-        purchased_at=holding["purchased_at"]
+    holding.current_price = current_price
+    holding.current_value = holding.shares * current_price
+    holding.unrealized_pl = (current_price - holding.average_cost) * holding.shares
+    holding.unrealized_pl_percent = holding.unrealized_pl / invested * HUNDRED if invested > 0 else ZERO
+    
+    portfolio.total_value += holding.current_value - previous_value
+    portfolio.profit_loss = portfolio.total_value - portfolio.total_invested
+    portfolio.profit_loss_percent = (
+        (portfolio.profit_loss / portfolio.total_invested * HUNDRED) if portfolio.total_invested > 0 else ZERO
     )
 
 
@@ -44,24 +90,21 @@ async def get_current_prices_map(holdings: list) -> Dict[str, Decimal]:
     Get current prices for holdings from Alpha Vantage API.
     Falls back to average_cost if API call fails.
     """
-    prices = {}
+    # Fetch all prices in one batch (cache hits served directly, misses fetched together)
+    quotes, errors = await get_stock_quotes(
+        [holding["symbol"] for holding in holdings],
+        Priority.VALUATION
+    )
     
-    # Fetch all prices concurrently for better performance
-    async def fetch_price(holding: dict) -> tuple[str, Decimal]:
+    prices = {}
+    for holding in holdings:
         symbol = holding["symbol"]
-        try:
-            quote = await get_stock_quote(symbol)
-            return (symbol, quote.current_price)
-        except Exception as e:
+        quote = quotes.get(symbol.upper())
+        if quote is not None:
+            prices[symbol] = quote.current_price
+        else:
             # Fallback to average_cost if API call fails
-            print(f"Failed to fetch price for {symbol}: {e}")
-            return (symbol, Decimal(str(holding["average_cost"])))
-    
-    # Fetch all prices in parallel
-    results = await asyncio.gather(*[fetch_price(h) for h in holdings])
-    
-    # Build the prices dictionary
-    for symbol, price in results:
-        prices[symbol] = price
+            logger.warning(f"Failed to fetch price for {symbol}: {errors.get(symbol.upper())}")
+            prices[symbol] = Decimal(str(holding["average_cost"]))
     
     return prices
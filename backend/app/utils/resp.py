@@ -0,0 +1,86 @@
+"""
+Minimal Redis serialization protocol (RESP2) helpers.
+Shared by the RESP cache client and the local cache server.
+"""
+
+import asyncio
+from typing import Any, List, Optional, Union
+
+
+class RespError(Exception):
+    """An error reply ("-ERR ...") from the server."""
+
+
+def _to_bytes(value: Union[bytes, str, int, float]) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+def encode_command(*args: Union[bytes, str, int, float]) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = _to_bytes(arg)
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def encode_reply(value: Any) -> bytes:
+    """
+    Encode a server reply: str -> simple string, int -> integer,
+    bytes -> bulk string, None -> null, list -> array, RespError -> error.
+    """
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as RESP")
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """
+    Read one RESP value. Error replies are returned (not raised) as RespError.
+    Raises ConnectionError if the stream ends.
+    """
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Invalid RESP type byte {kind!r}")
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """Read one client command (an array of bulk strings), or None at end of stream."""
+    try:
+        command = await read_reply(reader)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        return None
+    if not isinstance(command, list) or not command:
+        raise RespError("ERR expected a command array")
+    return command
@@ -0,0 +1,68 @@
+"""
+Single-flight request coalescing.
+Ensures only one upstream fetch per key is in flight at a time.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key (the leader) starts the fetch as a task and
+    every caller that arrives while it is running awaits the same task.
+    Results and errors are delivered to all waiters, and the key is released
+    as soon as the fetch finishes so nothing is remembered between flights.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.leader_requests = 0
+        self.coalesced_requests = 0
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Return the running fetch task for key, starting fn() if there is none.
+        The task is registered immediately, so later callers always join it.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leader_requests += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+        else:
+            self.coalesced_requests += 1
+        return task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key, or join the fetch already running for key.
+
+        The fetch runs in its own task and waiters are shielded, so one
+        cancelled caller (e.g. a dropped client connection) does not cancel
+        the fetch for everyone else.
+        """
+        return await asyncio.shield(self.start(key, fn))
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        """Forget a finished fetch and mark its exception as retrieved."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Waiters see the exception through shield(); avoid "never retrieved" warnings
+            task.exception()
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check whether a fetch for key is currently running."""
+        return key in self._in_flight
+
+    def stats(self) -> dict:
+        """Return coalescing counters."""
+        return {
+            "leader_requests": self.leader_requests,
+            "coalesced_requests": self.coalesced_requests,
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,127 @@
+"""
+Benchmark: portfolio valuation for GET /api/portfolio.
+
+Compares the previous path with the single-pass value_portfolio() at 10,
+1,000 and 100,000 positions. The previous path walked the holdings twice:
+calculate_portfolio_metrics for the totals, then calculate_holding_metrics
+for one HoldingResponse per holding.
+
+Two stages are timed:
+
+- valuation: the holdings and price map become a PortfolioResponse.
+- encoding: the response model becomes JSON. The previous route returned
+  the model, and FastAPI dumped it, validated it again against
+  response_model and then encoded it. The route now encodes it once with
+  model_dump_json().
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_portfolio_valuation
+"""
+
+import json
+import random
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.schemas.portfolio import HoldingResponse, PortfolioResponse
+from app.utils.holding_calculator import value_portfolio
+
+SIZES = (10, 1_000, 100_000)
+
+
+def synthetic_portfolio(count: int) -> tuple:
+    """Build holdings rows shaped like Supabase results, and a price map."""
+    rng = random.Random(11)
+    start = datetime(2020, 1, 1)
+    holdings = []
+    prices = {}
+    for i in range(count):
+        symbol = f"S{i:06d}"
+        holdings.append({
+            "symbol": symbol,
+            "company_name": f"Company {i}",
+            "shares": round(rng.uniform(0.5, 5_000), 4),
+            "average_cost": round(rng.uniform(1, 900), 2),
+            "purchased_at": (start + timedelta(minutes=rng.randint(0, 2_000_000))).isoformat()
+        })
+        prices[symbol] = Decimal(f"{rng.uniform(1, 900):.4f}")
+    return holdings, prices
+
+
+def legacy_value(holdings: list, current_prices: dict) -> PortfolioResponse:
+    """The two-pass valuation used before value_portfolio()."""
+    total_value = Decimal("0")
+    total_invested = Decimal("0")
+    for holding in holdings:
+        shares = Decimal(str(holding["shares"]))
+        average_cost = Decimal(str(holding["average_cost"]))
+        current_price = current_prices.get(holding["symbol"], average_cost)
+        total_value += shares * current_price
+        total_invested += shares * average_cost
+    profit_loss = total_value - total_invested
+    profit_loss_percent = (profit_loss / total_invested * 100) if total_invested > 0 else Decimal("0")
+
+    holding_responses = []
+    for holding in holdings:
+        current_price = current_prices[holding["symbol"]]
+        shares = Decimal(str(holding["shares"]))
+        average_cost = Decimal(str(holding["average_cost"]))
+        unrealized_pl = (current_price - average_cost) * shares
+        holding_responses.append(HoldingResponse(
+            symbol=holding["symbol"],
+            company_name=holding["company_name"],
+            shares=shares,
+            average_cost=average_cost,
+            current_price=current_price,
+            current_value=shares * current_price,
+            unrealized_pl=unrealized_pl,
+            unrealized_pl_percent=unrealized_pl / (average_cost * shares) * 100 if shares > 0 else Decimal("0"),
+            purchased_at=holding["purchased_at"]
+        ))
+
+    return PortfolioResponse(
+        total_value=total_value,
+        total_invested=total_invested,
+        profit_loss=profit_loss,
+        profit_loss_percent=profit_loss_percent,
+        holdings=holding_responses
+    )
+
+
+def legacy_encode(portfolio: PortfolioResponse) -> str:
+    """What FastAPI does with a returned model: dump, validate against response_model, encode."""
+    validated = PortfolioResponse.model_validate(portfolio.model_dump(by_alias=True))
+    return json.dumps(validated.model_dump(mode="json"), separators=(",", ":"))
+
+
+def _time(fn, number: int) -> float:
+    return timeit.timeit(fn, number=number) / number
+
+
+def main():
+    for count in SIZES:
+        holdings, prices = synthetic_portfolio(count)
+        number = max(1, 20_000 // count)
+
+        legacy = legacy_value(holdings, prices)
+        single = value_portfolio(holdings, prices)
+        assert legacy == single, "valuations differ"
+
+        legacy_valuation = _time(lambda: legacy_value(holdings, prices), number)
+        valuation = _time(lambda: value_portfolio(holdings, prices), number)
+        legacy_encoding = _time(lambda: legacy_encode(legacy), number)
+        encoding = _time(lambda: single.model_dump_json(), number)
+
+        print(f"{count:,} positions")
+        print(f"  valuation  legacy {legacy_valuation * 1000:10.2f} ms   single-pass     {valuation * 1000:10.2f} ms"
+              f"   {legacy_valuation / valuation:5.1f}x")
+        print(f"  encoding   legacy {legacy_encoding * 1000:10.2f} ms   model_dump_json {encoding * 1000:10.2f} ms"
+              f"   {legacy_encoding / encoding:5.1f}x")
+        total_legacy = legacy_valuation + legacy_encoding
+        total = valuation + encoding
+        print(f"  total      legacy {total_legacy * 1000:10.2f} ms   new             {total * 1000:10.2f} ms"
+              f"   {total_legacy / total:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
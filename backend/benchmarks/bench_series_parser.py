@@ -0,0 +1,87 @@
+"""
+Benchmark: Alpha Vantage daily time series parsing.
+
+Compares the previous per-row path (strptime, four Decimals, a
+HistoricalPrice model and model_dump() per bar) with the columnar
+parse_time_series() parser.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_series_parser [payload.json]
+
+payload.json should be a recorded TIME_SERIES_DAILY response with
+outputsize=full (about 20 years of bars). Without it a synthetic payload
+of the same shape and size is generated.
+"""
+
+import json
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app.schemas.stock import HistoricalPrice
+from app.services.series_parser import parse_time_series
+
+REPEAT = 20
+
+
+def synthetic_payload(years: int = 20) -> dict:
+    """Build a TIME_SERIES_DAILY-shaped payload, newest bar first."""
+    rng = random.Random(42)
+    bars = {}
+    day = date.today()
+    price = 100.0
+    for _ in range(years * 252):
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        price *= 1 + rng.gauss(0, 0.02)
+        bars[day.isoformat()] = {
+            "1. open": f"{price * 0.99:.4f}",
+            "2. high": f"{price * 1.01:.4f}",
+            "3. low": f"{price * 0.98:.4f}",
+            "4. close": f"{price:.4f}",
+            "5. volume": str(rng.randint(1_000_000, 50_000_000))
+        }
+        day -= timedelta(days=1)
+    return {"Time Series (Daily)": bars}
+
+
+def legacy_parse(time_series: dict) -> list:
+    """The per-row parsing path used before the columnar parser."""
+    historical_data = []
+    for date_str, values in time_series.items():
+        price_point = HistoricalPrice(
+            date=datetime.strptime(date_str, "%Y-%m-%d"),
+            open=Decimal(values["1. open"]),
+            high=Decimal(values["2. high"]),
+            low=Decimal(values["3. low"]),
+            close=Decimal(values["4. close"]),
+            volume=int(values["5. volume"])
+        )
+        historical_data.append(price_point)
+    historical_data.sort(key=lambda x: x.date)
+    return [h.model_dump() for h in historical_data]
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            payload = json.load(f)
+        source = sys.argv[1]
+    else:
+        payload = synthetic_payload()
+        source = "synthetic"
+
+    time_series = payload["Time Series (Daily)"]
+    print(f"Payload: {source}, {len(time_series)} bars")
+
+    legacy = timeit.timeit(lambda: legacy_parse(time_series), number=REPEAT) / REPEAT
+    columnar = timeit.timeit(lambda: parse_time_series(time_series), number=REPEAT) / REPEAT
+
+    print(f"legacy per-row parse:  {legacy * 1000:8.2f} ms")
+    print(f"parse_time_series:     {columnar * 1000:8.2f} ms")
+    print(f"speedup:               {legacy / columnar:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: local symbol index lookup latency.
+
+Builds a SymbolIndex over a listed-symbol universe and times autocomplete
+style queries (every prefix of a set of tickers and company names).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_symbol_index [listing_status.csv]
+
+listing_status.csv should be an Alpha Vantage LISTING_STATUS download.
+Without it a synthetic universe of 12,000 symbols is generated, with
+company names drawn from a Zipf-distributed vocabulary.
+"""
+
+import random
+import string
+import sys
+import time
+from app.services.symbol_index import SymbolIndex, parse_listing_csv
+
+QUERIES = ["AAPL", "MSFT", "Apple", "Microsoft Corporation", "bank of america", "global", "energy", "holdings"]
+SUFFIXES = ["Inc", "Corp", "Holdings", "Group", "Trust", "Fund", "ETF", "Ltd", "Co", "Plc"]
+
+
+def synthetic_listings(count: int = 12_000) -> list:
+    """Generate (symbol, name, type) rows shaped like a real listing."""
+    rng = random.Random(7)
+    vocabulary = [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))).capitalize()
+        for _ in range(4_000)
+    ]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    rows = {"AAPL": ("AAPL", "Apple Inc", "Equity"), "MSFT": ("MSFT", "Microsoft Corporation", "Equity")}
+    while len(rows) < count:
+        symbol = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(1, 5)))
+        if symbol in rows:
+            continue
+        words = rng.choices(vocabulary, weights, k=rng.randint(1, 3)) + [rng.choice(SUFFIXES)]
+        rows[symbol] = (symbol, " ".join(words), rng.choice(["Equity", "Equity", "ETF"]))
+    return list(rows.values())
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            listings = parse_listing_csv(f.read())
+        source = sys.argv[1]
+    else:
+        listings = synthetic_listings()
+        source = "synthetic"
+
+    started = time.perf_counter()
+    index = SymbolIndex(listings)
+    print(f"Universe: {source}, {len(index)} symbols, built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # Every prefix of each query, as typed into an autocomplete box
+    prefixes = [q[:n] for q in QUERIES for n in range(1, len(q) + 1)]
+    latencies = []
+    for _ in range(50):
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.search(prefix, 10)
+            latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    for label, q in (("p50", 0.50), ("p99", 0.99), ("max", 1.0)):
+        value = latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+        print(f"{label}: {value * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
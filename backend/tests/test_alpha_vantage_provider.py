@@ -0,0 +1,40 @@
+"""Tests for how the Alpha Vantage provider classifies failed bulk quote replies."""
+
+import asyncio
+import pytest
+from app.services.alpha_vantage_provider import AlphaVantageProvider
+from app.services.upstream_scheduler import Priority, UpstreamScheduler, set_upstream_scheduler
+from app.utils.exceptions import UpstreamRateLimitedError, UpstreamUnavailableError
+
+
+def _bulk_quotes(reply: dict) -> dict:
+    async def send(params):
+        return reply
+
+    async def run():
+        scheduler = UpstreamScheduler(send, per_minute=0, per_day=0)
+        previous = set_upstream_scheduler(scheduler)
+        try:
+            return await AlphaVantageProvider().quotes(["AAPL", "MSFT"], Priority.INTERACTIVE)
+        finally:
+            set_upstream_scheduler(previous)
+            await scheduler.stop()
+
+    return asyncio.run(run())
+
+
+def test_bulk_quotes():
+    rows = _bulk_quotes({"data": [{"symbol": "aapl", "close": "190.5", "previous_close": "189.0"}]})
+    assert list(rows) == ["AAPL"]
+
+
+def test_failed_bulk_request_is_not_a_missing_symbol():
+    with pytest.raises(UpstreamUnavailableError) as error:
+        _bulk_quotes({"Error Message": "Invalid API call"})
+    # ValueError would mean "not found" and be negatively cached for every symbol
+    assert not isinstance(error.value, ValueError)
+
+
+def test_bulk_rate_limit_notice():
+    with pytest.raises(UpstreamRateLimitedError):
+        _bulk_quotes({"Information": "This is a premium endpoint."})
@@ -0,0 +1,84 @@
+"""Tests for the LRU + TTL cache regions and their stale and fallback windows."""
+
+from app.utils.cache import CacheRegion, RegionConfig
+
+
+def _region(**config) -> CacheRegion:
+    return CacheRegion("test", RegionConfig(**config))
+
+
+def test_ttl_expiry():
+    region = _region(ttl=10)
+    region.set("a", 1, now=100)
+    assert region.get("a", now=109) == 1
+    assert region.get("a", now=110) is None
+    assert len(region) == 0
+
+
+def test_stale_window():
+    region = _region(ttl=10, stale_ttl=5)
+    region.set("a", 1, now=100)
+    assert region.get_entry("a", now=105).is_fresh(105)
+
+    entry = region.get_entry("a", now=112)
+    assert entry.value == 1 and not entry.is_fresh(112)
+    # get() never serves stale values
+    assert region.get("a", now=112) is None
+    assert region.get_entry("a", now=115) is None
+    assert region.stats()["stale_hits"] == 1
+
+
+def test_fallback_window():
+    region = _region(ttl=10, stale_ttl=5, fallback_ttl=100)
+    region.set("a", 1, now=100)
+    assert region.get_entry("a", now=120) is None
+    assert region.fallback("a", now=120).value == 1
+    assert region.fallback("a", now=214).value == 1
+    assert region.fallback("a", now=215) is None
+
+
+def test_sweep_keeps_retained_entries():
+    region = _region(ttl=10, stale_ttl=5, fallback_ttl=20)
+    region.set("a", 1, now=100)
+    region.set("b", 2, now=120)
+    assert region.sweep(now=134) == 0
+    assert region.sweep(now=135) == 1
+    assert region.peek("a") is None
+    assert region.peek("b").value == 2
+
+
+def test_lru_eviction():
+    region = _region(ttl=60, max_entries=2)
+    region.set("a", 1, now=100)
+    region.set("b", 2, now=100)
+    region.get("a", now=101)
+    region.set("c", 3, now=102)
+    assert region.peek("b") is None
+    assert region.get("a", now=103) == 1
+    assert region.stats()["evictions"] == 1
+
+
+def test_byte_budget():
+    region = _region(ttl=60, max_bytes=2_000)
+    region.set("small", "x", now=100)
+    region.set("big", "x" * 5_000, now=100)
+    assert region.peek("big") is None
+    assert region.peek("small") is not None
+    for i in range(100):
+        region.set(i, "y" * 100, now=100)
+    assert region.bytes <= 2_000
+
+
+def test_export_and_restore_keep_timestamps_and_order():
+    source = _region(ttl=10, fallback_ttl=50)
+    source.set("old", 1, now=100)
+    source.set("new", 2, now=130)
+    source.get("new", now=131)
+    records = source.export(now=135)
+    assert [key for key, *_ in records] == ["new", "old"]
+
+    target = _region(ttl=10, fallback_ttl=50)
+    assert target.restore(records, now=140) == 2
+    assert target.get("old", now=140) is None
+    assert target.fallback("old", now=140).stored_at == 100
+    assert target.get("new", now=139) == 2
@@ -0,0 +1,80 @@
+"""Tests for the RESP shared cache backend against the local cache server."""
+
+import asyncio
+from app.utils.cache_backend import RespBackend
+from app.utils.cache_server import CacheServer
+
+
+def _run(tmp_path, scenario):
+    async def run():
+        path = str(tmp_path / "cache.sock")
+        server = CacheServer()
+        await server.serve_unix(path)
+        backend = RespBackend(f"unix://{path}", timeout=1.0)
+        try:
+            return await scenario(backend, server)
+        finally:
+            await backend.close()
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_set_and_get(tmp_path):
+    async def scenario(backend, server):
+        await backend.set("quote", "AAPL", ({"price": 1}, 10.0, 20.0), 60)
+        return await backend.get("quote", "AAPL")
+
+    assert _run(tmp_path, scenario) == ({"price": 1}, 10.0, 20.0)
+
+
+def test_release_keeps_another_workers_lock(tmp_path):
+    async def scenario(backend, server):
+        lock_key = backend._lock_key("quote", "AAPL").encode()
+        assert await backend.acquire("quote", "AAPL", 30)
+        # The lock expired during a slow fill and another worker took it
+        server.execute([b"SET", lock_key, b"other-worker"])
+        await backend.release("quote", "AAPL")
+        kept = server.execute([b"GET", lock_key])
+
+        assert await backend.acquire("quote", "MSFT", 30)
+        await backend.release("quote", "MSFT")
+        released = server.execute([b"GET", backend._lock_key("quote", "MSFT").encode()])
+        return kept, released
+
+    assert _run(tmp_path, scenario) == (b"other-worker", None)
+
+
+def test_error_reply_only_fails_that_command(tmp_path):
+    async def scenario(backend, server):
+        assert await backend.execute("NOSUCHCOMMAND") is None
+        assert await backend.execute("PING") == "PONG"
+        return backend.stats()
+
+    stats = _run(tmp_path, scenario)
+    assert stats["command_errors"] == 1
+    assert stats["errors"] == 0
+    assert stats["connected"]
+
+
+def test_disconnect_stops_the_reader(tmp_path):
+    async def scenario(backend, server):
+        assert await backend.execute("PING") == "PONG"
+        reader_task = backend._reader_task
+        backend._disconnect(ConnectionError("dropped"))
+        await asyncio.sleep(0)
+        return reader_task.cancelled(), backend._reader_task
+
+    assert _run(tmp_path, scenario) == (True, None)
+
+
+def test_old_reader_does_not_drop_a_new_connection(tmp_path):
+    async def scenario(backend, server):
+        # A read loop still attached to a connection that has been replaced
+        stale = asyncio.StreamReader()
+        stale_task = asyncio.create_task(backend._read_loop(stale))
+        assert await backend.execute("PING") == "PONG"
+        stale.feed_eof()
+        await stale_task
+        return backend.stats()["connected"], await backend.execute("PING")
+
+    assert _run(tmp_path, scenario) == (True, "PONG")
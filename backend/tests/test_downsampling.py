@@ -0,0 +1,56 @@
+"""Tests for LTTB chart downsampling."""
+
+import random
+from app.services.downsampling import _bucket_bounds, downsample, lttb_indices
+from app.services.price_series import PriceSeries
+
+
+def _series(count: int, seed: int = 3) -> PriceSeries:
+    rng = random.Random(seed)
+    price = 100.0
+    bars = []
+    for i in range(count):
+        price += rng.uniform(-1, 1)
+        bars.append((1_700_000_000 + i * 300, price, price + 1, price - 1, price + 0.5, rng.randint(1, 1000)))
+    return PriceSeries.from_bars(bars)
+
+
+def test_within_budget_is_unchanged():
+    series = _series(50)
+    assert lttb_indices(series.timestamps, series.close, 50) == list(range(50))
+    assert lttb_indices(series.timestamps, series.close, 2) == list(range(50))
+    assert downsample(series, 100) is series
+
+
+def test_one_point_per_bucket():
+    x = list(range(1000))
+    y = [random.Random(i).random() for i in x]
+    selected = lttb_indices(x, y, 100)
+    bounds = _bucket_bounds(1000, 100)
+    assert len(selected) == 100
+    assert selected[0] == 0 and selected[-1] == 999
+    for index, start, end in zip(selected, bounds, bounds[1:]):
+        assert start <= index < end
+
+
+def test_keeps_spikes():
+    x = list(range(500))
+    y = [1.0] * 500
+    y[123] = 50.0
+    y[321] = -50.0
+    selected = lttb_indices(x, y, 20)
+    assert 123 in selected
+    assert 321 in selected
+
+
+def test_downsample_aggregates_buckets():
+    series = _series(1000)
+    result = downsample(series, 100)
+    assert len(result) == 100
+    assert set(result.timestamps) <= set(series.timestamps)
+    assert result.open[0] == series.open[0]
+    assert result.close[-1] == series.close[-1]
+    # Every bar is in exactly one bucket
+    assert sum(result.volume) == sum(series.volume)
+    assert max(result.high) == max(series.high)
+    assert min(result.low) == min(series.low)
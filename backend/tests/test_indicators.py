@@ -0,0 +1,114 @@
+"""Tests for technical indicators: incremental updates must match a full computation."""
+
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from app.services.indicators import IndicatorCache, compute_indicators, to_json_values
+from app.services.price_series import PriceSeries, to_timestamp
+
+
+def _series(count: int, step: timedelta, seed: int = 7) -> PriceSeries:
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 3, 9, 30)
+    price = 100.0
+    bars = []
+    for i in range(count):
+        open_ = price
+        price = max(1.0, price + rng.gauss(0, 1.5))
+        high = max(open_, price) + rng.random()
+        low = min(open_, price) - rng.random()
+        bars.append((to_timestamp(start + i * step), open_, high, low, price, rng.randint(1_000, 100_000)))
+    return PriceSeries.from_bars(bars)
+
+
+def _assert_outputs_equal(actual: dict, expected: dict):
+    assert actual.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+
+
+@pytest.mark.parametrize("interval, step", [("1d", timedelta(days=1)), ("5min", timedelta(minutes=5))])
+def test_appended_bars_match_full(interval, step):
+    series = _series(400, step)
+    cache = IndicatorCache()
+    cache.get("AAPL", interval, series.slice(0, 360))
+    outputs = cache.get("AAPL", interval, series)
+    assert cache.incremental_updates == 1
+    _assert_outputs_equal(outputs, compute_indicators(series, intraday=interval == "5min"))
+
+
+def test_revised_last_bar_matches_full():
+    series = _series(300, timedelta(days=1))
+    cache = IndicatorCache()
+    cache.get("AAPL", "1d", series)
+    revised = series.slice(0)
+    revised.close[-1] += 4.0
+    revised.high[-1] += 4.0
+    outputs = cache.get("AAPL", "1d", revised)
+    assert cache.incremental_updates == 1
+    _assert_outputs_equal(outputs, compute_indicators(revised))
+
+
+def test_rolling_window_matches_full():
+    series = _series(500, timedelta(minutes=5))
+    cache = IndicatorCache()
+    cache.get("AAPL", "5min", series.slice(0, 400))
+    moved = series.slice(100)
+    outputs = cache.get("AAPL", "5min", moved)
+    assert cache.incremental_updates == 1
+    # Dropped bars still count towards the warm-up of the bars that remain
+    full = compute_indicators(series, intraday=True)
+    _assert_outputs_equal(outputs, {name: column[100:] for name, column in full.items()})
+
+
+def test_revision_with_the_same_close_is_not_a_hit():
+    series = _series(300, timedelta(days=1))
+    cache = IndicatorCache()
+    cache.get("AAPL", "1d", series)
+    revised = series.slice(0)
+    revised.high[-1] += 6.0
+    revised.low[-1] -= 6.0
+    revised.volume[-1] *= 3
+    outputs = cache.get("AAPL", "1d", revised)
+    assert cache.hits == 0
+    _assert_outputs_equal(outputs, compute_indicators(revised))
+
+
+def test_unchanged_series_is_a_hit():
+    series = _series(100, timedelta(days=1))
+    cache = IndicatorCache()
+    first = cache.get("AAPL", "1d", series)
+    assert cache.get("AAPL", "1d", series.slice(0)) is first
+    assert cache.hits == 1
+
+
+def test_short_series_recomputes_in_full():
+    series = _series(60, timedelta(days=1))
+    cache = IndicatorCache()
+    cache.get("AAPL", "1d", series.slice(0, 10))
+    _assert_outputs_equal(cache.get("AAPL", "1d", series), compute_indicators(series))
+    assert cache.full_builds == 2
+
+
+def test_values_against_definitions():
+    series = _series(200, timedelta(days=1))
+    outputs = compute_indicators(series)
+    close = np.asarray(series.close)
+    assert np.isnan(outputs["sma_20"][18])
+    assert outputs["sma_20"][-1] == pytest.approx(close[-20:].mean())
+    assert outputs["bb_upper"][-1] == pytest.approx(close[-20:].mean() + 2 * close[-20:].std())
+
+    # EMA seeded with the SMA of the first span bars, then the usual recursion
+    alpha = 2 / 13
+    ema = close[:12].mean()
+    for value in close[12:]:
+        ema += alpha * (value - ema)
+    assert outputs["ema_12"][-1] == pytest.approx(ema)
+
+    rsi = outputs["rsi_14"][~np.isnan(outputs["rsi_14"])]
+    assert len(rsi) and ((rsi >= 0) & (rsi <= 100)).all()
+
+
+def test_json_values():
+    assert to_json_values(np.array([np.nan, 1.234567, 2.0])) == [None, 1.2346, 2.0]
@@ -0,0 +1,79 @@
+"""Tests for the shared, lifespan-managed market data HTTP client."""
+
+import asyncio
+import httpx
+from app.services.market_data_client import (
+    MarketDataClient,
+    close_market_data_client,
+    get_market_data_client,
+    set_market_data_client,
+    start_market_data_client
+)
+from app.services.upstream_scheduler import _send_alpha_vantage
+
+
+def _pooled_client(monkeypatch, requests: list) -> MarketDataClient:
+    """A client that owns its pool, with the network replaced by a mock transport."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"symbol": request.url.params["symbol"]})
+
+    client = MarketDataClient()
+    built = []
+
+    def build():
+        built.append(httpx.AsyncClient(base_url="https://example.test", transport=httpx.MockTransport(handler)))
+        return built[-1]
+
+    monkeypatch.setattr(client, "_build_client", build)
+    client.built = built
+    return client
+
+
+def test_client_is_reused_across_calls(monkeypatch):
+    requests = []
+    client = _pooled_client(monkeypatch, requests)
+
+    async def run():
+        first = await client.get("/query", {"symbol": "AAPL"})
+        second = await client.get("/query", {"symbol": "MSFT"})
+        return first.json(), second.json()
+
+    assert asyncio.run(run()) == ({"symbol": "AAPL"}, {"symbol": "MSFT"})
+    assert len(client.built) == 1
+    assert len(requests) == 2
+
+
+def test_lifespan_opens_and_closes_the_shared_client(monkeypatch):
+    requests = []
+    client = _pooled_client(monkeypatch, requests)
+    previous = set_market_data_client(client)
+    try:
+        async def run():
+            start_market_data_client()
+            pooled = get_market_data_client().client
+            # Every upstream call goes through the one pool
+            await _send_alpha_vantage({"function": "GLOBAL_QUOTE", "symbol": "AAPL"})
+            await _send_alpha_vantage({"function": "GLOBAL_QUOTE", "symbol": "MSFT"})
+            assert get_market_data_client().client is pooled
+            await close_market_data_client()
+            return pooled
+
+        pooled = asyncio.run(run())
+        assert pooled.is_closed
+        assert len(client.built) == 1
+        assert [r.url.params["symbol"] for r in requests] == ["AAPL", "MSFT"]
+    finally:
+        set_market_data_client(previous)
+
+
+def test_injected_client_is_not_closed():
+    async def run():
+        injected = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(204)))
+        client = MarketDataClient(injected)
+        await client.aclose()
+        closed = injected.is_closed
+        await injected.aclose()
+        return closed
+
+    assert asyncio.run(run()) is False
@@ -0,0 +1,151 @@
+"""Tests for the memory-mapped OHLCV store."""
+
+import os
+import threading
+import time
+from array import array
+from app.services import ohlcv_store
+from app.services.ohlcv_store import HEADER, OHLCVStore
+from app.services.price_series import PriceSeries
+
+DAY = 86400
+START = 1_700_006_400
+
+
+def _bars(first: int, count: int, close_offset: float = 0.0) -> PriceSeries:
+    return PriceSeries.from_bars(
+        (START + i * DAY, 10.0 + i, 12.0 + i, 9.0 + i, 11.0 + i + close_offset, 100 + i)
+        for i in range(first, first + count)
+    )
+
+
+def _rows(series: PriceSeries) -> list:
+    return list(zip(series.timestamps, series.open, series.high, series.low, series.close, series.volume))
+
+
+def _capacity(store: OHLCVStore, symbol: str) -> int:
+    with open(store._path(symbol), "rb") as f:
+        return HEADER.unpack(f.read(HEADER.size))[4]
+
+
+def test_missing_symbol(tmp_path):
+    assert OHLCVStore(str(tmp_path)).read("AAPL") is None
+
+
+def test_append_and_read(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    assert store.append("aapl", _bars(0, 10)) == 10
+    assert _rows(store.read("AAPL")) == _rows(_bars(0, 10))
+
+
+def test_append_in_place_keeps_capacity(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", _bars(0, 10))
+    capacity = _capacity(store, "AAPL")
+    # Overlapping bars are skipped, only newer ones are added
+    assert store.append("AAPL", _bars(5, 10)) == 5
+    assert _capacity(store, "AAPL") == capacity
+    assert _rows(store.read("AAPL")) == _rows(_bars(0, 15))
+
+
+def test_append_grows_file(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", _bars(0, 10))
+    capacity = _capacity(store, "AAPL")
+    assert store.append("AAPL", _bars(10, capacity)) == capacity
+    assert _capacity(store, "AAPL") > capacity
+    assert _rows(store.read("AAPL")) == _rows(_bars(0, 10 + capacity))
+
+
+def test_revised_last_bar_is_copy_on_write(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", _bars(0, 10))
+    before = store.read("AAPL")
+    assert store.append("AAPL", _bars(9, 3, close_offset=0.5)) == 2
+
+    after = store.read("AAPL")
+    assert after.close[9] == 20.5
+    assert len(after) == 12
+    # A series read earlier still sees the bars it was read with
+    assert _rows(before) == _rows(_bars(0, 10))
+
+
+def test_unchanged_last_bar_is_not_rewritten(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", _bars(0, 10))
+    inode = os.stat(store._path("AAPL")).st_ino
+    assert store.append("AAPL", _bars(9, 1)) == 0
+    assert os.stat(store._path("AAPL")).st_ino == inode
+
+
+def test_compact_leaves_normal_files_alone(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", _bars(0, 10))
+    store.append("AAPL", _bars(10, 5))
+    inode = os.stat(store._path("AAPL")).st_ino
+    assert not store.compact("AAPL")
+    assert os.stat(store._path("AAPL")).st_ino == inode
+
+
+def test_compact_sorts_and_deduplicates(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    bars = _bars(0, 10)
+    # As an older writer could have left it: two bars swapped and one repeated
+    order = [0, 1, 3, 2, 4, 5, 6, 7, 8, 9, 9]
+    store._write_file("AAPL", PriceSeries(*(
+        array(type_code, [getattr(bars, name)[i] for i in order])
+        for name, type_code in zip(ohlcv_store.COLUMNS, ohlcv_store.COLUMN_TYPES)
+    )))
+    assert store.compact("AAPL")
+    assert _rows(store.read("AAPL")) == _rows(bars)
+
+
+def test_compact_shrinks_capacity(tmp_path, monkeypatch):
+    store = OHLCVStore(str(tmp_path))
+    with monkeypatch.context() as patch:
+        patch.setattr(ohlcv_store, "_capacity_for", lambda count: count + 10_000)
+        store.append("AAPL", _bars(0, 50))
+    assert _capacity(store, "AAPL") == 10_050
+
+    assert store.compact("AAPL")
+    assert _capacity(store, "AAPL") == ohlcv_store._capacity_for(50)
+    assert _rows(store.read("AAPL")) == _rows(_bars(0, 50))
+
+
+def test_compact_all_removes_temporary_files(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("AAPL", _bars(0, 10))
+    leftover = tmp_path / "MSFT.ohlcv.tmp.12345"
+    leftover.write_bytes(b"partial")
+    store.compact_all()
+    assert not leftover.exists()
+    assert _rows(store.read("AAPL")) == _rows(_bars(0, 10))
+
+
+def test_temporary_file_of_a_running_write_is_kept(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    leftover = tmp_path / "BRK.B.ohlcv.tmp.12345"
+    leftover.write_bytes(b"partial")
+    compaction = threading.Thread(target=store.compact_all)
+    # Another writer holds the symbol's lock while it writes its file
+    with store._lock("BRK.B"):
+        compaction.start()
+        time.sleep(0.1)
+        assert leftover.exists()
+    compaction.join(timeout=5)
+    assert not leftover.exists()
+
+
+def test_stopped_compaction_does_nothing(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    leftover = tmp_path / "MSFT.ohlcv.tmp.12345"
+    leftover.write_bytes(b"partial")
+    store.stop_compaction()
+    store.compact_all()
+    assert leftover.exists()
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    (tmp_path / "AAPL.ohlcv").write_bytes(b"not an ohlcv file" * 8)
+    assert store.read("AAPL") is None
@@ -0,0 +1,108 @@
+"""Tests for portfolio snapshot generations, repricing and cross-worker invalidation."""
+
+import asyncio
+import json
+from decimal import Decimal
+from app.services.portfolio_snapshots import PortfolioSnapshotCache
+from app.utils.holding_calculator import value_portfolio
+
+HOLDINGS = [
+    {"symbol": "AAPL", "company_name": "Apple", "shares": 10, "average_cost": 100, "purchased_at": "2024-01-02T15:00:00"},
+    {"symbol": "MSFT", "company_name": "Microsoft", "shares": 5, "average_cost": 300, "purchased_at": "2024-01-03T15:00:00"}
+]
+
+
+def _portfolio():
+    return value_portfolio(HOLDINGS, {"AAPL": Decimal("110"), "MSFT": Decimal("300")})
+
+
+class SharedBackend:
+    """In-memory stand-in for the shared cache tier, used by several workers."""
+
+    def __init__(self):
+        self.entries = {}
+
+    async def get(self, region, key):
+        return self.entries.get((region, key))
+
+    async def set(self, region, key, entry, ttl):
+        self.entries[(region, key)] = entry
+
+
+def test_snapshot_round_trip():
+    async def run():
+        cache = PortfolioSnapshotCache(ttl=60, max_users=10)
+        assert await cache.get("u1") is None
+        encoded = cache.put("u1", await cache.generation("u1"), _portfolio())
+        assert await cache.get("u1") == encoded
+        return cache.stats()
+
+    stats = asyncio.run(run())
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_trade_during_valuation_is_not_overwritten():
+    async def run():
+        cache = PortfolioSnapshotCache(ttl=60, max_users=10)
+        generation = await cache.generation("u1")
+        # A trade lands while the portfolio is being valued
+        cache.invalidate("u1")
+        cache.put("u1", generation, _portfolio())
+        return await cache.get("u1")
+
+    assert asyncio.run(run()) is None
+
+
+def test_quote_reprices_held_symbol():
+    async def run():
+        cache = PortfolioSnapshotCache(ttl=60, max_users=10)
+        cache.put("u1", await cache.generation("u1"), _portfolio())
+        cache.on_quote("AAPL", {"current_price": "120"})
+        return json.loads(await cache.get("u1"))
+
+    portfolio = asyncio.run(run())
+    expected = value_portfolio(HOLDINGS, {"AAPL": Decimal("120"), "MSFT": Decimal("300")})
+    assert Decimal(portfolio["total_value"]) == expected.total_value
+    assert Decimal(portfolio["profit_loss"]) == expected.profit_loss
+
+
+def test_max_users_drops_oldest():
+    async def run():
+        cache = PortfolioSnapshotCache(ttl=60, max_users=2)
+        for user_id in ("u1", "u2", "u3"):
+            cache.put(user_id, await cache.generation(user_id), _portfolio())
+        return [await cache.get(user_id) is not None for user_id in ("u1", "u2", "u3")]
+
+    assert asyncio.run(run()) == [False, True, True]
+
+
+def test_trade_on_another_worker_invalidates():
+    async def run():
+        backend = SharedBackend()
+        worker_a = PortfolioSnapshotCache(ttl=60, max_users=10, backend=backend)
+        worker_b = PortfolioSnapshotCache(ttl=60, max_users=10, backend=backend)
+        worker_a.put("u1", await worker_a.generation("u1"), _portfolio())
+        assert await worker_a.get("u1") is not None
+
+        worker_b.invalidate("u1")
+        await worker_b.published("u1")
+        return await worker_a.get("u1"), worker_a.remote_invalidations
+
+    snapshot, remote_invalidations = asyncio.run(run())
+    assert snapshot is None
+    assert remote_invalidations == 1
+
+
+def test_remote_trade_during_valuation_is_not_served():
+    async def run():
+        backend = SharedBackend()
+        worker_a = PortfolioSnapshotCache(ttl=60, max_users=10, backend=backend)
+        worker_b = PortfolioSnapshotCache(ttl=60, max_users=10, backend=backend)
+        generation = await worker_a.generation("u1")
+        worker_b.invalidate("u1")
+        await worker_b.published("u1")
+        # Valued from holdings read before the trade
+        worker_a.put("u1", generation, _portfolio())
+        return await worker_a.get("u1")
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,100 @@
+"""Tests for OHLC resampling and incremental aggregate updates."""
+
+from array import array
+from datetime import datetime, timedelta
+import pytest
+from app.services.price_series import PriceSeries, to_timestamp
+from app.services.resampling import ResampleCache, bucket_function, resample, update_resampled
+
+
+def _daily(start: datetime, days: int) -> PriceSeries:
+    bars = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        if day.weekday() < 5:
+            price = 100.0 + i
+            bars.append((to_timestamp(day), price, price + 2, price - 2, price + 1, 1000 + i))
+    return PriceSeries.from_bars(bars)
+
+
+def _intraday(start: datetime, count: int) -> PriceSeries:
+    bars = []
+    for i in range(count):
+        price = 50.0 + (i % 7)
+        bars.append((to_timestamp(start + timedelta(minutes=5 * i)), price, price + 1, price - 1, price + 0.5, 10 + i))
+    return PriceSeries.from_bars(bars)
+
+
+def _copy(series: PriceSeries) -> PriceSeries:
+    return PriceSeries(*(
+        array(type_code, column) for type_code, column in zip(
+            ("q", "d", "d", "d", "d", "q"),
+            (series.timestamps, series.open, series.high, series.low, series.close, series.volume)
+        )
+    ))
+
+
+def _bars(series: PriceSeries) -> list:
+    return list(zip(series.timestamps, series.open, series.high, series.low, series.close, series.volume))
+
+
+def test_bucket_alignment():
+    week = bucket_function("1wk")
+    month = bucket_function("1mo")
+    hour = bucket_function("1h")
+    assert week(to_timestamp(datetime(2024, 1, 3, 16))) == to_timestamp(datetime(2024, 1, 1))
+    assert week(to_timestamp(datetime(2024, 1, 7))) == to_timestamp(datetime(2024, 1, 1))
+    assert month(to_timestamp(datetime(2024, 2, 29))) == to_timestamp(datetime(2024, 2, 1))
+    # Hourly bars start at the 9:30 open
+    assert hour(to_timestamp(datetime(2024, 1, 2, 10, 25))) == to_timestamp(datetime(2024, 1, 2, 9, 30))
+    assert hour(to_timestamp(datetime(2024, 1, 2, 10, 30))) == to_timestamp(datetime(2024, 1, 2, 10, 30))
+
+
+def test_unsupported_interval():
+    with pytest.raises(ValueError):
+        bucket_function("2d")
+
+
+def test_weekly_ohlc():
+    series = _daily(datetime(2024, 1, 1), 14)
+    weekly = resample(series, "1wk")
+    assert list(weekly.timestamps) == [to_timestamp(datetime(2024, 1, 1)), to_timestamp(datetime(2024, 1, 8))]
+    first_week = series.slice(0, 5)
+    assert weekly.open[0] == first_week.open[0]
+    assert weekly.close[0] == first_week.close[-1]
+    assert weekly.high[0] == max(first_week.high)
+    assert weekly.low[0] == min(first_week.low)
+    assert weekly.volume[0] == sum(first_week.volume)
+
+
+@pytest.mark.parametrize("interval, make, start, count", [
+    ("1wk", _daily, datetime(2023, 1, 2), 400),
+    ("1mo", _daily, datetime(2023, 1, 2), 400),
+    ("1h", _intraday, datetime(2024, 1, 2, 9, 30), 300),
+    ("15min", _intraday, datetime(2024, 1, 2, 9, 30), 300)
+])
+def test_incremental_update_matches_full(interval, make, start, count):
+    base = make(start, count)
+    previous = resample(base.slice(0, len(base) - 40), interval)
+    # New bars plus a revised last bar
+    updated = _copy(base)
+    updated.close[-1] += 3.0
+    updated.high[-1] += 5.0
+    assert _bars(update_resampled(updated, interval, previous)) == _bars(resample(updated, interval))
+
+
+def test_update_rebuilds_after_window_moves():
+    base = _intraday(datetime(2024, 1, 2, 9, 30), 300)
+    previous = resample(base, "1h")
+    moved = base.slice(100)
+    assert _bars(update_resampled(moved, "1h", previous)) == _bars(resample(moved, "1h"))
+
+
+def test_cache_reuses_and_extends():
+    cache = ResampleCache()
+    base = _daily(datetime(2024, 1, 1), 60)
+    first = cache.get("AAPL", "1wk", base)
+    assert cache.get("AAPL", "1wk", base) is first
+    longer = _daily(datetime(2024, 1, 1), 70)
+    assert _bars(cache.get("AAPL", "1wk", longer)) == _bars(resample(longer, "1wk"))
+    assert cache.stats() == {"entries": 1, "full_builds": 1, "incremental_updates": 1}
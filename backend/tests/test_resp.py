@@ -0,0 +1,52 @@
+"""Tests for RESP2 framing."""
+
+import asyncio
+import pytest
+from app.utils.resp import RespError, encode_command, encode_reply, read_command, read_reply
+
+
+def _read(data: bytes, reader=read_reply):
+    async def read():
+        stream = asyncio.StreamReader()
+        stream.feed_data(data)
+        stream.feed_eof()
+        return await reader(stream)
+    return asyncio.run(read())
+
+
+def test_encode_command():
+    assert encode_command("SET", "k", b"v\r\n", 5) == b"*4\r\n$3\r\nSET\r\n$1\r\nk\r\n$3\r\nv\r\n\r\n$1\r\n5\r\n"
+
+
+def test_reply_round_trip():
+    value = ["OK", 42, b"binary\r\n\x00data", None, [b"nested", -1], b""]
+    assert _read(encode_reply(value)) == value
+
+
+def test_error_reply_is_returned():
+    reply = _read(encode_reply(RespError("ERR boom")))
+    assert isinstance(reply, RespError)
+    assert str(reply) == "ERR boom"
+
+
+def test_null_array():
+    assert _read(b"*-1\r\n") is None
+
+
+def test_truncated_stream():
+    with pytest.raises(ConnectionError):
+        _read(b"+OK")
+    with pytest.raises(asyncio.IncompleteReadError):
+        _read(b"$10\r\nshort\r\n")
+
+
+def test_invalid_type_byte():
+    with pytest.raises(ConnectionError):
+        _read(b"?what\r\n")
+
+
+def test_read_command():
+    assert _read(encode_command("GET", "key"), read_command) == [b"GET", b"key"]
+    assert _read(b"", read_command) is None
+    with pytest.raises(RespError):
+        _read(b"+PING\r\n", read_command)
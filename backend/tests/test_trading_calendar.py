@@ -0,0 +1,85 @@
+"""Tests for the NYSE holiday rules and precomputed sessions."""
+
+from datetime import date, datetime
+from app.services.price_series import from_timestamp, to_timestamp
+from app.services.trading_calendar import TradingCalendar, nyse_early_closes, nyse_holidays
+
+
+def test_holidays_2024():
+    assert nyse_holidays(2024) == {
+        date(2024, 1, 1),
+        date(2024, 1, 15),
+        date(2024, 2, 19),
+        date(2024, 3, 29),
+        date(2024, 5, 27),
+        date(2024, 6, 19),
+        date(2024, 7, 4),
+        date(2024, 9, 2),
+        date(2024, 11, 28),
+        date(2024, 12, 25)
+    }
+
+
+def test_weekend_holidays_are_observed():
+    # Independence Day 2021 was a Sunday, Juneteenth and Christmas 2022 too
+    assert date(2021, 7, 5) in nyse_holidays(2021)
+    assert date(2022, 6, 20) in nyse_holidays(2022)
+    assert date(2022, 12, 26) in nyse_holidays(2022)
+
+
+def test_saturday_new_year_is_not_observed_on_friday():
+    # 2022-01-01 was a Saturday; the NYSE stayed open on 2021-12-31
+    assert date(2021, 12, 31) not in nyse_holidays(2021)
+    assert not any(day.month == 1 and day.day <= 3 for day in nyse_holidays(2022))
+
+
+def test_juneteenth_starts_in_2022():
+    assert not any(day.month == 6 for day in nyse_holidays(2021))
+
+
+def test_early_closes():
+    assert nyse_early_closes(2024, nyse_holidays(2024)) == {
+        date(2024, 7, 3),
+        date(2024, 11, 29),
+        date(2024, 12, 24)
+    }
+    # July 3 and Christmas Eve 2022 fell on weekends
+    assert nyse_early_closes(2022, nyse_holidays(2022)) == {date(2022, 11, 25)}
+
+
+def test_sessions_follow_daylight_saving_time():
+    calendar = TradingCalendar(2024, 2024)
+    # Last session on EST, first on EDT (clocks changed on 2024-03-10)
+    assert calendar.sessions_between(to_timestamp(datetime(2024, 3, 8)), to_timestamp(datetime(2024, 3, 12))) == [
+        (to_timestamp(datetime(2024, 3, 8, 14, 30)), to_timestamp(datetime(2024, 3, 8, 21, 0))),
+        (to_timestamp(datetime(2024, 3, 11, 13, 30)), to_timestamp(datetime(2024, 3, 11, 20, 0)))
+    ]
+
+
+def test_holiday_week_sessions():
+    calendar = TradingCalendar(2024, 2024)
+    sessions = calendar.sessions_between(to_timestamp(datetime(2024, 11, 25)), to_timestamp(datetime(2024, 11, 30)))
+    opens = [from_timestamp(start).date() for start, _ in sessions]
+    assert opens == [date(2024, 11, 25), date(2024, 11, 26), date(2024, 11, 27), date(2024, 11, 29)]
+    assert not calendar.is_trading_day(date(2024, 11, 28))
+    assert not calendar.is_trading_day(date(2024, 11, 30))
+
+
+def test_status_on_early_close():
+    calendar = TradingCalendar(2024, 2024)
+    close = to_timestamp(datetime(2024, 11, 29, 18, 0))  # 1:00 PM EST
+    assert calendar.status_at(close - 60) == ("open", None, close)
+    status, next_open, next_close = calendar.status_at(close + 60)
+    assert status == "after-hours"
+    assert next_open == to_timestamp(datetime(2024, 12, 2, 14, 30))
+    # After-hours end at 5:00 PM on half days
+    assert calendar.status_at(to_timestamp(datetime(2024, 11, 29, 22, 30)))[0] == "closed"
+
+
+def test_status_around_a_regular_session():
+    calendar = TradingCalendar(2024, 2024)
+    assert calendar.status_at(to_timestamp(datetime(2024, 3, 12, 7, 30)))[0] == "closed"
+    assert calendar.status_at(to_timestamp(datetime(2024, 3, 12, 9, 0)))[0] == "pre-market"
+    assert calendar.is_open(to_timestamp(datetime(2024, 3, 12, 13, 30)))
+    assert not calendar.is_open(to_timestamp(datetime(2024, 3, 12, 20, 0)))
+    assert not calendar.is_open(to_timestamp(datetime(2024, 3, 29, 15, 0)))  # Good Friday
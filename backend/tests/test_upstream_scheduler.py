@@ -0,0 +1,130 @@
+"""Tests for the upstream scheduler's request sharing, priorities and deadlines."""
+
+import asyncio
+import pytest
+from app.services.upstream_scheduler import Priority, UpstreamScheduler
+from app.utils.exceptions import UpstreamUnavailableError
+
+
+def _quote(symbol: str) -> dict:
+    return {"function": "GLOBAL_QUOTE", "symbol": symbol}
+
+
+def test_identical_requests_share_one_call():
+    sent = []
+
+    async def send(params):
+        sent.append(params["symbol"])
+        await asyncio.sleep(0.01)
+        return {"symbol": params["symbol"]}
+
+    async def run():
+        scheduler = UpstreamScheduler(send, per_minute=0, per_day=0)
+        try:
+            return await asyncio.gather(
+                scheduler.submit(_quote("AAPL")),
+                scheduler.submit(_quote("AAPL"), Priority.VALUATION),
+                scheduler.submit(_quote("MSFT"))
+            ), scheduler.deduplicated
+        finally:
+            await scheduler.stop()
+
+    results, deduplicated = asyncio.run(run())
+    assert results == [{"symbol": "AAPL"}, {"symbol": "AAPL"}, {"symbol": "MSFT"}]
+    assert sorted(sent) == ["AAPL", "MSFT"]
+    assert deduplicated == 1
+
+
+def test_higher_priority_is_sent_first():
+    sent = []
+
+    async def send(params):
+        sent.append(params["symbol"])
+
+    async def run():
+        scheduler = UpstreamScheduler(send, per_minute=0, per_day=0)
+        try:
+            await asyncio.gather(
+                scheduler.submit(_quote("SEARCH"), Priority.BACKGROUND),
+                scheduler.submit(_quote("VIEW"), Priority.INTERACTIVE),
+                scheduler.submit(_quote("HELD"), Priority.VALUATION)
+            )
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(run())
+    assert sent == ["HELD", "VIEW", "SEARCH"]
+
+
+def test_queued_request_expires_at_deadline():
+    async def send(params):
+        return params["symbol"]
+
+    async def run():
+        # One call per minute: the second request waits for a token past its deadline
+        scheduler = UpstreamScheduler(send, per_minute=1, per_day=0, deadline=0.05)
+        try:
+            assert await scheduler.submit(_quote("AAPL")) == "AAPL"
+            with pytest.raises(UpstreamUnavailableError) as error:
+                await scheduler.submit(_quote("MSFT"))
+            return error.value, scheduler.expired
+        finally:
+            await scheduler.stop()
+
+    error, expired = asyncio.run(run())
+    assert error.error_code == "UPSTREAM_DEADLINE_EXCEEDED"
+    assert expired == 1
+
+
+def test_daily_quota_rejects_without_queueing():
+    async def send(params):
+        return params["symbol"]
+
+    async def run():
+        scheduler = UpstreamScheduler(send, per_minute=0, per_day=1)
+        try:
+            await scheduler.submit(_quote("AAPL"))
+            with pytest.raises(UpstreamUnavailableError) as error:
+                await scheduler.submit(_quote("MSFT"))
+            return error.value
+        finally:
+            await scheduler.stop()
+
+    assert asyncio.run(run()).error_code == "UPSTREAM_QUOTA_EXHAUSTED"
+
+
+def test_promoted_requests_do_not_fill_their_old_lane():
+    release = None
+
+    async def send(params):
+        await release.wait()
+        return params["symbol"]
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        # Nothing is dispatched until the first call finishes
+        scheduler = UpstreamScheduler(send, per_minute=1, per_day=0, max_queue_size=2)
+        try:
+            first = asyncio.ensure_future(scheduler.submit(_quote("FIRST"), Priority.VALUATION))
+            await asyncio.sleep(0.01)
+            queued = [asyncio.ensure_future(scheduler.submit(_quote(s), Priority.BACKGROUND)) for s in ("A", "B")]
+            await asyncio.sleep(0)
+            # Promoted: their background slots are stale, so the lane has room again
+            promoted = [asyncio.ensure_future(scheduler.submit(_quote(s), Priority.VALUATION)) for s in ("A", "B")]
+            await asyncio.sleep(0)
+            third = asyncio.ensure_future(scheduler.submit(_quote("C"), Priority.BACKGROUND))
+            await asyncio.sleep(0)
+            depth = scheduler.stats()["queue_depth"]
+            rejected = scheduler.rejected_full
+            release.set()
+            await first
+            for task in queued + promoted + [third]:
+                task.cancel()
+            return depth, rejected
+        finally:
+            await scheduler.stop()
+
+    depth, rejected = asyncio.run(run())
+    assert rejected == 0
+    assert depth == {"valuation": 2, "interactive": 0, "background": 1}
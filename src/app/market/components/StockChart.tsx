@@ -5,6 +5,9 @@ import { Stock } from '@/lib/types';
 import { XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Area, AreaChart } from 'recharts';
 import { getStockHistory } from '@/lib/api/stocks';
 
+// Point budget for history requests; roughly the chart's width in pixels
+const CHART_MAX_POINTS = 600;
+
 interface StockChartProps {
     stock: Stock;
 }
@@ -36,7 +39,7 @@ export default function StockChart({ stock }: StockChartProps) {
                 };
                 
                 const period = periodMap[timeframe];
-                const history = await getStockHistory(stock.symbol, period);
+                const history = await getStockHistory(stock.symbol, period, CHART_MAX_POINTS);
                 
                 // Transform response to chart data
                 const transformed: ChartData[] = history.map(item => {
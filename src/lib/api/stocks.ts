@@ -1,5 +1,6 @@
-import { apiClient } from './client';
+import { API_BASE_URL, apiClient, tokenStorage } from './client';
 import type {
+  BatchQuoteResponse,
   StockQuoteResponse,
   StockDetailsResponse,
   StockSearchResult,
@@ -15,6 +16,37 @@ export async function getStockQuote(
   return apiClient.get<StockQuoteResponse>(`/api/stocks/quote/${symbol}`);
 }
 
+/**
+ * Subscribe to live quote ticks for a set of symbols over Server-Sent Events.
+ * onQuotes receives the latest quote for each symbol that changed.
+ * Returns a function that closes the stream.
+ */
+export function streamQuotes(
+  symbols: string[],
+  onQuotes: (quotes: Record<string, StockQuoteResponse>) => void
+): () => void {
+  const token = tokenStorage.getToken() ?? '';
+  const source = new EventSource(
+    `${API_BASE_URL}/api/stocks/stream/sse?symbols=${encodeURIComponent(symbols.join(','))}&token=${encodeURIComponent(token)}`
+  );
+  source.addEventListener('quotes', (event) => {
+    onQuotes(JSON.parse((event as MessageEvent).data));
+  });
+  return () => source.close();
+}
+
+/**
+ * Fetch current quotes for several symbols in one request.
+ * Symbols that could not be fetched are returned in `errors`.
+ */
+export async function getStockQuotes(
+  symbols: string[]
+): Promise<BatchQuoteResponse> {
+  return apiClient.get<BatchQuoteResponse>(
+    `/api/stocks/quotes?symbols=${encodeURIComponent(symbols.join(','))}`
+  );
+}
+
 /**
  * Fetch detailed stock information including fundamentals and market data.
  */
@@ -38,12 +70,18 @@ export async function searchStocks(
 
 /**
  * Fetch historical price data for charting.
+ * Pass maxPoints (e.g. the chart width) to get a downsampled series,
+ * and interval to choose the bar size (defaults to 5min for 1d, 1d otherwise).
  */
 export async function getStockHistory(
   symbol: string,
-  period: '1d' | '5d' | '1mo' | '3mo' | '1y' | '5y' = '1mo'
+  period: '1d' | '5d' | '1mo' | '3mo' | '1y' | '5y' = '1mo',
+  maxPoints?: number,
+  interval?: '5min' | '15min' | '30min' | '1h' | '1d' | '1wk' | '1mo'
 ): Promise<HistoricalPrice[]> {
+  const budget = maxPoints ? `&max_points=${maxPoints}` : '';
+  const barSize = interval ? `&interval=${interval}` : '';
   return apiClient.get<HistoricalPrice[]>(
-    `/api/stocks/${symbol}/history?period=${period}`
+    `/api/stocks/${symbol}/history?period=${period}${budget}${barSize}`
   );
 }
@@ -77,6 +77,15 @@ export interface StockQuoteResponse {
   change: number;
   change_percent: number;
   last_update: string;
+  previous_close?: number | null;
+  volume?: number | null;
+  day_high?: number | null;
+  day_low?: number | null;
+}
+
+export interface BatchQuoteResponse {
+  quotes: Record<string, StockQuoteResponse>;
+  errors: Record<string, string>;
 }
 
 export interface StockDetailsResponse {